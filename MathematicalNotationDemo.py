@@ -1,5 +1,77 @@
 import argparse
+import asyncio
+from collections import deque
+import csv
+import json
+import sys
+from fix_format_demonstration import disk_cache
 from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration import numeric
+from fix_format_demonstration import parallel
+from fix_format_demonstration import protocol
+from fix_format_demonstration import server
+from fix_format_demonstration.tokenizer import InvalidTokenError
+from fix_format_demonstration.utils import UnboundVariableError
+
+
+def read_expressions(lines, default_notation: str, pending: deque):
+    '''Yields a (notation, expression) pair for every non-blank line.  A line may start with its own
+    notation, e.g. "prefix: + 2 2", which overrides the default.  The line number, notation and expression
+    of every pair are also appended to pending, so that the results can be matched up with their lines.
+    '''
+    for line_number, line in enumerate(lines, start=1):
+        equation = line.strip()
+        if not equation:
+            continue
+        notation = default_notation
+        prefix, colon, rest = equation.partition(":")
+        if colon and prefix.strip().lower() in fix_format_readers.CALCULATORS:
+            notation = prefix.strip().lower()
+            equation = rest.strip()
+        pending.append((line_number, notation, equation))
+        yield notation, equation
+
+
+def run_batch(lines, output, notation: str = "infix", sep: str = None, jobs: int = 1, output_format: str = "plain",
+              numeric_backend: str = None, cache: disk_cache.DiskParseCache = None) -> int:
+    '''Calculates one expression per line and writes one result per line to output, in the same order.
+    An expression that fails gets its error written in place of its result.  Returns the number of failures.
+    With a cache, expressions parsed by an earlier run are loaded from it instead of parsed again.
+    '''
+    pending = deque()
+    expressions = read_expressions(lines, notation, pending)
+    if jobs > 1:
+        results = parallel.calculate_parallel(expressions, None, sep, processes=jobs, numeric=numeric_backend, cache=cache)
+    else:
+        results = fix_format_readers.calculate_many(expressions, None, sep, cache=cache, numeric=numeric_backend)
+
+    writer = None
+    if output_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(["line", "notation", "expression", "result", "error"])
+    failures = 0
+    for result in results:
+        # Results come back in input order, and every result's line has been read before it, so it is at the front.
+        line_number, line_notation, equation = pending.popleft()
+        error = None
+        if isinstance(result, Exception):
+            error = str(result) or type(result).__name__
+            result = None
+            failures += 1
+
+        if output_format == "csv":
+            writer.writerow([line_number, line_notation, equation, "" if result is None else result, error or ""])
+        elif output_format == "jsonl":
+            # Decimals and Fractions are written as strings, so that they keep every digit.
+            if not isinstance(result, (int, float)) and result is not None:
+                result = str(result)
+            output.write(json.dumps({"line" : line_number, "notation" : line_notation, "expression" : equation,
+                                     "result" : result, "error" : error}) + "\n")
+        elif error is None:
+            output.write(f"{equation} = {result}\n")
+        else:
+            output.write(f"{equation} = error: {error}\n")
+    return failures
 
 
 def main():
@@ -15,8 +87,9 @@ def main():
     )
 
     parser.add_argument("equation",
+                        nargs="?",
                         type=str,
-                        help="The expression you want calculated.  Note: Put spaces (or whatever you set the --separator to) between the parentheses for infix notation."
+                        help="The expression you want calculated, e.g. \"4*(5+3)^2\"."
     )
     parser.add_argument("-N", "--notation",
                         choices=calculation_function_lookup.keys(),
@@ -25,21 +98,122 @@ def main():
                         help="The type of notation the expression is written in."
     )
     parser.add_argument("-S", "--separator",
-                        default=" ",
+                        default=None,
                         type=str,
-                        help="The string that separates the parts of the expression.  Default is space."
+                        help="The string that separates the parts of the expression.  By default the expression is scanned, so separators are optional."
+    )
+
+    parser.add_argument("-n", "--numeric",
+                        choices=numeric.BACKENDS.keys(),
+                        default=None,
+                        type=str.lower,
+                        help="The type of number to calculate with.  By default every number is a float."
+    )
+
+    parser.add_argument("-i", "--input",
+                        type=argparse.FileType("r"),
+                        help="A file with one expression per line to calculate instead, or - to read them from stdin.  A line can start with its own notation, e.g. \"prefix: + 2 2\"."
+    )
+    parser.add_argument("-j", "--jobs",
+                        default=1,
+                        type=int,
+                        help="The number of worker processes to calculate the expressions of --input with."
+    )
+    parser.add_argument("-F", "--format",
+                        choices=["plain", "csv", "jsonl"],
+                        default="plain",
+                        type=str.lower,
+                        help="How the results of --input are written out."
+    )
+
+    parser.add_argument("--serve",
+                        action="store_true",
+                        help="Stay running and answer requests read from stdin, one \"notation<TAB>separator<TAB>expression\" line each, with one \"ok<TAB>result\" or \"error<TAB>message\" line each."
+    )
+
+    parser.add_argument("--listen",
+                        metavar="ADDRESS",
+                        help=f"Like --serve, but accept requests over the network instead, on HOST:PORT, or on a Unix socket with unix:PATH.  The default port is {server.DEFAULT_PORT}."
+    )
+
+    parser.add_argument("--cache",
+                        metavar="PATH",
+                        help="A SQLite file to keep parsed expressions in, so that later runs with the same file don't parse them again.  It is created if it doesn't exist, and can be shared by several processes."
+    )
+    parser.add_argument("--cache-results",
+                        action="store_true",
+                        help="Keep the results in the --cache file too, so that later runs don't calculate them again either."
+    )
+    parser.add_argument("--cache-entries",
+                        default=100000,
+                        type=int,
+                        help="The most expressions the --cache file keeps.  The least recently used ones are deleted first."
     )
 
     args = parser.parse_args()
 
+    if args.cache is None and args.cache_results:
+        parser.error("--cache-results needs --cache")
+    if args.cache_entries < 1:
+        parser.error("--cache-entries must be at least 1")
+    cache = None
+    if args.cache is not None:
+        cache = disk_cache.DiskParseCache(args.cache, args.cache_entries, store_results=args.cache_results)
+    try:
+        run_command(parser, args, calculation_function_lookup, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace, calculation_function_lookup: dict,
+                cache: disk_cache.DiskParseCache) -> None:
+    if args.serve or args.listen:
+        if args.equation is not None or args.input is not None:
+            parser.error("--serve and --listen read their expressions from requests")
+        if args.serve and args.listen:
+            parser.error("give either --serve or --listen, not both")
+    if args.serve:
+        protocol.serve(sys.stdin, sys.stdout, args.notation, args.separator, cache, args.numeric)
+        return
+    if args.listen:
+        if args.listen.startswith("unix:"):
+            address = {"path" : args.listen[len("unix:"):]}
+        else:
+            host, _, port = args.listen.rpartition(":")
+            address = {"host" : host or "127.0.0.1", "port" : int(port) if port else server.DEFAULT_PORT}
+        try:
+            asyncio.run(server.serve_forever(notation=args.notation, sep=args.separator, cache=cache, numeric=args.numeric,
+                                             **address))
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.input is not None:
+        if args.equation is not None:
+            parser.error("give either an expression or --input, not both")
+        if args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        with args.input:
+            run_batch(args.input, sys.stdout, args.notation, args.separator, args.jobs, args.format, args.numeric, cache)
+        return
+    if args.equation is None:
+        parser.error("an expression or --input is required")
+
     try:
-        print(f"{args.equation} = {calculation_function_lookup[args.notation](args.equation, args.separator)}")
+        result = calculation_function_lookup[args.notation](args.equation, args.separator, cache=cache, numeric=args.numeric)
+        print(f"{args.equation} = {result}")
     except fix_format_readers.InvalidInfixExpressionError as error:
         print(f"{args.equation} is misformatted as an infix expression.  Is there a typo or did you mean to use a different format?")
     except fix_format_readers.InvalidPostfixExpressionError as error:
         print(f"{args.equation} is misformatted as a postfix expression.  Is there a typo or did you mean to use a different format?")
     except fix_format_readers.InvalidPrefixExpressionError as error:
         print(f"{args.equation} is misformatted as a prefix expression.  Is there a typo or did you mean to use a different format?")
+    except UnboundVariableError as error:
+        print(f"{args.equation} can't be calculated.  {error}  Variables can only be given values from Python.")
+    except (InvalidTokenError, ValueError) as error:
+        # A character that isn't part of any token, or a literal that the numeric backend can't read.
+        article = "an" if args.notation == "infix" else "a"
+        print(f"{args.equation} is misformatted as {article} {args.notation} expression.  Is there a typo or did you mean to use a different format?")
 
 
 if __name__ == '__main__':
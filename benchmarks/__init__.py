@@ -0,0 +1,4 @@
+'''Benchmarks for fix_format_demonstration, run as modules from the repository root, e.g.
+
+    python -m benchmarks.run --sizes 100,1000,10000
+'''
@@ -0,0 +1,54 @@
+'''Compares storing a parsed tree in the flat binary format with pickling the OperationTree and with re-parsing the text.
+
+    python -m benchmarks.binary_format --size 100000 --repeat 5
+
+Every way is timed storing the tree and getting it back, and the size of what is stored is printed.  Pickling
+walks the linked nodes recursively, so on deep trees it fails; the balanced shape keeps it working.  Loading the
+binary format reads the tree in place, so its load time doesn't include a walk over the nodes; the evaluate row
+shows what using the loaded tree costs.
+'''
+import argparse
+import pickle
+import timeit
+
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.flat_operation_tree import FlatOperationTree
+from . import corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the flat binary format against pickle and re-parsing.")
+    parser.add_argument("--size", type=int, default=100000, help="Number of operands.")
+    parser.add_argument("--shape", default="balanced", choices=corpus.SHAPES)
+    parser.add_argument("--operators", default="+-*")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    expression = corpus.generate(args.shape, args.size, args.operators, 0)
+    tree = fix_format_readers.infix_to_operation_tree(expression["infix"])
+    flat = FlatOperationTree.from_operation_tree(tree)
+    data = flat.to_bytes()
+    pickled = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+    loaded = FlatOperationTree.from_buffer(data)
+
+    rows = [
+        ("infix text", len(expression["infix"]), lambda: expression["infix"],
+         lambda: fix_format_readers.infix_to_operation_tree(expression["infix"])),
+        ("pickle", len(pickled), lambda: pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL), lambda: pickle.loads(pickled)),
+        ("flat binary", len(data), lambda: FlatOperationTree.from_operation_tree(tree).to_bytes(),
+         lambda: FlatOperationTree.from_buffer(data)),
+        ("flat binary, stored", len(data), flat.to_bytes, lambda: FlatOperationTree.from_buffer(data)),
+    ]
+    print(f"{'format':>20} {'bytes':>12} {'store ms':>10} {'load ms':>10}")
+    for name, size, store, load in rows:
+        store_time = min(timeit.repeat(store, number=1, repeat=args.repeat))
+        load_time = min(timeit.repeat(load, number=1, repeat=args.repeat))
+        print(f"{name:>20} {size:12d} {store_time * 1e3:10.2f} {load_time * 1e3:10.3f}")
+
+    for name, function in (("tree evaluate", tree.evaluate_tree), ("loaded evaluate", loaded.evaluate),
+                           ("flat evaluate", flat.evaluate)):
+        print(f"{name:>20} {min(timeit.repeat(function, number=1, repeat=args.repeat)) * 1e3:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+'''Generates random expressions of a given size and shape, written out in all three notations.
+
+Each expression is generated once as a tree and then written as in-fix, pre-fix and post-fix, so the three
+are always equivalent.  The shapes cover the cases that stress the readers differently:
+
+    chain         left-deep, "1 + 2 - 3 ...", as deep as it is long, but rarely needing parentheses
+    right_chain   right-deep, "1 - ( 2 - ( 3 ...", as deep as it is long and nested in parentheses
+    balanced      a complete binary tree, log2(size) deep
+    random        random splits, a few times log2(size) deep
+
+Everything is iterative, so expressions of millions of operands can be generated.  The generator doesn't use
+fix_format_demonstration, so the expressions don't depend on the code being measured.
+
+    python -m benchmarks.corpus --shape balanced --size 1000 --output-dir corpus
+'''
+import argparse
+import os
+import random
+
+
+SHAPES = ("chain", "right_chain", "balanced", "random")
+NOTATIONS = ("infix", "prefix", "postfix")
+PRECEDENCE = {'+' : 1, '-' : 1, '*' : 2, '/' : 2, '^' : 3}
+
+
+class ExpressionTree:
+    '''A tree stored as parallel lists, node i having the token values[i] and, for an operator, the
+    children left[i] and right[i]; leaves have -1 for both.
+    '''
+
+    def __init__(self) -> None:
+        self.values = []
+        self.left = []
+        self.right = []
+        self.root = -1
+
+    def add(self, value: str, left: int = -1, right: int = -1) -> int:
+        self.values.append(value)
+        self.left.append(left)
+        self.right.append(right)
+        return len(self.values) - 1
+
+    def depth(self) -> int:
+        deepest = 0
+        stack = [(self.root, 1)]
+        while stack:
+            node, depth = stack.pop()
+            deepest = max(deepest, depth)
+            if self.left[node] != -1:
+                stack.append((self.left[node], depth + 1))
+                stack.append((self.right[node], depth + 1))
+        return deepest
+
+    def postfix_tokens(self) -> list:
+        tokens = []
+        stack = [(self.root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if self.left[node] == -1 or children_done:
+                tokens.append(self.values[node])
+            else:
+                stack.append((node, True))
+                stack.append((self.right[node], False))
+                stack.append((self.left[node], False))
+        return tokens
+
+    def prefix_tokens(self) -> list:
+        tokens = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            tokens.append(self.values[node])
+            if self.left[node] != -1:
+                stack.append(self.right[node])
+                stack.append(self.left[node])
+        return tokens
+
+    def infix_tokens(self, extra_parens: float = 0.0, rng: random.Random = None) -> list:
+        '''Writes the tree in in-fix, with the parentheses the order of operations needs, plus, with
+        probability extra_parens, a redundant pair around any operator.
+        '''
+        tokens = []
+        # Entries are a node to write, or a ')' still to be written after one.
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node == ')':
+                tokens.append(')')
+                continue
+            if type(node) is tuple:
+                # The operator of a node whose left operand has been written.
+                node = node[1]
+                tokens.append(self.values[node])
+                stack.append(self.right[node])
+                self._open_child(node, self.right[node], True, extra_parens, rng, tokens, stack)
+                continue
+            if self.left[node] == -1:
+                tokens.append(self.values[node])
+                continue
+            stack.append(("operator", node))
+            stack.append(self.left[node])
+            self._open_child(node, self.left[node], False, extra_parens, rng, tokens, stack)
+        return tokens
+
+    def _open_child(self, parent: int, child: int, is_right: bool, extra_parens: float, rng, tokens: list, stack: list) -> None:
+        if self.left[child] == -1:
+            return
+        parent_precedence = PRECEDENCE[self.values[parent]]
+        child_precedence = PRECEDENCE[self.values[child]]
+        # Equal precedence needs parentheses on the right, as operators group to the left, and on either side for '^',
+        # whose grouping readers disagree on.
+        needed = child_precedence < parent_precedence or (child_precedence == parent_precedence and
+                                                          (is_right or self.values[parent] == '^'))
+        if needed or (extra_parens and rng.random() < extra_parens):
+            # The child is on top of the stack; its ')' goes underneath it and its '(' is written now.
+            stack.insert(len(stack) - 1, ')')
+            tokens.append('(')
+
+
+def generate_tree(shape: str, size: int, operators: str = "+-*/", seed: int = 0) -> ExpressionTree:
+    '''Generates a tree of the given shape with size operands, from 1 to 9, and size - 1 operators drawn from operators.
+    '''
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape '{shape}'!  Expected one of {', '.join(SHAPES)}.")
+    # The pre-fix and post-fix readers reject an expression without an operator.
+    if size < 2:
+        raise ValueError("size must be at least 2!")
+    rng = random.Random(seed)
+    tree = ExpressionTree()
+
+    def leaf() -> int:
+        return tree.add(str(rng.randint(1, 9)))
+
+    def join(left: int, right: int) -> int:
+        return tree.add(rng.choice(operators), left, right)
+
+    if shape == "chain":
+        root = leaf()
+        for _ in range(size - 1):
+            root = join(root, leaf())
+    elif shape == "right_chain":
+        leaves = [leaf() for _ in range(size)]
+        root = leaves.pop()
+        while leaves:
+            root = join(leaves.pop(), root)
+    elif shape == "balanced":
+        level = [leaf() for _ in range(size)]
+        while len(level) > 1:
+            paired = [join(level[index], level[index + 1]) for index in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                paired.append(level[-1])
+            level = paired
+        root = level[0]
+    else:
+        # Every entry is a subtree still to be generated with that many operands, and the parent slot to fill in.
+        root = None
+        pending = [(size, None, None)]
+        while pending:
+            count, parent, side = pending.pop()
+            if count == 1:
+                node = leaf()
+            else:
+                node = tree.add(rng.choice(operators))
+                split = rng.randint(1, count - 1)
+                pending.append((count - split, node, "right"))
+                pending.append((split, node, "left"))
+            if parent is None:
+                root = node
+            elif side == "left":
+                tree.left[parent] = node
+            else:
+                tree.right[parent] = node
+    tree.root = root
+    return tree
+
+
+def generate(shape: str, size: int, operators: str = "+-*/", seed: int = 0, extra_parens: float = 0.0) -> dict:
+    '''Returns the expression in every notation, space separated, along with its shape, size and depth.
+    '''
+    tree = generate_tree(shape, size, operators, seed)
+    return {
+        "shape" : shape,
+        "size" : size,
+        "depth" : tree.depth(),
+        "infix" : " ".join(tree.infix_tokens(extra_parens, random.Random(seed))),
+        "prefix" : " ".join(tree.prefix_tokens()),
+        "postfix" : " ".join(tree.postfix_tokens())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes equivalent in-fix, pre-fix and post-fix expressions to files.")
+    parser.add_argument("--shape", choices=SHAPES, default="random")
+    parser.add_argument("--size", type=int, default=1000, help="Number of operands.")
+    parser.add_argument("--operators", default="+-*/", help="The operators to draw from.")
+    parser.add_argument("--extra-parens", type=float, default=0.0, help="Chance of a redundant pair of parentheses around an operator.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args()
+
+    expression = generate(args.shape, args.size, args.operators, args.seed, args.extra_parens)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for notation in NOTATIONS:
+        path = os.path.join(args.output_dir, f"{args.shape}_{args.size}.{notation}")
+        with open(path, "w") as file:
+            file.write(expression[notation] + "\n")
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+'''Measures the time and the peak extra memory of every construction, validation, evaluation and traversal path on
+trees of each shape, to check that none of them recurse and that their memory grows with the depth of the tree.
+
+    python -m benchmarks.depth_profile --size 1000000
+
+The memory is the peak that tracemalloc sees while the phase runs, on top of what was allocated before it, so it
+includes the phase's result: for the readers that is the whole tree, and for flatten and compile the arrays they
+build.  The traversals write to a sink that discards the text, so only their own stacks are counted.  Timings are
+taken in a separate run without tracemalloc, which slows everything down.
+'''
+import argparse
+import gc
+import time
+import tracemalloc
+
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.compiled_expression import CompiledExpression
+from fix_format_demonstration.flat_operation_tree import FlatOperationTree
+from . import corpus
+
+
+class _Discard:
+
+    def write(self, text: str) -> None:
+        pass
+
+
+# Phases that read the expression text.
+TEXT_PHASES = {
+    f"{kind}_{notation}" : (lambda function: lambda equation: function(equation, " "))(functions[notation])
+    for kind, functions in (("build", fix_format_readers.TREE_BUILDERS), ("calculate", fix_format_readers.CALCULATORS))
+    for notation in corpus.NOTATIONS
+}
+
+# Phases on a built tree.
+TREE_PHASES = {
+    "is_tree_valid" : lambda tree: tree.is_tree_valid(),
+    "node_count" : lambda tree: tree.node_count(),
+    "evaluate_tree" : lambda tree: tree.evaluate_tree(),
+    "evaluate" : lambda tree: tree.evaluate(),
+    "evaluate_incremental" : lambda tree: tree.evaluate_incremental(),
+    "invalidate" : lambda tree: tree.invalidate(),
+    "simplify" : lambda tree: tree.simplify(),
+    "to_infix" : lambda tree: tree.to_infix(file=_Discard()),
+    "to_prefix" : lambda tree: tree.to_prefix(file=_Discard()),
+    "to_postfix" : lambda tree: tree.to_postfix(file=_Discard()),
+    "flatten" : lambda tree: FlatOperationTree.from_operation_tree(tree),
+    "compile" : lambda tree: CompiledExpression.from_operation_tree(tree),
+}
+
+# Phases on the flat and compiled forms of the tree.
+COMPILED_PHASES = {
+    "flat_evaluate" : lambda flat, compiled: flat.evaluate(),
+    "flat_to_operation_tree" : lambda flat, compiled: flat.to_operation_tree(),
+    "compiled_evaluate" : lambda flat, compiled: compiled.evaluate(),
+}
+
+
+def profile_phase(function) -> dict:
+    '''Returns the seconds function takes, and the peak bytes it allocates.
+    '''
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds" : seconds, "peak_bytes" : peak}
+
+
+def run(shapes, size: int, operators: str, seed: int, phases=None):
+    '''Yields one row per phase and shape.
+    '''
+    for shape in shapes:
+        expression = corpus.generate(shape, size, operators, seed)
+        base_row = {"shape" : shape, "size" : size, "depth" : expression["depth"]}
+
+        for phase, function in TEXT_PHASES.items():
+            if phases is None or phase in phases:
+                equation = expression[phase.split("_")[1]]
+                yield dict(base_row, phase=phase, **profile_phase(lambda: function(equation)))
+
+        tree = fix_format_readers.postfix_to_operation_tree(expression["postfix"])
+        for phase, function in TREE_PHASES.items():
+            if phases is None or phase in phases:
+                yield dict(base_row, phase=phase, **profile_phase(lambda: function(tree)))
+
+        flat = FlatOperationTree.from_operation_tree(tree)
+        compiled = CompiledExpression.from_operation_tree(tree)
+        for phase, function in COMPILED_PHASES.items():
+            if phases is None or phase in phases:
+                yield dict(base_row, phase=phase, **profile_phase(lambda: function(flat, compiled)))
+
+
+def main():
+    all_phases = list(TEXT_PHASES) + list(TREE_PHASES) + list(COMPILED_PHASES)
+    parser = argparse.ArgumentParser(description="Profiles the time and peak memory of every path over trees of each shape.")
+    parser.add_argument("--shapes", default="chain,right_chain,balanced", help="Comma separated shapes to generate.")
+    parser.add_argument("--size", type=int, default=100000, help="Number of operands.")
+    parser.add_argument("--operators", default="+-*", help="The operators to draw from.")
+    parser.add_argument("--phases", default=",".join(all_phases), help="Comma separated phases to profile.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    phases = set(args.phases.split(","))
+    for phase in phases - set(all_phases):
+        parser.error(f"unknown phase '{phase}'")
+
+    print(f"{'shape':>12} {'depth':>8} {'phase':>24} {'seconds':>9} {'peak KiB':>10}")
+    for row in run(args.shapes.split(","), args.size, args.operators, args.seed, phases):
+        print(f"{row['shape']:>12} {row['depth']:>8} {row['phase']:>24} {row['seconds']:9.3f} {row['peak_bytes'] / 1024:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+'''Times a batch run that parses every expression against one whose trees, or results, are already in a DiskParseCache.
+
+    python -m benchmarks.disk_cache --count 2000 --size 100 --repeat 5
+
+Every warm run opens the cache file again, as a new run of the command-line demo would, so the in-memory
+layer starts out empty and every tree is loaded from the file.
+'''
+import argparse
+import os
+import tempfile
+import timeit
+
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.disk_cache import DiskParseCache
+from . import corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times a cold batch run against warm DiskParseCache runs.")
+    parser.add_argument("--count", type=int, default=2000, help="Number of expressions.")
+    parser.add_argument("--size", type=int, default=100, help="Number of operands per expression.")
+    parser.add_argument("--operators", default="+-*")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    equations = [corpus.generate("random", args.size, args.operators, seed)["infix"] for seed in range(args.count)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+
+        def run(cache_options):
+            if cache_options is None:
+                return list(fix_format_readers.calculate_many(equations))
+            with DiskParseCache(path, **cache_options) as cache:
+                return list(fix_format_readers.calculate_many(equations, cache=cache))
+
+        rows = [("no cache", None), ("trees", {}), ("trees and results", {"store_results" : True})]
+        print(f"{'run':>20} {'cold ms':>10} {'warm ms':>10}")
+        for name, cache_options in rows:
+            if os.path.exists(path):
+                os.remove(path)
+            cold = min(timeit.repeat(lambda: run(cache_options), number=1, repeat=1))
+            warm = min(timeit.repeat(lambda: run(cache_options), number=1, repeat=args.repeat))
+            print(f"{name:>20} {cold * 1e3:10.1f} {warm * 1e3:10.1f}")
+        print(f"{'file':>20} {os.path.getsize(path):10d} bytes")
+
+
+if __name__ == '__main__':
+    main()
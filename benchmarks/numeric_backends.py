@@ -0,0 +1,46 @@
+'''Compares the numeric backends with the default float-only path, on integer-only expressions.
+
+    python -m benchmarks.numeric_backends --size 1000 --repeat 20
+
+Every backend is timed calculating the post-fix and in-fix text, evaluating a built tree, and evaluating a
+CompiledExpression, whose literals were read by the backend once when it was compiled.  The expressions only
+use + and -, so that the int results stay as small as the float ones and only the number type differs.
+'''
+import argparse
+import timeit
+
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration import numeric
+from . import corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times each numeric backend against the default float path.")
+    parser.add_argument("--size", type=int, default=1000, help="Number of operands.")
+    parser.add_argument("--operators", default="+-", help="The operators to draw from.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    expression = corpus.generate("random", args.size, args.operators, 0)
+    tree = fix_format_readers.postfix_to_operation_tree(expression["postfix"])
+    phases = {
+        "calculate_postfix" : lambda backend: fix_format_readers.calculate_postfix(expression["postfix"], numeric=backend),
+        "calculate_infix" : lambda backend: fix_format_readers.calculate_infix(expression["infix"], numeric=backend),
+        "evaluate_tree" : lambda backend: tree.evaluate_tree(backend),
+    }
+
+    backends = {"default" : None}
+    backends.update(numeric.BACKENDS)
+    print(f"{'phase':>18} " + " ".join(f"{name + ' us':>12}" for name in backends))
+    for phase, function in phases.items():
+        times = [min(timeit.repeat(lambda: function(backend), number=1, repeat=args.repeat)) for backend in backends.values()]
+        print(f"{phase:>18} " + " ".join(f"{seconds * 1e6:12.1f}" for seconds in times))
+
+    compiled = {name : fix_format_readers.compile(expression["postfix"], "postfix", numeric=backend)
+                for name, backend in backends.items()}
+    times = [min(timeit.repeat(expression.evaluate, number=1, repeat=args.repeat)) for expression in compiled.values()]
+    print(f"{'compiled_evaluate':>18} " + " ".join(f"{seconds * 1e6:12.1f}" for seconds in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+'''Measures how calculate_parallel scales with the number of worker processes.
+
+    python -m benchmarks.parallel_scaling --count 200000 --max-processes 8
+'''
+import argparse
+import os
+import random
+import time
+
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.parallel import calculate_parallel
+
+
+def make_equations(count: int, terms: int, seed: int) -> list:
+    rng = random.Random(seed)
+    equations = []
+    for _ in range(count):
+        parts = [str(rng.randint(1, 99))]
+        for _ in range(terms - 1):
+            parts.append(rng.choice("+-*/"))
+            parts.append(str(rng.randint(1, 99)))
+        equations.append(" ".join(parts))
+    return equations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling of calculate_parallel with the number of processes.")
+    parser.add_argument("--count", type=int, default=200000, help="Number of expressions.")
+    parser.add_argument("--terms", type=int, default=20, help="Number of operands in each expression.")
+    parser.add_argument("--chunksize", type=int, default=1000)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    equations = make_equations(args.count, args.terms, args.seed)
+
+    start = time.perf_counter()
+    for _ in fix_format_readers.calculate_many(equations):
+        pass
+    serial = time.perf_counter() - start
+    print(f"{'processes':>9} {'seconds':>9} {'speedup':>8}")
+    print(f"{'serial':>9} {serial:9.2f} {1.0:8.2f}")
+
+    processes = 1
+    while processes <= args.max_processes:
+        start = time.perf_counter()
+        for _ in calculate_parallel(equations, processes=processes, chunksize=args.chunksize):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"{processes:>9} {elapsed:9.2f} {serial / elapsed:8.2f}")
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main()
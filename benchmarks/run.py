@@ -0,0 +1,141 @@
+'''Times every way of reading and evaluating an expression over a corpus of sizes and shapes, and writes the results as JSON.
+
+    python -m benchmarks.run --sizes 100,1000,10000 --output results.json
+
+Every row of the results is one phase on one expression: its shape, size, depth, notation, the phase, and either the
+best and median time in seconds over the repeats or, if the phase failed (a division by zero,
+for instance), the error.  The metadata records the commit, so result files from different commits can be compared.
+'''
+import argparse
+import datetime
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.compiled_expression import CompiledExpression
+from fix_format_demonstration.flat_operation_tree import FlatOperationTree
+from . import corpus
+
+
+# Phases that read the expression text, run for every notation.
+NOTATION_PHASES = {
+    "calculate" : lambda notation, equation: fix_format_readers.CALCULATORS[notation](equation, " "),
+    "calculate_scan" : lambda notation, equation: fix_format_readers.CALCULATORS[notation](equation, None),
+    "build" : lambda notation, equation: fix_format_readers.TREE_BUILDERS[notation](equation, " "),
+    "flat_parse" : lambda notation, equation: FlatOperationTree.parse(equation, notation),
+}
+
+# Phases on a tree that has already been built, run once per expression.
+TREE_PHASES = {
+    "validate" : lambda tree: tree.is_tree_valid(),
+    "evaluate_tree" : lambda tree: tree.evaluate_tree(),
+    "evaluate" : lambda tree: tree.evaluate(),
+    "compile" : lambda tree: CompiledExpression.from_operation_tree(tree),
+    "flatten" : lambda tree: FlatOperationTree.from_operation_tree(tree),
+    "to_function" : lambda tree: tree.to_function(),
+    "to_infix" : lambda tree: tree.to_infix(),
+    "to_postfix" : lambda tree: tree.to_postfix(),
+}
+
+# Phases on the compiled forms, which are built once untimed.
+COMPILED_PHASES = {
+    "compiled_evaluate" : lambda compiled, flat, function: compiled.evaluate(),
+    "flat_evaluate" : lambda compiled, flat, function: flat.evaluate(),
+    "function_evaluate" : lambda compiled, flat, function: function(),
+}
+
+
+def time_phase(function, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        try:
+            function()
+        except (RecursionError, ArithmeticError, ValueError) as error:
+            return {"error" : f"{type(error).__name__}: {error}"}
+        times.append(time.perf_counter() - start)
+    return {"best" : min(times), "median" : statistics.median(times)}
+
+
+def run(shapes, sizes, operators: str, extra_parens: float, repeat: int, seed: int, phases=None):
+    '''Yields one result row per phase, expression and, for the phases that read text, notation.
+    '''
+    for shape in shapes:
+        for size in sizes:
+            expression = corpus.generate(shape, size, operators, seed, extra_parens)
+            base_row = {"shape" : shape, "size" : size, "depth" : expression["depth"]}
+
+            for phase, function in NOTATION_PHASES.items():
+                if phases is None or phase in phases:
+                    for notation in corpus.NOTATIONS:
+                        equation = expression[notation]
+                        yield dict(base_row, notation=notation, phase=phase,
+                                   **time_phase(lambda: function(notation, equation), repeat))
+
+            tree = fix_format_readers.postfix_to_operation_tree(expression["postfix"])
+            for phase, function in TREE_PHASES.items():
+                if phases is None or phase in phases:
+                    yield dict(base_row, notation=None, phase=phase, **time_phase(lambda: function(tree), repeat))
+
+            compiled = CompiledExpression.from_operation_tree(tree)
+            flat = FlatOperationTree.from_operation_tree(tree)
+            tree_function = tree.to_function()
+            for phase, function in COMPILED_PHASES.items():
+                if phases is None or phase in phases:
+                    yield dict(base_row, notation=None, phase=phase,
+                               **time_phase(lambda: function(compiled, flat, tree_function), repeat))
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit" : commit,
+        "timestamp" : datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python" : sys.version,
+        "platform" : platform.platform(),
+        "arguments" : vars(args)
+    }
+
+
+def main():
+    all_phases = list(NOTATION_PHASES) + list(TREE_PHASES) + list(COMPILED_PHASES)
+    parser = argparse.ArgumentParser(description="Times parsing, building, validating and evaluating over a generated corpus.")
+    parser.add_argument("--shapes", default=",".join(corpus.SHAPES), help="Comma separated shapes to generate.")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma separated numbers of operands.")
+    parser.add_argument("--operators", default="+-*", help="The operators to draw from.  '/' and '^' can make an expression fail.")
+    parser.add_argument("--extra-parens", type=float, default=0.0, help="Chance of a redundant pair of parentheses around an operator.")
+    parser.add_argument("--phases", default=",".join(all_phases), help="Comma separated phases to time.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    shapes = args.shapes.split(",")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    phases = set(args.phases.split(","))
+    for phase in phases - set(all_phases):
+        parser.error(f"unknown phase '{phase}'")
+
+    results = []
+    print(f"{'shape':>12} {'size':>8} {'depth':>8} {'notation':>8} {'phase':>24} {'best ms':>10}")
+    for row in run(shapes, sizes, args.operators, args.extra_parens, args.repeat, args.seed, phases):
+        results.append(row)
+        timing = f"{row['best'] * 1e3:10.3f}" if "best" in row else row["error"].split(":")[0]
+        print(f"{row['shape']:>12} {row['size']:>8} {row['depth']:>8} {row['notation'] or '':>8} {row['phase']:>24} {timing:>10}")
+
+    with open(args.output, "w") as file:
+        json.dump({"metadata" : metadata(args), "results" : results}, file, indent=1)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+'''Compares the latency of one request to MathematicalNotationDemo.py --serve with launching the script once per expression.
+
+    python -m benchmarks.serve_latency --launches 20 --requests 5000
+'''
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from fix_format_demonstration import protocol
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MathematicalNotationDemo.py")
+EQUATIONS = ["4*(5+3)^2", "1 + 2 * 3 - 4 / 5", "( 1 + 2 ) * ( 3 + 4 ) ^ 2", "7 / 3 - 2 ^ 0.5"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request latency of --serve against one-shot invocation.")
+    parser.add_argument("--launches", type=int, default=20, help="Number of one-shot invocations to time.")
+    parser.add_argument("--requests", type=int, default=5000, help="Number of requests to send to the server.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for i in range(args.launches):
+        subprocess.run([sys.executable, SCRIPT, EQUATIONS[i % len(EQUATIONS)]], check=True, stdout=subprocess.DEVNULL)
+    one_shot = (time.perf_counter() - start) / args.launches
+
+    server = subprocess.Popen([sys.executable, SCRIPT, "--serve"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              text=True, bufsize=1)
+    try:
+        # Wait for the first answer so that interpreter startup isn't counted against the requests.
+        server.stdin.write(protocol.format_request(EQUATIONS[0]))
+        protocol.parse_response(server.stdout.readline())
+        latencies = []
+        for i in range(args.requests):
+            start = time.perf_counter()
+            server.stdin.write(protocol.format_request(EQUATIONS[i % len(EQUATIONS)]))
+            protocol.parse_response(server.stdout.readline())
+            latencies.append(time.perf_counter() - start)
+    finally:
+        server.stdin.close()
+        server.wait()
+
+    latencies.sort()
+    print(f"{'mode':>10} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    print(f"{'one-shot':>10} {one_shot * 1e6:10.0f} {'':>10} {'':>10}")
+    print(f"{'serve':>10} {sum(latencies) / len(latencies) * 1e6:10.1f} {latencies[len(latencies) // 2] * 1e6:10.1f} "
+          f"{latencies[int(len(latencies) * 0.99)] * 1e6:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
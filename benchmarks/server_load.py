@@ -0,0 +1,58 @@
+'''Load-tests the evaluation server on localhost with a number of pipelining clients.
+
+    python -m benchmarks.server_load --clients 8 --requests 20000 --max-pending 64
+'''
+import argparse
+import asyncio
+import time
+
+from fix_format_demonstration.client import EvaluationClient
+from fix_format_demonstration.server import EvaluationServer
+from .parallel_scaling import make_equations
+
+
+async def run(args) -> None:
+    equations = make_equations(args.requests, args.terms, args.seed)
+    evaluation_server = EvaluationServer(max_pending=args.max_pending)
+    server = await evaluation_server.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        clients = [await EvaluationClient.connect("127.0.0.1", port, args.max_pending) for _ in range(args.clients)]
+        latencies = []
+
+        # Every connection keeps max_pending requests in flight, so a latency is one pipelined round trip, not time spent queueing.
+        async def sender(client, share):
+            for equation in share:
+                start = time.perf_counter()
+                await client.calculate(equation)
+                latencies.append(time.perf_counter() - start)
+
+        senders = []
+        for index, client in enumerate(clients):
+            share = equations[index::args.clients]
+            senders.extend(sender(client, share[offset::args.max_pending]) for offset in range(args.max_pending))
+
+        start = time.perf_counter()
+        await asyncio.gather(*senders)
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            await client.close()
+        await evaluation_server.wait_closed()
+
+    latencies.sort()
+    print(f"{len(equations)} requests over {args.clients} connections in {elapsed:.2f} s: {len(equations) / elapsed:.0f} requests/s")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of the evaluation server under pipelined load.")
+    parser.add_argument("--clients", type=int, default=8, help="Number of connections.")
+    parser.add_argument("--requests", type=int, default=20000, help="Total number of requests.")
+    parser.add_argument("--terms", type=int, default=20, help="Number of operands in each expression.")
+    parser.add_argument("--max-pending", type=int, default=64, help="Requests in flight per connection.")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
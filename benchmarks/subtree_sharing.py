@@ -0,0 +1,67 @@
+'''Reports the memory saved by building trees with intern_subtrees on a corpus of formulas
+that reuse the same fragments, the way generated pricing or scoring formulas tend to.
+
+    python -m benchmarks.subtree_sharing --count 2000 --terms 40
+'''
+import argparse
+import random
+import time
+import tracemalloc
+
+from fix_format_demonstration import fix_format_readers
+
+
+FRAGMENTS = [
+    "( x + y )",
+    "( rate * 12 )",
+    "( 1 + rate ) ^ 2",
+    "( x - 1 ) / ( y + 1 )",
+    "( price * quantity - discount )",
+]
+
+
+def make_corpus(count: int, terms: int, seed: int) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        parts = [rng.choice(FRAGMENTS)]
+        for _ in range(terms - 1):
+            parts.append(rng.choice("+-*"))
+            parts.append(rng.choice(FRAGMENTS) if rng.random() < 0.7 else str(rng.randint(1, 9)))
+        corpus.append(" ".join(parts))
+    return corpus
+
+
+def measure(corpus: list, intern_subtrees: bool):
+    tracemalloc.start()
+    trees = [fix_format_readers.infix_to_operation_tree(equation, intern_subtrees=intern_subtrees) for equation in corpus]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    bindings = {"x" : 2.0, "y" : 3.0, "rate" : 0.05, "price" : 9.5, "quantity" : 4.0, "discount" : 1.5}
+    start = time.perf_counter()
+    results = [tree.evaluate(bindings) for tree in trees]
+    elapsed = time.perf_counter() - start
+    return sum(tree.node_count() for tree in trees), memory, elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory used by shared and unshared operation trees.")
+    parser.add_argument("--count", type=int, default=2000, help="Number of formulas.")
+    parser.add_argument("--terms", type=int, default=40, help="Number of fragments or constants per formula.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.count, args.terms, args.seed)
+    plain_nodes, plain_memory, plain_time, plain_results = measure(corpus, False)
+    shared_nodes, shared_memory, shared_time, shared_results = measure(corpus, True)
+    assert plain_results == shared_results
+
+    print(f"{'':>8} {'nodes':>10} {'MB':>8} {'evaluate s':>11}")
+    print(f"{'plain':>8} {plain_nodes:>10} {plain_memory / 1e6:8.2f} {plain_time:11.3f}")
+    print(f"{'shared':>8} {shared_nodes:>10} {shared_memory / 1e6:8.2f} {shared_time:11.3f}")
+    print(f"memory saved: {100 * (1 - shared_memory / plain_memory):.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+'''An asyncio client for the evaluation server.
+
+Requests are pipelined: calculate can be called from many tasks at once, every request is written
+as soon as it is made, and the responses, which come back in the same order, are matched up with the
+requests as they arrive.  At most max_pending requests are waiting for an answer at any time.
+'''
+import asyncio
+from collections import deque
+
+from . import protocol
+from .server import DEFAULT_PORT
+
+
+class EvaluationClient:
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_pending: int = 64) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._waiting = deque()
+        self._window = asyncio.Semaphore(max_pending)
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_pending: int = 64) -> "EvaluationClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, max_pending)
+
+    @classmethod
+    async def connect_unix(cls, path: str, max_pending: int = 64) -> "EvaluationClient":
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer, max_pending)
+
+    async def calculate(self, equation: str, notation: str = "infix", sep: str = None) -> float:
+        '''Calculates one expression on the server, raising a protocol.ProtocolError with the server's message if it fails.
+        '''
+        request = protocol.format_request(equation, notation, sep).encode()
+        async with self._window:
+            if self._receiver.done():
+                raise ConnectionError("The connection to the server is closed!")
+            future = asyncio.get_running_loop().create_future()
+            # Queue the future and write the request with no await in between, so the order of both always matches.
+            self._waiting.append(future)
+            self._writer.write(request)
+            await self._writer.drain()
+            return protocol.parse_response(await future)
+
+    async def calculate_many(self, equations, notation: str = "infix", sep: str = None) -> list:
+        '''Calculates every expression with its requests pipelined, returning the results in order
+        with the error in place of the result for any that failed.
+        '''
+        return await asyncio.gather(*(self.calculate(equation, notation, sep) for equation in equations),
+                                    return_exceptions=True)
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                future = self._waiting.popleft()
+                if not future.cancelled():
+                    future.set_result(line.decode())
+        finally:
+            while self._waiting:
+                future = self._waiting.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError("The connection to the server was closed!"))
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._receiver.cancel()
+        try:
+            await self._receiver
+        except asyncio.CancelledError:
+            pass
+
+    async def __aenter__(self) -> "EvaluationClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,129 @@
+from .operation_tree import OperationTree, OperationTreeEvaluationError
+from .utils import OperationEvaluator, UnboundVariableError
+from . import numeric as numeric_backends
+from . import vectorized
+
+
+# Marks a program step that loads a variable; the second item of the step is the variable's name.
+LOAD_VARIABLE = object()
+# Marks a program step that applies a unary operator; the second item of the step is (operator function, symbol).
+APPLY_UNARY = object()
+
+
+class CompiledExpression:
+    '''An expression that has been parsed and validated once, so that it can be evaluated many times.
+
+    The expression is stored as a post-fix program of (operator function, argument) pairs.
+    Operators are already resolved to their functions and literals are already floats,
+    so evaluate() only runs the operand stack.  The argument of a binary operator step is its symbol,
+    of a constant step (operator function None) the float, and of a LOAD_VARIABLE step the name.
+    Compiled with a numeric backend, the constants and operator functions are that backend's instead.
+    '''
+    __slots__ = ("_program", "_equation", "_notation", "_numeric")
+
+    def __init__(self, program: tuple, equation: str = None, notation: str = None,
+                 numeric: numeric_backends.NumericBackend = None) -> None:
+        self._program = tuple(program)
+        self._equation = equation
+        self._notation = notation
+        self._numeric = numeric
+
+    @classmethod
+    def from_operation_tree(cls, tree: OperationTree, equation: str = None, notation: str = None,
+                            numeric=None) -> "CompiledExpression":
+        if not tree._validate():
+            raise OperationTreeEvaluationError("Tried to compile an invalid operation tree!")
+
+        functions = OperationEvaluator.OPCODE_FUNCTIONS
+        symbols = OperationEvaluator.OPCODE_SYMBOLS
+        arities = OperationEvaluator.OPCODE_ARITIES
+        literal = float
+        if numeric is not None:
+            numeric = numeric_backends.get_backend(numeric)
+            functions = numeric.functions
+            literal = numeric.literal
+        program = []
+        # The same walk as OperationTree.evaluate_tree's: an opcode on the stack is emitted once all of its
+        # children have been, so the stack only grows with the depth of the tree.
+        walk_stack = [tree._root]
+        while walk_stack:
+            cur_node = walk_stack.pop()
+            if type(cur_node) is int:
+                if arities[cur_node] == 1:
+                    program.append((APPLY_UNARY, (functions[cur_node], symbols[cur_node])))
+                else:
+                    program.append((functions[cur_node], symbols[cur_node]))
+            elif cur_node._opcode is not None:
+                walk_stack.append(cur_node._opcode)
+                if cur_node._right_child is not None:
+                    walk_stack.append(cur_node._right_child)
+                walk_stack.append(cur_node._left_child)
+            elif OperationEvaluator.is_variable(cur_node._value):
+                program.append((LOAD_VARIABLE, cur_node._value))
+            else:
+                program.append((None, literal(cur_node._value)))
+
+        return cls(program, equation, notation, numeric)
+
+    @property
+    def equation(self) -> str:
+        return self._equation
+
+    @property
+    def notation(self) -> str:
+        return self._notation
+
+    def __len__(self) -> int:
+        return len(self._program)
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self._equation!r}, notation={self._notation!r})"
+
+    @property
+    def variables(self) -> frozenset:
+        return frozenset(argument for operator_func, argument in self._program if operator_func is LOAD_VARIABLE)
+
+    def evaluate(self, bindings: dict = None):
+        '''Runs the program.  bindings maps variable names to values; if any of them is a NumPy array,
+        the program is evaluated once over the whole array with ufuncs.
+        '''
+        if vectorized.uses_arrays(bindings):
+            if self._numeric is not None:
+                numeric_backends.check_arrays_supported(self._numeric)
+            return self._evaluate_vectorized(vectorized.as_columns(bindings))
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for operator_func, argument in self._program:
+            if operator_func is None:
+                push(argument)
+            elif operator_func is LOAD_VARIABLE:
+                if bindings is None or argument not in bindings:
+                    raise UnboundVariableError(f"Variable '{argument}' has no value!")
+                push(bindings[argument])
+            elif operator_func is APPLY_UNARY:
+                push(argument[0](pop()))
+            else:
+                second_operand = pop()
+                push(operator_func(pop(), second_operand))
+        return stack[0]
+
+    def _evaluate_vectorized(self, columns: dict):
+        ufuncs = vectorized.UFUNC_LOOKUP_TABLE
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for operator_func, argument in self._program:
+            if operator_func is None:
+                push(argument)
+            elif operator_func is LOAD_VARIABLE:
+                if argument not in columns:
+                    raise UnboundVariableError(f"Variable '{argument}' has no value!")
+                push(columns[argument])
+            elif operator_func is APPLY_UNARY:
+                push(ufuncs[argument[1]](pop()))
+            else:
+                second_operand = pop()
+                push(ufuncs[argument](pop(), second_operand))
+        return stack[0]
@@ -0,0 +1,365 @@
+'''A parse cache kept in a SQLite file, so that the expressions one run has parsed are not parsed again by the next.
+
+A ParseCache only lives as long as its process, so every run of the command-line demo, and every worker of
+parallel.calculate_parallel, starts out parsing everything again.  DiskParseCache stores every expression it
+parses as post-fix text, space separated, keyed by a SHA-256 hash of the notation, separator and expression, and
+with store_results also the result of calculating it.  A later run builds a stored expression's tree from its
+post-fix text, which is quicker than parsing the in-fix text and keeps every literal exactly as it was written,
+or skips the calculation as well.  An in-memory ParseCache of trees, and a dictionary of the kept results, in
+front of the file keep repeated expressions within a run from touching the file at all.
+
+The file is opened in SQLite's write-ahead log mode, so any number of processes can read it while one of
+them writes, and a writer waits up to timeout seconds for another to finish.  To keep the cost of a miss
+low, new trees, new results and the use times of hits are written in batches: they only become visible to
+other processes once flush, prune or close is called, or a batch fills up.  The file is pruned back to
+max_entries trees, and max_bytes bytes of stored trees, by deleting the least recently used trees and their
+results; it can go over its limits between prunes, which happen every _PRUNE_INTERVAL new trees and on close.
+
+Results are only kept for the float, int and fraction backends: Decimal results depend on the decimal
+context of the thread that calculates them.  A kept result is the result of the operators registered when it
+was calculated, so after registering an operator again with a different function, clear the cache.
+'''
+from collections import OrderedDict
+from fractions import Fraction
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .operation_tree import OperationTree
+from .parse_cache import ParseCache
+from . import fix_format_readers
+from . import numeric as numeric_backends
+
+
+# The number of pending rows that are written to the file in one transaction.
+_FLUSH_ROWS = 4096
+# The number of new trees written between prunes.
+_PRUNE_INTERVAL = 1024
+# The default min_length of an expression stored in the file, without and with store_results.  A lookup costs
+# about as much as calculating a 300 character expression, or reading a kept result instead of calculating a
+# 60 character one.
+_MIN_LENGTH = 256
+_MIN_LENGTH_WITH_RESULTS = 64
+
+# The tables are stored by key, which makes a lookup one B-tree search.  used has no index, so that marking a
+# hit as used only rewrites its row: the prunes, which are rare, sort the table instead.
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS trees (key BLOB PRIMARY KEY, postfix TEXT NOT NULL, size INTEGER NOT NULL, "
+    "used REAL NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS results (key BLOB NOT NULL, numeric TEXT NOT NULL, type TEXT NOT NULL, "
+    "value TEXT NOT NULL, PRIMARY KEY (key, numeric)) WITHOUT ROWID",
+)
+
+# Ints are kept in hex, which, unlike decimal, converts in linear time and isn't limited in length.
+_RESULT_DECODERS = {
+    "float" : float,
+    "int" : lambda value: int(value, 16),
+    "fraction" : lambda value: Fraction(*(int(part, 16) for part in value.split("/")))
+}
+
+
+def _key(notation: str, equation: str, sep: str) -> bytes:
+    # No separator and an empty one both mean the expression is scanned.
+    return hashlib.sha256(f"{notation}\0{sep or ''}\0{equation}".encode("utf-8", "surrogatepass")).digest()
+
+
+def _encode_result(result) -> tuple:
+    if type(result) is float:
+        return "float", repr(result)
+    if type(result) is int:
+        return "int", hex(result)
+    if type(result) is Fraction:
+        return "fraction", f"{hex(result.numerator)}/{hex(result.denominator)}"
+    return None
+
+
+def _result_backend_name(numeric) -> str:
+    '''The name results calculated with numeric are kept under, or None if they aren't kept.
+    '''
+    if numeric is None:
+        return "float"
+    backend = numeric_backends.get_backend(numeric)
+    # A backend sent to another process is pickled into a new object, so it is recognized by what it does.
+    known = numeric_backends.BACKENDS.get(backend.name)
+    if backend.name == "decimal" or known is None or backend.literal is not known.literal or backend.overrides != known.overrides:
+        return None
+    return backend.name
+
+
+class DiskParseCache:
+    '''A least-recently-used cache of parsed OperationTrees in the SQLite file at path, which is created if it
+    doesn't exist.  It can be passed anywhere a ParseCache can, and to parallel.calculate_parallel, whose workers
+    open the same file.  memory_entries is the size of the ParseCache in front of the file, and the number of kept
+    results held in memory.  The trees of expressions shorter than min_length characters are only cached in
+    memory, since parsing them again costs less than looking them up in the file.  Trees built with shared
+    subtrees are only cached in memory too, since their post-fix text repeats a shared subtree once per use.
+
+    Call close, or use the cache in a with statement, so that the last batch is written.
+    '''
+
+    def __init__(self, path, max_entries: int = 100000, max_bytes: int = None, store_results: bool = False,
+                 min_length: int = None, memory_entries: int = 1024, timeout: float = 30.0) -> None:
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1!")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1!")
+        self._path = os.fspath(path)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        if min_length is None:
+            min_length = _MIN_LENGTH_WITH_RESULTS if store_results else _MIN_LENGTH
+        self._min_length = min_length
+        self._memory_entries = memory_entries
+        self._timeout = timeout
+        self.store_results = store_results
+        self._memory = ParseCache(memory_entries)
+        # The kept results read from or written to the file, by (key, backend name), least recently used first.
+        self._memory_results = OrderedDict()
+        # One connection is shared by every thread of the process, so it is only used while holding the lock.
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self._path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode this only syncs at checkpoints: a crash can lose the last writes, but never corrupts the file.
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+        self._pending_trees = {}
+        self._pending_results = {}
+        self._touched = set()
+        self._stored_since_prune = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._result_hits = 0
+        self._result_misses = 0
+        self._pruned = 0
+
+    def __reduce__(self):
+        # A copy opens its own connection to the same file, and doesn't take the pending writes along.
+        return (DiskParseCache, (self._path, self._max_entries, self._max_bytes, self.store_results,
+                                 self._min_length, self._memory_entries, self._timeout))
+
+    def __enter__(self) -> "DiskParseCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def get_or_build(self, notation: str, equation: str, sep: str, build) -> OperationTree:
+        '''Returns the cached tree for the expression, loading it from the file, or calling build(equation, sep)
+        to parse it if it isn't there either.
+        '''
+        if len(equation) < self._min_length or notation.endswith("/shared"):
+            return self._memory.get_or_build(notation, equation, sep, build)
+        return self._memory.get_or_build(notation, equation, sep,
+                                         lambda equation, sep: self._load_or_build(notation, equation, sep, build))
+
+    def _load_or_build(self, notation: str, equation: str, sep: str, build) -> OperationTree:
+        key = _key(notation, equation, sep)
+        postfix = self._load_postfix(key)
+        if postfix is not None:
+            try:
+                tree = fix_format_readers.postfix_to_operation_tree(postfix)
+            except fix_format_readers.CALCULATION_ERRORS:
+                # Stored with an operator this process hasn't registered: parse the expression instead.
+                pass
+            else:
+                with self._lock:
+                    self._disk_hits += 1
+                    self._touched.add(key)
+                    self._flush_if_full()
+                return tree
+
+        tree = build(equation, sep)
+        self._store_postfix(key, list(tree._postfix_tokens()))
+        return tree
+
+    def _store_postfix(self, key: bytes, tokens: list) -> str:
+        postfix = " ".join(tokens)
+        # A token with a space in it, from an expression split on another separator, couldn't be split back out.
+        if postfix.count(" ") != len(tokens) - 1:
+            return None
+        with self._lock:
+            self._misses += 1
+            self._pending_trees[key] = (key, postfix, len(postfix), time.time())
+            self._flush_if_full()
+        return postfix
+
+    def _load_postfix(self, key: bytes) -> str:
+        with self._lock:
+            row = self._pending_trees.get(key)
+            if row is None:
+                row = self._connection.execute("SELECT postfix FROM trees WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                return row[0]
+            return row[1]
+
+    def get_or_calculate(self, notation: str, equation: str, sep: str, bindings: dict, numeric, calculate):
+        '''Calculates the expression with the bindings and the numeric backend.  With store_results and no bindings,
+        its kept result is returned if there is one.  Otherwise calculate() evaluates its tree, which get_or_build
+        finds in memory, loads from the file or parses, and the result is kept.  Errors are raised again every
+        time, and never kept.
+        '''
+        # A short expression isn't looked up in the file at all.
+        if len(equation) < self._min_length:
+            return calculate()
+        backend_name = _result_backend_name(numeric) if self.store_results and bindings is None else None
+        if backend_name is None:
+            return calculate()
+
+        key = _key(notation, equation, sep)
+        # A tree in memory is quicker to evaluate than a result is to look up in the file.
+        in_memory = (notation, equation, sep) in self._memory
+        with self._lock:
+            encoded = self._memory_results.get((key, backend_name))
+            if encoded is not None:
+                self._memory_results.move_to_end((key, backend_name))
+            elif not in_memory:
+                encoded = self._pending_results.get((key, backend_name))
+                if encoded is None:
+                    encoded = self._connection.execute("SELECT type, value FROM results WHERE key = ? AND numeric = ?",
+                                                       (key, backend_name)).fetchone()
+                if encoded is not None:
+                    self._touched.add(key)
+                    self._remember_result(key, backend_name, tuple(encoded))
+                    self._flush_if_full()
+            if encoded is not None:
+                self._result_hits += 1
+                return _RESULT_DECODERS[encoded[0]](encoded[1])
+            self._result_misses += 1
+
+        result = calculate()
+        encoded = _encode_result(result)
+        if encoded is not None:
+            with self._lock:
+                self._pending_results[(key, backend_name)] = encoded
+                self._remember_result(key, backend_name, encoded)
+                self._flush_if_full()
+        return result
+
+    def _remember_result(self, key: bytes, backend_name: str, encoded: tuple) -> None:
+        self._memory_results[(key, backend_name)] = encoded
+        if self._memory_entries is not None and len(self._memory_results) > self._memory_entries:
+            self._memory_results.popitem(last=False)
+
+    def _flush_if_full(self) -> None:
+        if len(self._pending_trees) + len(self._pending_results) + len(self._touched) >= _FLUSH_ROWS:
+            self._flush()
+
+    def flush(self) -> None:
+        '''Writes the pending trees, results and use times to the file.
+        '''
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not (self._pending_trees or self._pending_results or self._touched):
+            return
+        now = time.time()
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.executemany("INSERT OR REPLACE INTO trees VALUES (?, ?, ?, ?)", self._pending_trees.values())
+            self._connection.executemany("UPDATE trees SET used = ? WHERE key = ?", ((now, key) for key in self._touched))
+            self._connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                         (key + value for key, value in self._pending_results.items()))
+        self._stored_since_prune += len(self._pending_trees)
+        self._pending_trees.clear()
+        self._pending_results.clear()
+        self._touched.clear()
+        if self._stored_since_prune >= _PRUNE_INTERVAL:
+            self._prune()
+
+    def prune(self) -> int:
+        '''Writes the pending rows, then deletes the least recently used trees and their results until the file
+        is within max_entries and max_bytes.  Returns the number of trees deleted.
+        '''
+        with self._lock:
+            self._flush()
+            return self._prune()
+
+    def _prune(self) -> int:
+        deleted = 0
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            if self._max_entries is not None:
+                deleted += self._connection.execute(
+                    "DELETE FROM trees WHERE key IN (SELECT key FROM trees ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self._max_entries,)).rowcount
+            if self._max_bytes is not None:
+                deleted += self._connection.execute(
+                    "DELETE FROM trees WHERE key IN (SELECT key FROM (SELECT key, SUM(size) OVER "
+                    "(ORDER BY used DESC, key) AS total FROM trees) WHERE total > ?)", (self._max_bytes,)).rowcount
+            if deleted:
+                self._connection.execute("DELETE FROM results WHERE key NOT IN (SELECT key FROM trees)")
+        self._stored_since_prune = 0
+        self._pruned += deleted
+        return deleted
+
+    def close(self) -> None:
+        '''Writes the pending rows, prunes the file if any trees were added, and closes it.
+        '''
+        with self._lock:
+            if self._connection is None:
+                return
+            self._flush()
+            if self._stored_since_prune:
+                self._prune()
+            self._connection.close()
+            self._connection = None
+
+    def clear(self) -> None:
+        '''Deletes every tree and result, from memory and from the file.
+        '''
+        self._memory.clear()
+        with self._lock:
+            self._memory_results.clear()
+            self._pending_trees.clear()
+            self._pending_results.clear()
+            self._touched.clear()
+            with self._connection:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.execute("DELETE FROM trees")
+                self._connection.execute("DELETE FROM results")
+
+    def __len__(self) -> int:
+        '''The number of trees in the file, after writing the pending ones.
+        '''
+        with self._lock:
+            self._flush()
+            return self._connection.execute("SELECT COUNT(*) FROM trees").fetchone()[0]
+
+    def __contains__(self, key: tuple) -> bool:
+        key = _key(*key)
+        with self._lock:
+            return key in self._pending_trees or \
+                self._connection.execute("SELECT 1 FROM trees WHERE key = ?", (key,)).fetchone() is not None
+
+    def stats(self) -> dict:
+        '''Returns a snapshot of the cache counters.  hits are trees found in memory and disk_hits trees loaded
+        from the file, and result_hits kept results found in either; entries and bytes are counted in the file,
+        after writing the pending rows.
+        '''
+        memory_hits = self._memory.stats()["hits"]
+        with self._lock:
+            self._flush()
+            entries, size = self._connection.execute("SELECT COUNT(*), TOTAL(size) FROM trees").fetchone()
+            return {
+                "hits" : memory_hits,
+                "disk_hits" : self._disk_hits,
+                "misses" : self._misses,
+                "result_hits" : self._result_hits,
+                "result_misses" : self._result_misses,
+                "pruned" : self._pruned,
+                "entries" : entries,
+                "bytes" : int(size),
+                "max_entries" : self._max_entries,
+                "max_bytes" : self._max_bytes
+            }
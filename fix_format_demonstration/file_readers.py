@@ -0,0 +1,81 @@
+'''Evaluating post-fix and pre-fix expressions straight from files, without loading them into memory.
+
+The file is read in fixed size chunks and split into tokens as it goes, and the tokens are handed
+one at a time to the stack engine.  Only the current chunk and the stack are held in memory, and the
+stack is bounded by the nesting depth of the expression, not by its length, so multi-gigabyte
+expressions are evaluated in constant memory as long as they aren't also gigabytes deep.
+
+Pre-fix files are read forwards with stack_engine.reduce_prefix_forward, which only keeps the operators
+still waiting for operands, instead of being reversed, so they don't need to be seekable either.
+'''
+import os
+
+from . import fix_format_readers
+from . import stack_engine
+from .utils import OperationEvaluator
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def iter_file_tokens(stream, sep: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    '''Yields the tokens of a binary stream, reading it chunk_size bytes at a time.
+    Tokens are separated by whitespace, or by sep if given, in which case whitespace around tokens is ignored.
+    '''
+    sep_bytes = sep.encode() if sep else None
+    leftover = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        data = leftover + chunk
+        parts = data.split(sep_bytes)
+        # The last part may be the start of a token that continues in the next chunk.
+        if sep_bytes is None:
+            leftover = b"" if data[-1:].isspace() else parts.pop()
+        else:
+            leftover = parts.pop()
+        for part in parts:
+            if sep_bytes is not None:
+                part = part.strip()
+                if not part:
+                    continue
+            yield part.decode()
+
+    leftover = leftover.strip()
+    if leftover:
+        yield leftover.decode()
+
+
+def _calculate_file(source, sep: str, chunk_size: int, reduce, error_type) -> float:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as stream:
+            return _calculate_file(stream, sep, chunk_size, reduce, error_type)
+
+    name = getattr(source, "name", repr(source))
+    tokens = iter_file_tokens(source, sep, chunk_size)
+    first_token = next(tokens, None)
+    # Match the calculators, which treat an empty expression as 0.
+    if first_token is None:
+        return 0.0
+
+    def all_tokens():
+        yield first_token
+        yield from tokens
+
+    return reduce(all_tokens(), OperationEvaluator.operand_value, OperationEvaluator.OPCODE_FUNCTIONS, error_type, name,
+                  "Expression in '{}'", require_operator=True)
+
+
+def calculate_postfix_file(source, sep: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> float:
+    '''Calculate a post-fix expression stored in a file, given as a path or a binary stream.
+    '''
+    return _calculate_file(source, sep, chunk_size, stack_engine.reduce_postfix,
+                           fix_format_readers.InvalidPostfixExpressionError)
+
+
+def calculate_prefix_file(source, sep: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> float:
+    '''Calculate a pre-fix expression stored in a file, given as a path or a binary stream.
+    '''
+    return _calculate_file(source, sep, chunk_size, stack_engine.reduce_prefix_forward,
+                           fix_format_readers.InvalidPrefixExpressionError)
@@ -1,7 +1,13 @@
+from functools import partial
+
 from .operation_tree import OperationTreeNode, OperationTree
-import queue
-from queue import LifoQueue
-from .utils import OperationEvaluator
+from .utils import OperationEvaluator, OperatorTable, UnboundVariableError
+from .compiled_expression import CompiledExpression
+from .parse_cache import ParseCache
+from . import numeric as numeric_backends
+from . import stack_engine
+from . import tokenizer
+from . import vectorized
 
 
 class InvalidInfixExpressionError(Exception):
@@ -9,178 +15,172 @@ class InvalidInfixExpressionError(Exception):
         super().__init__(*args)
 
 
-def infix_to_operation_tree(equation: str, sep: str = " ") -> OperationTree:
-    if len(equation) == 0:
-        raise InvalidInfixExpressionError("Empty expression!")
+# Expressions longer than this many characters are split on a one character separator a chunk at a time,
+# so that the tokens held at once don't grow with the length of the expression.
+_SPLIT_CHUNK_SIZE = 1 << 16
 
-    split_equ = equation.split(sep=sep)
-    operator_stack = LifoQueue()
-    node_stack = LifoQueue()
-    expecting_number = True
-
-    for i in split_equ:
-        if OperationEvaluator.is_operator(i):
-            if expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            # Make sure there aren't any operations we have to perform before the current operator 'i'.
-            while not operator_stack.empty():
-                test_operator = operator_stack.get_nowait()
-                if test_operator == '(' or not OperationEvaluator.compare_operator_order(test_operator, i):
-                    operator_stack.put_nowait(test_operator)
-                    break
-                else:
-                    second_operand = None
-                    first_operand = None
-                    try:
-                        second_operand = node_stack.get_nowait()
-                        first_operand = node_stack.get_nowait()
-                    except queue.Empty:
-                        raise InvalidInfixExpressionError(f"Expression '{equation}' is missing an operand!")
-                    new_node = OperationTreeNode(test_operator, None)
-                    new_node.setLeft(first_operand)
-                    new_node.setRight(second_operand)
-                    node_stack.put_nowait(new_node)
-            operator_stack.put_nowait(i)
-            expecting_number = True
-        elif i == '(':
-            if not expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            operator_stack.put_nowait(i)
-        elif i == ')':
-            if expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            test_operator = ''
-            try:
-                test_operator = operator_stack.get_nowait()
-            except queue.Empty:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is missing a '('!")
-            while test_operator != '(':
-                second_operand = None
-                first_operand = None
-                try:
-                    second_operand = node_stack.get_nowait()
-                    first_operand = node_stack.get_nowait()
-                except queue.Empty:
-                    raise InvalidInfixExpressionError(f"Expression '{equation}' is missing an operand!")
-                new_node = OperationTreeNode(test_operator, None)
-                new_node.setLeft(first_operand)
-                new_node.setRight(second_operand)
-                node_stack.put_nowait(new_node)
-                try:
-                    test_operator = operator_stack.get_nowait()
-                except queue.Empty:
-                    raise InvalidInfixExpressionError(f"Expression '{equation}' is missing a '('!")
-        else:
-            if not expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            node_stack.put_nowait(OperationTreeNode(i, None))
-            expecting_number = False
-    
-    while not operator_stack.empty():
-        operator = operator_stack.get_nowait()
-        if operator == '(':
-            raise InvalidInfixExpressionError(f"Expression '{equation}' is missing a ')'!")
-
-        second_operand = None
-        first_operand = None
-        try:
-            second_operand = node_stack.get_nowait()
-            first_operand = node_stack.get_nowait()
-        except queue.Empty:
-            raise InvalidInfixExpressionError(f"Expression '{equation}' is missing an operand!")
-        new_node = OperationTreeNode(operator, None)
-        new_node.setLeft(first_operand)
-        new_node.setRight(second_operand)
-        node_stack.put_nowait(new_node)
-    
-    if node_stack.qsize() > 1:
-        raise InvalidInfixExpressionError(f"Expression '{equation}' has an extra operand!")
 
-    return OperationTree(node_stack.get_nowait())
+def tokenize(equation: str, sep: str, notation: str):
+    '''Splits the expression on sep.  Without a separator (None or ""), the expression is scanned by the tokenizer
+    instead, which allows tokens to sit next to each other, e.g. "4*(5+3)^2", and doesn't build a list of tokens.
+    '''
+    if sep:
+        return _split_tokens(equation, sep)
+    return tokenizer.scan_tokens(equation, notation)
+
+
+def _split_tokens(equation: str, sep: str):
+    # The same tokens as equation.split(sep).  Only single characters are split in chunks, as a longer separator
+    # could overlap itself across the end of a chunk.
+    if len(equation) <= _SPLIT_CHUNK_SIZE or len(sep) != 1:
+        return equation.split(sep)
+    return _split_chunks(equation, sep)
+
+
+def _split_chunks(equation: str, sep: str):
+    start = 0
+    while True:
+        end = equation.find(sep, start + _SPLIT_CHUNK_SIZE)
+        if end == -1:
+            yield from equation[start:].split(sep)
+            return
+        yield from equation[start:end].split(sep)
+        start = end + 1
+
+
+def _split_tokens_reversed(equation: str, sep: str):
+    # The same tokens as reversed(equation.split(sep)), split a chunk at a time from the end like _split_tokens.
+    if len(equation) <= _SPLIT_CHUNK_SIZE or len(sep) != 1:
+        return reversed(equation.split(sep))
+    return _split_chunks_reversed(equation, sep)
+
+
+def _split_chunks_reversed(equation: str, sep: str):
+    end = len(equation)
+    while True:
+        start = equation.rfind(sep, 0, end - _SPLIT_CHUNK_SIZE) if end > _SPLIT_CHUNK_SIZE else -1
+        yield from reversed(equation[start + 1:end].split(sep))
+        if start == -1:
+            return
+        end = start
+
+
+def _make_leaf(token: str) -> OperationTreeNode:
+    return OperationTreeNode(token, None)
+
 
+_JOIN_FUNCTIONS = OperatorTable(lambda operator: partial(OperationTreeNode.join, operator))
+
+
+class _SubtreeInterner:
+    '''Hands out one shared node per distinct subtree while a tree is being built.
+    Operator nodes are keyed by their children's identities, so structurally identical subtrees end up as the same node.
+    '''
+
+    def __init__(self) -> None:
+        self._nodes = {}
+        self.join_functions = OperatorTable(lambda operator: partial(self.join_nodes, operator))
+
+    def make_leaf(self, token: str) -> OperationTreeNode:
+        node = self._nodes.get(token)
+        if node is None:
+            node = self._nodes[token] = OperationTreeNode(token, None)
+        return node
+
+    def join_nodes(self, operator: str, first_operand: OperationTreeNode,
+                   second_operand: OperationTreeNode = None) -> OperationTreeNode:
+        key = (operator, id(first_operand), id(second_operand))
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = OperationTreeNode.join(operator, first_operand, second_operand)
+        return node
+
+
+def _tree_functions(intern_subtrees: bool):
+    if intern_subtrees:
+        interner = _SubtreeInterner()
+        return interner.make_leaf, interner.join_functions
+    return _make_leaf, _JOIN_FUNCTIONS
+
+
+def _build_cached(cache: ParseCache, notation: str, equation: str, sep: str, intern_subtrees: bool, build_tree) -> OperationTree:
+    if intern_subtrees:
+        # Shared and unshared trees of the same expression are cached separately.
+        return cache.get_or_build(f"{notation}/shared", equation, sep,
+                                  lambda equation, sep: build_tree(equation, sep, intern_subtrees=True))
+    return cache.get_or_build(notation, equation, sep, build_tree)
+
+
+def _calculation_functions(bindings: dict, numeric=None):
+    '''Returns the make_operand function and operator_functions table the calculators hand to the stack engine.
+    Without bindings, every operand is still read by operand_value, so that a variable raises UnboundVariableError.
+    '''
+    if numeric is not None:
+        backend = numeric_backends.get_backend(numeric)
+        if bindings is None:
+            return backend.operand_value, backend.functions
+        if vectorized.uses_arrays(bindings):
+            numeric_backends.check_arrays_supported(backend)
+        else:
+            return lambda token: backend.operand_value(token, bindings), backend.functions
+    if bindings is None:
+        return OperationEvaluator.operand_value, OperationEvaluator.OPCODE_FUNCTIONS
+    if vectorized.uses_arrays(bindings):
+        columns = vectorized.as_columns(bindings)
+        return lambda token: OperationEvaluator.operand_value(token, columns), vectorized.UFUNC_FUNCTIONS
+    return lambda token: OperationEvaluator.operand_value(token, bindings), OperationEvaluator.OPCODE_FUNCTIONS
+
+
+def _calculate_cached(cache: ParseCache, notation: str, equation: str, sep: str, bindings: dict, build_tree, error_type,
+                      numeric) -> float:
+    if hasattr(cache, "get_or_calculate"):
+        # A disk_cache.DiskParseCache calculates a stored expression from its post-fix text, or its kept result.
+        return cache.get_or_calculate(notation, equation, sep, bindings, numeric, lambda: _evaluate_cached(
+            cache, notation, equation, sep, bindings, build_tree, error_type, numeric))
+    return _evaluate_cached(cache, notation, equation, sep, bindings, build_tree, error_type, numeric)
+
+
+def _evaluate_cached(cache: ParseCache, notation: str, equation: str, sep: str, bindings: dict, build_tree, error_type,
+                     numeric) -> float:
+    tree = cache.get_or_build(notation, equation, sep, build_tree)
+    # The calculators insist on an operator in pre-fix and post-fix expressions, even though a lone operand is a valid tree.
+    if notation != "infix" and not OperationEvaluator.is_operator(tree._root._value):
+        raise error_type(f"Expression: '{equation}' has an extra operand!")
+    if bindings is None:
+        return tree.evaluate_tree(numeric)
+    return tree.evaluate(bindings, numeric)
+
+
+def infix_to_operation_tree(equation: str, sep: str = " ", cache: ParseCache = None,
+                            intern_subtrees: bool = False) -> OperationTree:
+    '''Build an OperationTree from an expression in in-fix format.  With intern_subtrees, identical subtrees
+    are shared instead of duplicated, see OperationTree.
+    '''
+    if len(equation) == 0:
+        raise InvalidInfixExpressionError("Empty expression!")
+    if cache is not None:
+        return _build_cached(cache, "infix", equation, sep, intern_subtrees, infix_to_operation_tree)
 
+    make_leaf, join_nodes = _tree_functions(intern_subtrees)
+    root = stack_engine.reduce_infix(tokenize(equation, sep, "infix"), make_leaf, join_nodes, InvalidInfixExpressionError, equation)
+    return OperationTree(root, intern_subtrees, validated=True)
 
-def calculate_infix(equation: str, sep: str = " ") -> float:
+
+def calculate_infix(equation: str, sep: str = " ", bindings: dict = None, scratch: stack_engine.Scratch = None,
+                     cache: ParseCache = None, numeric=None) -> float:
     '''Parse an expression in in-fix format, and return the calculated result.
+    bindings gives the values of any variables in the expression, and scratch lets repeated calls reuse the same stacks.
+    With a cache, the expression is parsed into an OperationTree once and the cached tree is evaluated.
+    numeric picks the number type to calculate with, see the numeric module.
     '''
     if len(equation) == 0:
         return 0.0
+    if cache is not None:
+        return _calculate_cached(cache, "infix", equation, sep, bindings, infix_to_operation_tree, InvalidInfixExpressionError, numeric)
 
-    split_equ = equation.split(sep=sep)
-    operator_stack = LifoQueue()
-    number_stack = LifoQueue()
-
-    expecting_number = True
-    for i in split_equ:
-        if OperationEvaluator.is_operator(i):
-            if expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            # Make sure there aren't any operations we have to perform before the current operator 'i'.
-            while not operator_stack.empty():
-                test_operator = operator_stack.get_nowait()
-                if test_operator == '(' or not OperationEvaluator.compare_operator_order(test_operator, i):
-                    operator_stack.put_nowait(test_operator)
-                    break
-                else:
-                    second_operand = None
-                    first_operand = None
-                    try:
-                        second_operand = number_stack.get_nowait()
-                        first_operand = number_stack.get_nowait()
-                    except queue.Empty:
-                        raise InvalidInfixExpressionError(f"Expression '{equation}' is missing an operand!")
-                    number_stack.put_nowait(OperationEvaluator.evaluate_operator(test_operator, first_operand, second_operand))
-            operator_stack.put_nowait(i)
-            expecting_number = True
-        elif i == '(':
-            if not expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            operator_stack.put_nowait(i)
-        elif i == ')':
-            if expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            test_operator = ''
-            try:
-                test_operator = operator_stack.get_nowait()
-            except queue.Empty:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is missing a '('!")
-            while test_operator != '(':
-                second_operand = None
-                first_operand = None
-                try:
-                    second_operand = number_stack.get_nowait()
-                    first_operand = number_stack.get_nowait()
-                except queue.Empty:
-                    raise InvalidInfixExpressionError(f"Expression '{equation}' is missing an operand!")
-                number_stack.put_nowait(OperationEvaluator.evaluate_operator(test_operator, first_operand, second_operand))
-                try:
-                    test_operator = operator_stack.get_nowait()
-                except queue.Empty:
-                    raise InvalidInfixExpressionError(f"Expression '{equation}' is missing a '('!")
-        else:
-            if not expecting_number:
-                raise InvalidInfixExpressionError(f"Expression '{equation}' is misformatted!")
-            number_stack.put_nowait(float(i))
-            expecting_number = False
-    
-    while not operator_stack.empty():
-        operator = operator_stack.get_nowait()
-        if operator == '(':
-            raise InvalidInfixExpressionError(f"Expression '{equation}' is missing a ')'!")
-
-        second_operand = None
-        first_operand = None
-        try:
-            second_operand = number_stack.get_nowait()
-            first_operand = number_stack.get_nowait()
-        except queue.Empty:
-            raise InvalidInfixExpressionError(f"Expression '{equation}' is missing an operand!")
-        number_stack.put_nowait(OperationEvaluator.evaluate_operator(operator, first_operand, second_operand))
-    
-    if number_stack.qsize() > 1:
-        raise InvalidInfixExpressionError(f"Expression '{equation}' has an extra operand!")
-
-    return number_stack.get_nowait()
+    make_operand, operator_functions = _calculation_functions(bindings, numeric)
+    return stack_engine.reduce_infix(tokenize(equation, sep, "infix"), make_operand, operator_functions,
+                                     InvalidInfixExpressionError, equation, scratch=scratch)
 
 
 class InvalidPostfixExpressionError(Exception):
@@ -188,59 +188,46 @@ class InvalidPostfixExpressionError(Exception):
         super().__init__(*args)
 
 
-def postfix_to_operation_tree(equation: str, sep: str = " ") -> OperationTree:
+def postfix_to_operation_tree(equation: str, sep: str = " ", cache: ParseCache = None,
+                              intern_subtrees: bool = False) -> OperationTree:
+    '''Build an OperationTree from an expression in post-fix format.  With intern_subtrees, identical subtrees
+    are shared instead of duplicated, see OperationTree.
+    '''
     if len(equation) == 0:
         raise InvalidPostfixExpressionError("Empty expression!")
+    if cache is not None:
+        return _build_cached(cache, "postfix", equation, sep, intern_subtrees, postfix_to_operation_tree)
 
-    split_equ = equation.split(sep=sep)
+    make_leaf, join_nodes = _tree_functions(intern_subtrees)
+    root = stack_engine.reduce_postfix(tokenize(equation, sep, "postfix"), make_leaf, join_nodes, InvalidPostfixExpressionError, equation)
+    return OperationTree(root, intern_subtrees, validated=True)
 
-    stack = LifoQueue()
 
-    for i in split_equ:
-        cur_node = OperationTreeNode(i, None)
-        if OperationEvaluator.is_operator(i):
-            try:
-                cur_node.setRight(stack.get_nowait())
-                cur_node.setLeft(stack.get_nowait())
-            except queue.Empty:
-                raise InvalidPostfixExpressionError(f"Expression '{equation}' has a dangling operator!")
-        stack.put_nowait(cur_node)
-    
-    if stack.qsize() > 1:
-        raise InvalidPostfixExpressionError(f"Expression '{equation}' has an extra operand!")
-    
-    return OperationTree(stack.get_nowait())
-
-
-def calculate_postfix(equation: str, sep: str = " ") -> float:
+def calculate_postfix(equation: str, sep: str = " ", bindings: dict = None, scratch: stack_engine.Scratch = None,
+                       cache: ParseCache = None, numeric=None) -> float:
     '''Parse an expression in post-fix format, and return the calculated result.
+    bindings gives the values of any variables in the expression, and scratch lets repeated calls reuse the same stacks.
+    With a cache, the expression is parsed into an OperationTree once and the cached tree is evaluated.
+    numeric picks the number type to calculate with, see the numeric module.
     '''
     if len(equation) == 0:
         return 0.0
+    if cache is not None:
+        return _calculate_cached(cache, "postfix", equation, sep, bindings, postfix_to_operation_tree, InvalidPostfixExpressionError, numeric)
 
-    split_equ = equation.split(sep=sep)
+    make_operand, operator_functions = _calculation_functions(bindings, numeric)
+    if not sep:
+        # A valid post-fix expression should always end in an operator, which the reducer checks when scanning.
+        return stack_engine.reduce_postfix(tokenizer.scan_tokens(equation, "postfix"), make_operand, operator_functions,
+                                           InvalidPostfixExpressionError, equation, "Expression: '{}'", scratch, True)
 
     # A valid post-fix expression should always end in an operator.
-    if not OperationEvaluator.is_operator(split_equ[-1]):
+    last_sep = equation.rfind(sep)
+    if not OperationEvaluator.is_operator(equation if last_sep == -1 else equation[last_sep + len(sep):]):
         raise InvalidPostfixExpressionError(f"Expression: '{equation}' has an extra operand!")
 
-    lq = LifoQueue()
-    for i in split_equ:
-        if OperationEvaluator.is_operator(i):
-            try:
-                second_arg = lq.get_nowait()
-                first_arg = lq.get_nowait()
-                lq.put_nowait(OperationEvaluator.evaluate_operator(i, first_arg, second_arg))
-            except queue.Empty:
-                # If we don't have any numbers on the stack, then this is an extra operator.
-                raise InvalidPostfixExpressionError(f"Expression: '{equation}' has a dangling operator!")
-        else:
-            lq.put_nowait(float(i))
-    
-    if lq.qsize() > 1:
-        raise InvalidPostfixExpressionError(f"Expression: '{equation}' has an extra operand!")
-
-    return lq.get_nowait()
+    return stack_engine.reduce_postfix(_split_tokens(equation, sep), make_operand, operator_functions,
+                                       InvalidPostfixExpressionError, equation, "Expression: '{}'", scratch)
 
 
 class InvalidPrefixExpressionError(Exception):
@@ -248,66 +235,137 @@ class InvalidPrefixExpressionError(Exception):
         super().__init__(*args)
 
 
-def prefix_to_operation_tree(equation: str, sep: str = " ") -> OperationTree:
+def prefix_to_operation_tree(equation: str, sep: str = " ", cache: ParseCache = None,
+                             intern_subtrees: bool = False) -> OperationTree:
+    '''Build an OperationTree from an expression in pre-fix format.  With intern_subtrees, identical subtrees
+    are shared instead of duplicated, see OperationTree.
+
+    The tree is built in a single pass from left to right, and a malformed expression is rejected at the
+    first token that shows it, with that token's position in the error.
+    '''
     if len(equation) == 0:
-        return 0.0
+        raise InvalidPrefixExpressionError("Empty expression!")
+    if cache is not None:
+        return _build_cached(cache, "prefix", equation, sep, intern_subtrees, prefix_to_operation_tree)
 
-    split_equ = equation.split(sep=sep)
-
-    cur_node = OperationTreeNode(split_equ[0], None)
-    tree = OperationTree(cur_node)
-
-    for i in split_equ[1:]:
-        while cur_node._parent is not None and cur_node._left_child is not None and cur_node._right_child is not None:
-                cur_node = cur_node._parent
-        if cur_node._left_child is None:
-            cur_node.setLeft(OperationTreeNode(i, cur_node))
-            if OperationEvaluator.is_operator(i):
-                cur_node = cur_node._left_child
-        elif cur_node._right_child is None:
-            cur_node.setRight(OperationTreeNode(i, cur_node))
-            if OperationEvaluator.is_operator(i):
-                cur_node = cur_node._right_child
-    
-    if not tree.is_tree_valid():
-        raise InvalidPrefixExpressionError()
-    
-    return tree
-
-
-def calculate_prefix(equation: str, sep: str = " ") -> float:
+    make_leaf, join_nodes = _tree_functions(intern_subtrees)
+    root = stack_engine.reduce_prefix_forward(tokenize(equation, sep, "prefix"), make_leaf, join_nodes,
+                                              InvalidPrefixExpressionError, equation)
+    return OperationTree(root, intern_subtrees, validated=True)
+
+
+def calculate_prefix(equation: str, sep: str = " ", bindings: dict = None, scratch: stack_engine.Scratch = None,
+                      cache: ParseCache = None, numeric=None) -> float:
     '''Parse an expression in pre-fix format, and return the calculated result.
+    bindings gives the values of any variables in the expression, and scratch lets repeated calls reuse the same stacks.
+    With a cache, the expression is parsed into an OperationTree once and the cached tree is evaluated.
+    numeric picks the number type to calculate with, see the numeric module.
     '''
     if len(equation) == 0:
         return 0.0
+    if cache is not None:
+        return _calculate_cached(cache, "prefix", equation, sep, bindings, prefix_to_operation_tree, InvalidPrefixExpressionError, numeric)
+
+    make_operand, operator_functions = _calculation_functions(bindings, numeric)
+    if not sep:
+        # Scanned tokens can't be reversed without collecting them first, so they are reduced from left to right.
+        return stack_engine.reduce_prefix_forward(tokenizer.scan_tokens(equation, "prefix"), make_operand, operator_functions,
+                                                  InvalidPrefixExpressionError, equation, "Expression: '{}'", scratch, True)
+
+    # An expression in pre-fix format can be read backwards and calculated in a similar manner to expressions in
+    # post-fix format.  See stack_engine.reduce_prefix for how the order of the operands is accounted for.
+    # A valid pre-fix expression should always start with an operator.
+    first_sep = equation.find(sep)
+    if not OperationEvaluator.is_operator(equation if first_sep == -1 else equation[:first_sep]):
+        raise InvalidPrefixExpressionError(f"Expression: '{equation}' has an extra operand!")
 
-    # An expression in pre-fix format can be reversed and calculated in a similar manner to expressions in post-fix format.
-    # Note that there are slight alterations to the process since reversing everything also changes the position of
-    # the operands, which our code must account for.
-    split_equ = equation.split(sep=sep)
-    split_equ.reverse()
+    return stack_engine.reduce_prefix(_split_tokens_reversed(equation, sep), make_operand, operator_functions,
+                                      InvalidPrefixExpressionError, equation, "Expression: '{}'", scratch)
 
-    # A valid post-fix expression should always start with an operator.
-    if not OperationEvaluator.is_operator(split_equ[-1]):
-        raise InvalidPrefixExpressionError(f"Expression: '{equation}' has an extra operand!")
 
-    lq = LifoQueue()
-    for i in split_equ:
-        if OperationEvaluator.is_operator(i):
-            try:
-                # Notice that unlike post-fix, the first operand comes before the second operand in the stack.
-                # This is because the stack has a reversing effect on the order of items put into it.
-                # Since we already reversed the sequence above, the stack undoes our reversal of the operands.
-                first_arg = lq.get_nowait()
-                second_arg = lq.get_nowait()
-                lq.put_nowait(OperationEvaluator.evaluate_operator(i, first_arg, second_arg))
-            except queue.Empty:
-                # If we don't have any numbers on the stack, then this is an extra operator.
-                raise InvalidPrefixExpressionError(f"Expression: '{equation}' has a dangling operator!")
+TREE_BUILDERS = {
+    "infix" : infix_to_operation_tree,
+    "prefix" : prefix_to_operation_tree,
+    "postfix" : postfix_to_operation_tree
+}
+
+NOTATION_ERRORS = {
+    "infix" : InvalidInfixExpressionError,
+    "prefix" : InvalidPrefixExpressionError,
+    "postfix" : InvalidPostfixExpressionError
+}
+
+CALCULATORS = {
+    "infix" : calculate_infix,
+    "prefix" : calculate_prefix,
+    "postfix" : calculate_postfix
+}
+
+# Everything a single malformed or unlucky expression can raise while being calculated.
+CALCULATION_ERRORS = (
+    InvalidInfixExpressionError,
+    InvalidPrefixExpressionError,
+    InvalidPostfixExpressionError,
+    UnboundVariableError,
+    ValueError,
+    ArithmeticError
+)
+
+
+def _check_notation(notation: str) -> None:
+    if notation not in TREE_BUILDERS:
+        raise ValueError(f"Unknown notation '{notation}'!  Expected one of {', '.join(TREE_BUILDERS)}.")
+
+
+def compile(equation: str, notation: str = "infix", sep: str = " ", numeric=None) -> CompiledExpression:
+    '''Parse and validate an expression once, and return a CompiledExpression that can be evaluated repeatedly.
+    With numeric, the literals are read by that backend once, here, instead of on every evaluation.
+    '''
+    _check_notation(notation)
+    if len(equation) == 0:
+        raise NOTATION_ERRORS[notation]("Empty expression!")
+
+    tree = TREE_BUILDERS[notation](equation, sep)
+    return CompiledExpression.from_operation_tree(tree, equation, notation, numeric)
+
+
+def calculate_many(equations, notation: str = "infix", sep: str = " ", on_error="return", bindings: dict = None,
+                   cache: ParseCache = None, numeric=None):
+    '''Lazily calculate every expression in an iterable, yielding the results in input order.
+
+    One expression is read at a time and all of them share the same stacks, so memory use does not grow
+    with the number of expressions.  on_error decides what happens to an expression that fails:
+    "return" yields the exception in place of the result, "skip" yields nothing for it, "raise" re-raises it,
+    and a callable is called with (equation, error) and whatever it returns is yielded instead.
+    A cache is handed on to the calculator, so that repeated expressions are only parsed once.
+    If notation is None, every item is a (notation, equation) pair instead, so that notations can be mixed.
+    numeric is handed on to the calculator like the cache.
+    '''
+    if notation is not None:
+        _check_notation(notation)
+    if numeric is not None:
+        numeric = numeric_backends.get_backend(numeric)
+    if on_error not in ("return", "skip", "raise") and not callable(on_error):
+        raise ValueError(f"Unknown on_error '{on_error}'!  Expected 'return', 'skip', 'raise' or a callable.")
+
+    scratch = stack_engine.Scratch()
+    for equation in equations:
+        item_notation = notation
+        if notation is None:
+            item_notation, equation = equation
+        try:
+            if item_notation not in CALCULATORS:
+                raise ValueError(f"Unknown notation '{item_notation}'!  Expected one of {', '.join(CALCULATORS)}.")
+            result = CALCULATORS[item_notation](equation, sep, bindings, scratch, cache, numeric)
+        except CALCULATION_ERRORS as error:
+            if on_error == "raise":
+                raise
+            elif on_error == "skip":
+                continue
+            elif on_error == "return":
+                yield error
+            else:
+                yield on_error(equation, error)
         else:
-            lq.put_nowait(float(i))
-    
-    if lq.qsize() > 1:
-        raise InvalidPrefixExpressionError(f"Expression: '{equation}' has an extra operand!")
+            yield result
 
-    return lq.get_nowait()
@@ -0,0 +1,404 @@
+'''A compact, array-backed form of an OperationTree.
+
+The nodes are stored in post-fix order as one byte-sized opcode each, with the literal
+values packed into a float64 array and the variable references into an unsigned int array
+pointing at a table of names.  An operator's opcode is the one OperationEvaluator's registry
+gave it.  The children of an operator are not stored: in post-fix order they are always the
+one or two values most recently produced, so the tree is evaluated in a single linear pass
+with one operand stack.  A node costs 1 byte plus 8 bytes for a literal, compared
+with a few hundred bytes for an OperationTreeNode and its string value.
+
+write and read store the arrays as they are, in a versioned binary format, so a tree can be
+passed between processes or kept on disk without re-parsing or pickling a graph of nodes:
+
+    header      the magic b"FXOT", the format version, and the size of every section below,
+                as little-endian fields (see _HEADER)
+    literals    float64, little-endian
+    references  uint32, little-endian, the variable of every VARIABLE opcode
+    opcodes     one byte per node, in post-fix order
+    tables      the symbol and arity of every operator opcode used, and the variable names
+
+Custom operators get their opcodes in the order they are registered, which can differ between
+processes, so on reading the opcodes are mapped through the table to the reader's registry.
+from_buffer and load read a tree in place: the arrays are memoryviews of the buffer, or of the
+memory-mapped file, so nothing is allocated per node until the tree is evaluated.
+'''
+from array import array
+from collections import Counter
+from itertools import accumulate, count
+import io
+import mmap
+import struct
+import sys
+
+from .operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+from .utils import OperationEvaluator, OperatorTable, UnboundVariableError
+from . import fix_format_readers
+from . import stack_engine
+from . import vectorized
+
+
+LITERAL = 0
+VARIABLE = 1
+# The registry's own tables, which operators are added to as they are registered.
+OPERATOR_OPCODES = OperationEvaluator.OPCODES
+OPCODE_OPERATORS = OperationEvaluator.OPCODE_SYMBOLS
+
+FORMAT_MAGIC = b"FXOT"
+FORMAT_VERSION = 1
+# Magic, version, flags (none yet), operator count, variable count, and the opcode, literal, variable reference
+# and table section sizes.  The header is 48 bytes, so the float64 literals that follow it are aligned.
+_HEADER = struct.Struct("<4sHHIIQQQQ")
+# Opcode, arity and symbol length, followed by the UTF-8 symbol.
+_OPERATOR_ENTRY = struct.Struct("<BBH")
+# Name length, followed by the UTF-8 name.
+_NAME_ENTRY = struct.Struct("<I")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class InvalidFlatTreeError(ValueError):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+
+class FlatOperationTree:
+    '''The arrays are array.array objects, or memoryviews of the same types for a tree read in place with
+    from_buffer or load.
+    '''
+
+    __slots__ = ("_opcodes", "_literals", "_variable_refs", "_variables")
+
+    def __init__(self, opcodes: array, literals: array, variable_refs: array = None, variables: tuple = ()) -> None:
+        self._opcodes = opcodes
+        self._literals = literals
+        self._variable_refs = variable_refs if variable_refs is not None else array('I')
+        self._variables = tuple(variables)
+
+    @classmethod
+    def from_operation_tree(cls, tree: OperationTree) -> "FlatOperationTree":
+        if not tree._validate():
+            raise OperationTreeEvaluationError("Tried to flatten an invalid operation tree!")
+        builder = _FlatBuilder()
+        # The same walk as OperationTree.evaluate_tree's: an opcode on the stack is emitted once all of its
+        # children have been, so the stack only grows with the depth of the tree.
+        opcodes = builder.opcodes
+        walk_stack = [tree._root]
+        while walk_stack:
+            cur_node = walk_stack.pop()
+            if type(cur_node) is int:
+                opcodes.append(cur_node)
+            elif cur_node._opcode is not None:
+                walk_stack.append(cur_node._opcode)
+                if cur_node._right_child is not None:
+                    walk_stack.append(cur_node._right_child)
+                walk_stack.append(cur_node._left_child)
+            else:
+                builder.add_operand(cur_node._value)
+        return builder.finish()
+
+    @classmethod
+    def parse(cls, equation: str, notation: str = "infix", sep: str = " ") -> "FlatOperationTree":
+        '''Parses an expression straight into the flat form.  In-fix and post-fix expressions never
+        allocate an OperationTreeNode; pre-fix expressions are built as an OperationTree first.
+        '''
+        if notation not in fix_format_readers.TREE_BUILDERS:
+            raise ValueError(f"Unknown notation '{notation}'!  Expected one of {', '.join(fix_format_readers.TREE_BUILDERS)}.")
+        if len(equation) == 0:
+            raise fix_format_readers.NOTATION_ERRORS[notation]("Empty expression!")
+
+        if notation == "prefix":
+            return cls.from_operation_tree(fix_format_readers.prefix_to_operation_tree(equation, sep))
+
+        # The reducers call make_operand and the operator functions in post-fix order, so the builder can simply append.
+        builder = _FlatBuilder()
+        reduce = stack_engine.reduce_infix if notation == "infix" else stack_engine.reduce_postfix
+        reduce(fix_format_readers.tokenize(equation, sep, notation), builder.add_operand, builder.operator_functions,
+               fix_format_readers.NOTATION_ERRORS[notation], equation)
+        return builder.finish()
+
+    def to_operation_tree(self) -> OperationTree:
+        arities = OperationEvaluator.OPCODE_ARITIES
+        node_stack = []
+        literals = iter(self._literals)
+        variable_refs = iter(self._variable_refs)
+        for opcode in self._opcodes:
+            if opcode == LITERAL:
+                node_stack.append(OperationTreeNode(repr(next(literals)), None))
+            elif opcode == VARIABLE:
+                node_stack.append(OperationTreeNode(self._variables[next(variable_refs)], None))
+            elif arities[opcode] == 1:
+                node_stack.append(OperationTreeNode.join(OPCODE_OPERATORS[opcode], node_stack.pop()))
+            else:
+                right_child = node_stack.pop()
+                node_stack.append(OperationTreeNode.join(OPCODE_OPERATORS[opcode], node_stack.pop(), right_child))
+        return OperationTree(node_stack[0], validated=True)
+
+    @property
+    def variables(self) -> tuple:
+        return self._variables
+
+    def __len__(self) -> int:
+        return len(self._opcodes)
+
+    def nbytes(self) -> int:
+        '''The size of the packed arrays in bytes.
+        '''
+        return sum(len(packed) * packed.itemsize for packed in (self._opcodes, self._literals, self._variable_refs))
+
+    def write(self, file) -> int:
+        '''Writes the tree to a binary file in the format described above, and returns the number of bytes written.
+        The arrays are written straight from their buffers, without building the whole encoding in memory first.
+        '''
+        tables = bytearray()
+        operator_opcodes = sorted(set(self._opcodes) - {LITERAL, VARIABLE})
+        for opcode in operator_opcodes:
+            if OPCODE_OPERATORS[opcode] is None:
+                raise InvalidFlatTreeError(f"Opcode {opcode} belongs to an operator that has been unregistered!")
+            symbol = OPCODE_OPERATORS[opcode].encode()
+            tables += _OPERATOR_ENTRY.pack(opcode, OperationEvaluator.OPCODE_ARITIES[opcode], len(symbol)) + symbol
+        for name in self._variables:
+            encoded = name.encode()
+            tables += _NAME_ENTRY.pack(len(encoded)) + encoded
+
+        file.write(_HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, 0, len(operator_opcodes), len(self._variables),
+                                len(self._opcodes), len(self._literals), len(self._variable_refs), len(tables)))
+        for packed in (self._literals, self._variable_refs, self._opcodes):
+            file.write(_little_endian(packed))
+        file.write(tables)
+        return _HEADER.size + self.nbytes() + len(tables)
+
+    def to_bytes(self) -> bytes:
+        stream = io.BytesIO()
+        self.write(stream)
+        return stream.getvalue()
+
+    @classmethod
+    def read(cls, file) -> "FlatOperationTree":
+        '''Reads a tree written by write from a binary file, leaving the file just past it, so that several trees
+        can be read one after the other from a stream.  Returns None if the file is already at its end.
+        '''
+        header = _read_exactly(file, _HEADER.size, allow_end=True)
+        if header is None:
+            return None
+        _, _, _, operator_count, variable_count, opcode_count, literal_count, variable_ref_count, table_size = \
+            _unpack_header(header)
+
+        literals = array('d')
+        literals.frombytes(_read_exactly(file, literal_count * literals.itemsize))
+        variable_refs = array('I')
+        variable_refs.frombytes(_read_exactly(file, variable_ref_count * variable_refs.itemsize))
+        opcodes = array('B')
+        opcodes.frombytes(_read_exactly(file, opcode_count))
+        operators, variables = _unpack_tables(memoryview(_read_exactly(file, table_size)), operator_count, variable_count)
+        if not _LITTLE_ENDIAN:
+            literals.byteswap()
+            variable_refs.byteswap()
+        return _checked_tree(cls, opcodes, literals, variable_refs, operators, variables)
+
+    @classmethod
+    def from_buffer(cls, buffer) -> "FlatOperationTree":
+        '''Reads the tree that fills a bytes-like object, like the result of to_bytes or an mmap.  On a little-endian
+        machine the tree's arrays are memoryviews of the buffer, so they are only read as the tree is used.
+        '''
+        view = memoryview(buffer).cast('B')
+        if len(view) < _HEADER.size:
+            raise InvalidFlatTreeError("The flat tree is truncated!")
+        _, _, _, operator_count, variable_count, opcode_count, literal_count, variable_ref_count, table_size = \
+            _unpack_header(view[:_HEADER.size])
+
+        offset = _HEADER.size
+        sections = []
+        for size in (literal_count * 8, variable_ref_count * 4, opcode_count, table_size):
+            sections.append(view[offset:offset + size])
+            offset += size
+        if offset > len(view):
+            raise InvalidFlatTreeError("The flat tree is truncated!")
+        if offset < len(view):
+            raise InvalidFlatTreeError(f"The flat tree is followed by {len(view) - offset} unexpected bytes!")
+        literals, variable_refs, opcodes, tables = sections
+        operators, variables = _unpack_tables(tables, operator_count, variable_count)
+        return _checked_tree(cls, opcodes, _native(literals, 'd'), _native(variable_refs, 'I'), operators, variables)
+
+    @classmethod
+    def load(cls, path) -> "FlatOperationTree":
+        '''Memory-maps a file written by write and reads the tree in it in place, like from_buffer.  The mapping
+        stays open for as long as the tree is referenced.
+        '''
+        with open(path, "rb") as file:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # An empty file can't be mapped.
+                raise InvalidFlatTreeError(f"'{path}' is empty!") from None
+        return cls.from_buffer(mapped)
+
+    def evaluate(self, bindings: dict = None):
+        operator_funcs = OperationEvaluator.OPCODE_FUNCTIONS
+        arities = OperationEvaluator.OPCODE_ARITIES
+        if vectorized.uses_arrays(bindings):
+            operator_funcs = vectorized.UFUNC_FUNCTIONS
+            bindings = vectorized.as_columns(bindings)
+        variable_values = []
+        for name in self._variables:
+            if bindings is None or name not in bindings:
+                raise UnboundVariableError(f"Variable '{name}' has no value!")
+            variable_values.append(bindings[name])
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        literal_index = 0
+        variable_index = 0
+        literals = self._literals
+        variable_refs = self._variable_refs
+        for opcode in self._opcodes:
+            if opcode == LITERAL:
+                push(literals[literal_index])
+                literal_index += 1
+            elif opcode == VARIABLE:
+                push(variable_values[variable_refs[variable_index]])
+                variable_index += 1
+            elif arities[opcode] == 1:
+                push(operator_funcs[opcode](pop()))
+            else:
+                second_operand = pop()
+                push(operator_funcs[opcode](pop(), second_operand))
+        return stack[0]
+
+
+def _little_endian(packed):
+    if _LITTLE_ENDIAN or packed.itemsize == 1:
+        return packed
+    swapped = array(packed.typecode if isinstance(packed, array) else packed.format, packed)
+    swapped.byteswap()
+    return swapped
+
+
+def _native(view: memoryview, typecode: str):
+    if _LITTLE_ENDIAN:
+        return view.cast(typecode)
+    packed = array(typecode)
+    packed.frombytes(view)
+    packed.byteswap()
+    return packed
+
+
+def _read_exactly(file, size: int, allow_end: bool = False) -> bytes:
+    data = file.read(size)
+    while len(data) < size:
+        more = file.read(size - len(data))
+        if not more:
+            if allow_end and not data:
+                return None
+            raise InvalidFlatTreeError("The flat tree is truncated!")
+        data += more
+    return data
+
+
+def _unpack_header(header) -> tuple:
+    fields = _HEADER.unpack(header)
+    if fields[0] != FORMAT_MAGIC:
+        raise InvalidFlatTreeError("Not a flat tree!  The data doesn't start with the format's magic bytes.")
+    if fields[1] != FORMAT_VERSION:
+        raise InvalidFlatTreeError(f"Unsupported flat tree format version {fields[1]}!  Expected {FORMAT_VERSION}.")
+    return fields
+
+
+def _unpack_tables(tables: memoryview, operator_count: int, variable_count: int) -> tuple:
+    # Returns the operators as (opcode, arity, symbol) entries, and the variable names.
+    offset = 0
+    try:
+        operators = []
+        for _ in range(operator_count):
+            opcode, arity, length = _OPERATOR_ENTRY.unpack_from(tables, offset)
+            offset += _OPERATOR_ENTRY.size
+            operators.append((opcode, arity, _decode(tables, offset, length)))
+            offset += length
+        variables = []
+        for _ in range(variable_count):
+            (length,) = _NAME_ENTRY.unpack_from(tables, offset)
+            offset += _NAME_ENTRY.size
+            variables.append(_decode(tables, offset, length))
+            offset += length
+    except struct.error:
+        raise InvalidFlatTreeError("The flat tree's tables are truncated!") from None
+    if offset != len(tables):
+        raise InvalidFlatTreeError("The flat tree's tables don't match its header!")
+    return operators, variables
+
+
+def _decode(tables: memoryview, offset: int, length: int) -> str:
+    if offset + length > len(tables):
+        raise InvalidFlatTreeError("The flat tree's tables are truncated!")
+    try:
+        return str(tables[offset:offset + length], "utf-8")
+    except UnicodeDecodeError:
+        raise InvalidFlatTreeError("The flat tree's tables aren't valid UTF-8!") from None
+
+
+def _checked_tree(cls, opcodes, literals, variable_refs, operators: list, variables: list) -> FlatOperationTree:
+    # Checks that the sections agree with each other and with the reader's registry, at C speed so that a large
+    # tree isn't walked in Python.  Then maps the opcodes of operators that were registered in a different order.
+    counts = Counter(opcodes)
+    arities = {opcode : arity for opcode, arity, _ in operators}
+    unknown_opcodes = counts.keys() - {LITERAL, VARIABLE} - arities.keys()
+    if unknown_opcodes:
+        raise InvalidFlatTreeError(f"The flat tree uses opcode {min(unknown_opcodes)}, which isn't in its operator table!")
+    if counts[LITERAL] != len(literals) or counts[VARIABLE] != len(variable_refs):
+        raise InvalidFlatTreeError("The flat tree's operands don't match its opcodes!")
+    if variable_refs and max(variable_refs) >= len(variables):
+        raise InvalidFlatTreeError("The flat tree refers to a variable that isn't in its table!")
+    # Every operand pushes a value, and every operator pops its operands and pushes its result, leaving one value.
+    if counts[LITERAL] + counts[VARIABLE] - sum(counts[opcode] * (arity - 1) for opcode, arity in arities.items()) != 1:
+        raise InvalidFlatTreeError("The flat tree's opcodes don't make up a single expression!")
+    # The totals can add up with the opcodes out of order, like "+ 1 2", so the stack must also never run out.  Each
+    # opcode is translated to how much it grows the stack, plus one to stay a byte, and the running sum of those
+    # after n opcodes is the stack depth plus n, which must be at least n + 1.
+    growth = bytearray(256)
+    growth[LITERAL] = growth[VARIABLE] = 2
+    for opcode, arity in arities.items():
+        growth[opcode] = 2 - arity
+    if min(map(int.__sub__, accumulate(bytes(opcodes).translate(growth)), count(2))) < 0:
+        raise InvalidFlatTreeError("The flat tree's opcodes use operands before they are calculated!")
+
+    translation = None
+    for stored_opcode, arity, symbol in operators:
+        opcode = OPERATOR_OPCODES.get(symbol)
+        if opcode is None:
+            raise InvalidFlatTreeError(f"The flat tree uses the operator '{symbol}', which isn't registered!")
+        if OperationEvaluator.OPCODE_ARITIES[opcode] != arity:
+            raise InvalidFlatTreeError(f"The flat tree's operator '{symbol}' takes {arity} operands, "
+                                       f"but the registered one takes {OperationEvaluator.OPCODE_ARITIES[opcode]}!")
+        if opcode != stored_opcode:
+            if translation is None:
+                translation = bytearray(range(256))
+            translation[stored_opcode] = opcode
+    if translation is not None:
+        opcodes = array('B', bytes(opcodes).translate(translation))
+    return cls(opcodes, literals, variable_refs, variables)
+
+
+class _FlatBuilder:
+
+    def __init__(self) -> None:
+        self.opcodes = array('B')
+        self.literals = array('d')
+        self.variable_refs = array('I')
+        self.variables = {}
+        self.operator_functions = OperatorTable(self._operator_function)
+
+    def add_operand(self, token: str) -> None:
+        if OperationEvaluator.is_variable(token):
+            self.opcodes.append(VARIABLE)
+            self.variable_refs.append(self.variables.setdefault(token, len(self.variables)))
+        else:
+            self.opcodes.append(LITERAL)
+            self.literals.append(float(token))
+
+    def _operator_function(self, operator: str):
+        # The operands are already in the arrays, in post-fix order, so only the opcode is appended.
+        opcode = OPERATOR_OPCODES[operator]
+        return lambda *operands: self.opcodes.append(opcode)
+
+    def finish(self) -> FlatOperationTree:
+        return FlatOperationTree(self.opcodes, self.literals, self.variable_refs, tuple(self.variables))
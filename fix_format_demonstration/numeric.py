@@ -0,0 +1,136 @@
+'''Numeric backends: what number type literals are read as, and how the operators act on them.
+
+By default the readers and evaluators read every literal with float() and use the operators of
+OperationEvaluator.OPCODE_FUNCTIONS.  Passing numeric= to them, as one of the names in BACKENDS
+or as a NumericBackend, swaps both:
+
+    float      the default behavior
+    int        integer literals stay ints, so sums and products of them are exact however large they get.
+               A division is an int when it comes out exact and a float otherwise, and a power with a
+               negative exponent is a float, as in Python.  Literals with a decimal point or an exponent
+               are floats.
+    decimal    decimal.Decimal, rounded to the current thread's decimal context, or to a given one
+               with decimal_backend(context)
+    fraction   fractions.Fraction, exact for + - * /.  A power with a fractional exponent is a float.
+
+Variables bound to NumPy arrays can only be evaluated with the float backend.
+'''
+import decimal
+from fractions import Fraction
+
+from collections import ChainMap
+
+from .utils import OperationEvaluator, OperatorTable, UnboundVariableError
+
+
+# An int power whose result would have more bits than this is calculated with floats instead, which raises
+# OverflowError like any other float overflow, instead of spending minutes building an enormous int.
+_MAX_POWER_BITS = 1 << 20
+
+
+class NumericBackend:
+    '''literal turns a literal token into a number, and overrides maps the operators that act differently on
+    this backend's numbers to their functions.  The other operators, including the ones registered later, use
+    the registry's functions.  operators maps every operator to its function, and functions every opcode, and
+    both are plain attributes so that the evaluators can look them up once.  A backend is pickled by its name,
+    literal and overrides, to be sent to the workers of parallel.calculate_parallel.
+    '''
+
+    def __init__(self, name: str, literal, overrides: dict = None) -> None:
+        self.name = name
+        self.literal = literal
+        self.overrides = {} if overrides is None else overrides
+        self.operators = ChainMap(self.overrides, OperationEvaluator.OPERATOR_LOOKUP_TABLE)
+        self.functions = OperatorTable(self.operators.__getitem__)
+
+    def __repr__(self) -> str:
+        return f"NumericBackend({self.name!r})"
+
+    def __reduce__(self):
+        return (NumericBackend, (self.name, self.literal, self.overrides))
+
+    def operand_value(self, token: str, bindings: dict = None):
+        '''Like OperationEvaluator.operand_value, with literals read by this backend.
+        '''
+        try:
+            return self.literal(token)
+        except (ValueError, ArithmeticError):
+            # Decimal rejects a malformed literal with decimal.InvalidOperation, which is an ArithmeticError.
+            if not OperationEvaluator.is_variable(token):
+                raise
+        if bindings is None or token not in bindings:
+            raise UnboundVariableError(f"Variable '{token}' has no value!")
+        return bindings[token]
+
+    def evaluate_operator(self, operator: str, first_operand, second_operand=None):
+        if OperationEvaluator.OPCODE_ARITIES[OperationEvaluator.OPCODES[operator]] == 1:
+            return self.operators[operator](first_operand)
+        return self.operators[operator](first_operand, second_operand)
+
+
+def _integer_literal(token: str):
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def _integer_division(first_operand, second_operand):
+    if type(first_operand) is int and type(second_operand) is int and second_operand != 0:
+        quotient, remainder = divmod(first_operand, second_operand)
+        if remainder == 0:
+            return quotient
+    return first_operand / second_operand
+
+
+def _integer_power(first_operand, second_operand):
+    if (type(first_operand) is int and type(second_operand) is int and second_operand > 0
+            and first_operand.bit_length() * second_operand > _MAX_POWER_BITS and abs(first_operand) > 1):
+        return float(first_operand) ** second_operand
+    return first_operand ** second_operand
+
+
+def decimal_backend(context: decimal.Context = None) -> NumericBackend:
+    '''A backend of decimal.Decimal numbers.  Without a context, literals are read exactly and the operators round
+    to the decimal context of the thread that evaluates.  With one, literals and results are rounded to that context.
+    '''
+    if context is None:
+        return NumericBackend("decimal", decimal.Decimal)
+    return NumericBackend("decimal", context.create_decimal, {
+        '+' : context.add,
+        '-' : context.subtract,
+        '*' : context.multiply,
+        '/' : context.divide,
+        '^' : context.power
+    })
+
+
+FLOAT = NumericBackend("float", float)
+INTEGER = NumericBackend("int", _integer_literal, {
+    '/' : _integer_division,
+    '^' : _integer_power
+})
+DECIMAL = decimal_backend()
+FRACTION = NumericBackend("fraction", Fraction)
+
+BACKENDS = {
+    "float" : FLOAT,
+    "int" : INTEGER,
+    "decimal" : DECIMAL,
+    "fraction" : FRACTION
+}
+
+
+def get_backend(numeric) -> NumericBackend:
+    '''Returns the backend for a name in BACKENDS, or numeric itself if it is already a NumericBackend.
+    '''
+    if isinstance(numeric, NumericBackend):
+        return numeric
+    if numeric not in BACKENDS:
+        raise ValueError(f"Unknown numeric backend '{numeric}'!  Expected one of {', '.join(BACKENDS)}.")
+    return BACKENDS[numeric]
+
+
+def check_arrays_supported(backend: NumericBackend) -> None:
+    if backend is not FLOAT:
+        raise ValueError(f"The {backend.name} backend can't evaluate variables bound to NumPy arrays!")
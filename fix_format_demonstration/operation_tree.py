@@ -1,22 +1,66 @@
-from .utils import OperationEvaluator
-from queue import LifoQueue
+import ast
+import keyword
+from itertools import islice
+
+from .utils import OperationEvaluator, UnboundVariableError
+from . import numeric as numeric_backends
+from . import vectorized
 
 
 class OperationTreeNode:
+    # Nodes are allocated once per token, so they do without a per-instance __dict__.
+    # _opcode is the operator's opcode in OperationEvaluator's registry, or None for a leaf, so that the walks
+    # dispatch on it instead of looking the operator string up again.  A unary operator node has no right child.
+    # _cached_value holds the node's value from the last OperationTree.evaluate_incremental, and is only
+    # up to date while _dirty is False.  A dirty node's ancestors are always dirty as well.
+    __slots__ = ("_value", "_opcode", "_parent", "_left_child", "_right_child", "_cached_value", "_dirty")
+
+    # Counts every setLeft and setRight on any node.  A tree remembers the count it was last validated at,
+    # and is only known to still be valid while the count hasn't moved.
+    _mutation_count = 0
     
     def __init__(self, value: str, parent: "OperationTreeNode") -> None:
         self._value = value
+        self._opcode = OperationEvaluator.OPCODES.get(value)
         self._parent = parent
         self._left_child = None
         self._right_child = None
+        self._cached_value = None
+        self._dirty = True
     
+    @classmethod
+    def join(cls, value: str, left_child: "OperationTreeNode", right_child: "OperationTreeNode" = None) -> "OperationTreeNode":
+        '''Creates a node with the given children, or only a left child for a unary operator.  The node is new,
+        so unlike setLeft and setRight, this doesn't change any existing tree and doesn't count as a mutation.
+        '''
+        new_node = cls(value, None)
+        new_node._left_child = left_child
+        new_node._right_child = right_child
+        left_child._parent = new_node
+        if right_child is not None:
+            right_child._parent = new_node
+        return new_node
+
     def setLeft(self, child: "OperationTreeNode") -> None:
         self._left_child = child
         self._left_child._parent = self
+        OperationTreeNode._mutation_count += 1
+        if not self._dirty:
+            self._mark_dirty()
     
     def setRight(self, child: "OperationTreeNode") -> None:
         self._right_child = child
         self._right_child._parent = self
+        OperationTreeNode._mutation_count += 1
+        if not self._dirty:
+            self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        # Stops at the first dirty ancestor, since everything above it is dirty already.
+        cur_node = self
+        while cur_node is not None and not cur_node._dirty:
+            cur_node._dirty = True
+            cur_node = cur_node._parent
 
 
 class OperationTreeEvaluationError(Exception):
@@ -26,79 +70,598 @@ class OperationTreeEvaluationError(Exception):
 
 class OperationTree:
 
-    def __init__(self, root: OperationTreeNode) -> None:
+    def __init__(self, root: OperationTreeNode, shared_subtrees: bool = False, validated: bool = False) -> None:
+        '''shared_subtrees marks a tree whose identical subtrees are shared nodes, making it a DAG.  Shared nodes
+        only keep a _parent pointer to one of their parents, and evaluation computes each of them only once.
+
+        validated marks a tree that is valid by construction, as the readers' trees are, so that evaluating it
+        doesn't walk it to check first.  Any setLeft or setRight afterwards makes the tree get checked again.
+        '''
         self._root = root
+        self._shared_subtrees = shared_subtrees
+        self._validated_at = OperationTreeNode._mutation_count if validated else None
+        # The backend evaluate_incremental cached the nodes' values with.
+        self._incremental_backend = None
     
+    def node_count(self) -> int:
+        '''Returns the number of distinct nodes, so a shared subtree is only counted once.
+        '''
+        count = 0
+        count_stack = [self._root]
+        seen = set() if self._shared_subtrees else None
+        while count_stack:
+            cur_node: OperationTreeNode = count_stack.pop()
+            if seen is not None:
+                if id(cur_node) in seen:
+                    continue
+                seen.add(id(cur_node))
+            count += 1
+            if cur_node._left_child is not None:
+                count_stack.append(cur_node._left_child)
+            if cur_node._right_child is not None:
+                count_stack.append(cur_node._right_child)
+        return count
+
+    def _validate(self) -> bool:
+        # Like is_tree_valid, but free for a tree that is known to be valid and hasn't been mutated since.
+        return self._validated_at == OperationTreeNode._mutation_count or self.is_tree_valid()
+
     def is_tree_valid(self) -> bool:
-        test_queue = LifoQueue()
-        test_queue.put_nowait(self._root)
+        # Read before walking, so that a mutation during the walk still counts as coming after it.
+        mutation_count = OperationTreeNode._mutation_count
+        arities = OperationEvaluator.OPCODE_ARITIES
+        test_stack = [self._root]
 
-        while not test_queue.empty():
-            cur_node: OperationTreeNode = test_queue.get_nowait()
-            if OperationEvaluator.is_operator(cur_node._value):
-                if cur_node._left_child is None or cur_node._right_child is None:
+        while test_stack:
+            cur_node: OperationTreeNode = test_stack.pop()
+            if cur_node._opcode is not None:
+                # A node of an operator that has since been unregistered has no arity, and can't be evaluated.
+                arity = arities[cur_node._opcode]
+                if cur_node._left_child is None or arity is None or (cur_node._right_child is None) != (arity == 1):
                     return False
-                test_queue.put_nowait(cur_node._right_child)
-                test_queue.put_nowait(cur_node._left_child)
+                if cur_node._right_child is not None:
+                    test_stack.append(cur_node._right_child)
+                test_stack.append(cur_node._left_child)
             else:
                 if cur_node._left_child is not None or cur_node._right_child is not None:
                     return False
         
+        self._validated_at = mutation_count
         return True
     
-    def evaluate_tree(self) -> float:
-        if not self.is_tree_valid():
+    def evaluate_tree(self, numeric=None) -> float:
+        '''numeric picks the number type the tree is evaluated with, see the numeric module.
+        '''
+        if not self._validate():
             raise OperationTreeEvaluationError("Tried to evaluate an invalid operation tree!")
-        eval_stack = LifoQueue()
-        eval_stack.put_nowait(self._root)
-
-        operation_stack = LifoQueue()
-        number_stack = LifoQueue()
-
-        while not eval_stack.empty():
-            cur_node: OperationTreeNode = eval_stack.get_nowait()
-            if OperationEvaluator.is_operator(cur_node._value):
-                operation_stack.put_nowait(cur_node._value)
-                eval_stack.put_nowait(cur_node._left_child)
-                eval_stack.put_nowait(cur_node._right_child)
+        functions = OperationEvaluator.OPCODE_FUNCTIONS
+        arities = OperationEvaluator.OPCODE_ARITIES
+        # Without bindings, a variable raises UnboundVariableError.
+        operand_value = OperationEvaluator.operand_value
+        if numeric is not None:
+            backend = numeric_backends.get_backend(numeric)
+            functions = backend.functions
+            operand_value = backend.operand_value
+        if self._shared_subtrees:
+            return self._evaluate_shared(functions, None, operand_value)
+
+        # Holds a node still to be evaluated, or the opcode of a node whose children are being evaluated, to be
+        # applied once they are all on the number stack.  Either way it only holds the right siblings and operators
+        # along the current path, so both stacks stay as deep as the tree rather than as large as it.
+        eval_stack = [self._root]
+        number_stack = []
+
+        while eval_stack:
+            cur_node = eval_stack.pop()
+            if type(cur_node) is int:
+                if arities[cur_node] == 1:
+                    number_stack.append(functions[cur_node](number_stack.pop()))
+                else:
+                    second_operand = number_stack.pop()
+                    number_stack.append(functions[cur_node](number_stack.pop(), second_operand))
+            elif cur_node._opcode is not None:
+                eval_stack.append(cur_node._opcode)
+                if cur_node._right_child is not None:
+                    eval_stack.append(cur_node._right_child)
+                eval_stack.append(cur_node._left_child)
             else:
-                operation_stack.put_nowait(float(cur_node._value))
+                number_stack.append(operand_value(cur_node._value))
         
-        while not operation_stack.empty():
-            operation = operation_stack.get_nowait()
-            if OperationEvaluator.is_operator(operation):
-                # Because of shuffling between stacks, the operand order gets swapped.
-                second_operand = number_stack.get_nowait()
-                first_operand = number_stack.get_nowait()
-                number_stack.put_nowait(OperationEvaluator.evaluate_operator(operation, first_operand, second_operand))
+        return number_stack[0]
+
+    def evaluate(self, bindings: dict = None, numeric=None):
+        '''Evaluates the tree with values for its variables.  If any variable is bound to a NumPy array,
+        the whole tree is evaluated as one vectorized pass over the arrays.  numeric is as for evaluate_tree.
+        '''
+        if not self._validate():
+            raise OperationTreeEvaluationError("Tried to evaluate an invalid operation tree!")
+        functions = OperationEvaluator.OPCODE_FUNCTIONS
+        arities = OperationEvaluator.OPCODE_ARITIES
+        operand_value = OperationEvaluator.operand_value
+        if numeric is not None:
+            backend = numeric_backends.get_backend(numeric)
+            functions = backend.functions
+            operand_value = backend.operand_value
+        if vectorized.uses_arrays(bindings):
+            if numeric is not None:
+                numeric_backends.check_arrays_supported(backend)
+            functions = vectorized.UFUNC_FUNCTIONS
+            bindings = vectorized.as_columns(bindings)
+        if self._shared_subtrees:
+            return self._evaluate_shared(functions, bindings, operand_value)
+
+        value_stack = []
+        # The same walk as evaluate_tree's: an opcode on the stack is applied once all of its children have been.
+        walk_stack = [self._root]
+        while walk_stack:
+            cur_node = walk_stack.pop()
+            if type(cur_node) is int:
+                if arities[cur_node] == 1:
+                    value_stack.append(functions[cur_node](value_stack.pop()))
+                else:
+                    second_operand = value_stack.pop()
+                    value_stack.append(functions[cur_node](value_stack.pop(), second_operand))
+            elif cur_node._opcode is not None:
+                walk_stack.append(cur_node._opcode)
+                if cur_node._right_child is not None:
+                    walk_stack.append(cur_node._right_child)
+                walk_stack.append(cur_node._left_child)
             else:
-                number_stack.put_nowait(operation)
-        
-        return number_stack.get_nowait()
+                value_stack.append(operand_value(cur_node._value, bindings))
+
+        return value_stack[0]
+
+    def _evaluate_shared(self, functions, bindings: dict, operand_value):
+        # Like evaluate, but every node's value is remembered so that a shared subtree is only computed once.
+        # Without bindings, operand_value is only given the token.
+        node_values = {}
+        value_stack = []
+        walk_stack = [(self._root, False)]
+        while walk_stack:
+            cur_node, children_done = walk_stack.pop()
+            if children_done:
+                if cur_node._right_child is None:
+                    value = functions[cur_node._opcode](value_stack.pop())
+                else:
+                    second_operand = value_stack.pop()
+                    value = functions[cur_node._opcode](value_stack.pop(), second_operand)
+            elif id(cur_node) in node_values:
+                value_stack.append(node_values[id(cur_node)])
+                continue
+            elif cur_node._opcode is not None:
+                walk_stack.append((cur_node, True))
+                if cur_node._right_child is not None:
+                    walk_stack.append((cur_node._right_child, False))
+                walk_stack.append((cur_node._left_child, False))
+                continue
+            elif bindings is None:
+                value = operand_value(cur_node._value)
+            else:
+                value = operand_value(cur_node._value, bindings)
+            node_values[id(cur_node)] = value
+            value_stack.append(value)
+
+        return value_stack[0]
     
-    def is_tree_valid_recursive(self) -> bool:
-        return self._is_tree_valid_recursive_helper(self._root)
-
-    def _is_tree_valid_recursive_helper(self, cur_node: OperationTreeNode) -> bool:
-        if OperationEvaluator.is_operator(cur_node._value):
-            if cur_node._left_child is None or not self._is_tree_valid_recursive_helper(cur_node._left_child):
-                return False
-            elif cur_node._right_child is None or not self._is_tree_valid_recursive_helper(cur_node._right_child):
-                return False
+    def update_leaf(self, node: OperationTreeNode, value) -> None:
+        '''Replaces the value of a leaf, and marks only the path from it to the root as needing re-evaluation.
+        value can be a token or a number, which is written as its str(), so that e.g. a NumPy float or a Decimal
+        becomes a literal token.  A value that isn't a literal or a variable is rejected here, rather than when the
+        tree is evaluated.
+        '''
+        if self._shared_subtrees:
+            raise OperationTreeEvaluationError("Can't update a leaf of a tree with shared subtrees!")
+        if node._left_child is not None or node._right_child is not None:
+            raise OperationTreeEvaluationError("Tried to update a node that is not a leaf!")
+        token = value if isinstance(value, str) else str(value)
+        if OperationEvaluator.is_operator(token):
+            raise OperationTreeEvaluationError(f"Can't replace a leaf with the operator '{token}'!")
+        if not OperationEvaluator.is_variable(token):
+            try:
+                float(token)
+            except ValueError:
+                raise OperationTreeEvaluationError(
+                    f"Can't replace a leaf with {value!r}, which is not a number or a variable!") from None
+        node._value = token
+        node._dirty = False
+        node._mark_dirty()
+
+    def invalidate(self) -> None:
+        '''Marks every node as needing re-evaluation, e.g. after the values bound to its variables changed.
+        '''
+        invalidate_stack = [self._root]
+        while invalidate_stack:
+            cur_node: OperationTreeNode = invalidate_stack.pop()
+            cur_node._dirty = True
+            if cur_node._left_child is not None:
+                invalidate_stack.append(cur_node._left_child)
+            if cur_node._right_child is not None:
+                invalidate_stack.append(cur_node._right_child)
+
+    def evaluate_incremental(self, bindings: dict = None, numeric=None):
+        '''Evaluates the tree, reusing the values cached on every node that has not changed since the last call.
+
+        After update_leaf, only the dirty path to the root is recomputed, so the cost is O(depth) rather than
+        O(size).  Only dirty nodes are validated: a clean subtree was valid when it was last evaluated and any
+        change to it since would have made it dirty.  Variables are cached like literals, so after changing the
+        value bound to one, call update_leaf on its leaves or invalidate() the tree.  numeric is as for
+        evaluate_tree; evaluating with another backend than the last call recomputes the whole tree.
+        '''
+        if self._shared_subtrees:
+            raise OperationTreeEvaluationError("Can't incrementally evaluate a tree with shared subtrees!")
+        functions = OperationEvaluator.OPCODE_FUNCTIONS
+        arities = OperationEvaluator.OPCODE_ARITIES
+        operand_value = OperationEvaluator.operand_value
+        backend = None
+        if numeric is not None:
+            backend = numeric_backends.get_backend(numeric)
+            functions = backend.functions
+            operand_value = backend.operand_value
+        if backend is not self._incremental_backend:
+            self.invalidate()
+            self._incremental_backend = backend
+
+        walk_stack = [(self._root, False)]
+        while walk_stack:
+            cur_node, children_done = walk_stack.pop()
+            if children_done:
+                if cur_node._right_child is None:
+                    cur_node._cached_value = functions[cur_node._opcode](cur_node._left_child._cached_value)
+                else:
+                    cur_node._cached_value = functions[cur_node._opcode](cur_node._left_child._cached_value,
+                                                                         cur_node._right_child._cached_value)
+                cur_node._dirty = False
+            elif not cur_node._dirty:
+                continue
+            elif cur_node._opcode is not None:
+                arity = arities[cur_node._opcode]
+                if cur_node._left_child is None or arity is None or (cur_node._right_child is None) != (arity == 1):
+                    raise OperationTreeEvaluationError("Tried to evaluate an invalid operation tree!")
+                walk_stack.append((cur_node, True))
+                if cur_node._right_child is not None:
+                    walk_stack.append((cur_node._right_child, False))
+                walk_stack.append((cur_node._left_child, False))
+            else:
+                if cur_node._left_child is not None or cur_node._right_child is not None:
+                    raise OperationTreeEvaluationError("Tried to evaluate an invalid operation tree!")
+                cur_node._cached_value = operand_value(cur_node._value, bindings)
+                cur_node._dirty = False
+
+        return self._root._cached_value
+
+    def simplify(self, numeric=None) -> "OperationTree":
+        '''Returns a new, smaller tree that evaluates to the same result.
+
+        Subtrees made only of literals are folded into a single literal, unless calculating them raises
+        (e.g. a division by zero), so that the error still happens when the tree is evaluated.  Then the
+        identities x * 1, 1 * x, x / 1, x - 0 and x ^ 1 are replaced by x, which hold for every float including
+        nan, inf and -0.0.  x + 0 and 0 + x are kept, since they turn a -0.0 into 0.0, and e.g. 1 / ( x + 0 )
+        depends on the sign of the zero.
+        Multiplying by zero is only short-circuited when the other operand is made of literals and folds to
+        a finite number; with a variable it is kept, because 0 * inf and 0 * nan are nan.
+
+        numeric is the backend the tree will be evaluated with, as for evaluate_tree, and literals are folded with
+        it.  A folded value that can't be written back as a literal the backend reads exactly, such as the
+        fraction 1/3, leaves its subtree as it was.  Decimals are folded with the current decimal context, and
+        their identities are kept, since e.g. x * 1 rounds x to the context.
+        '''
+        if not self._validate():
+            raise OperationTreeEvaluationError("Tried to simplify an invalid operation tree!")
+        is_variable = OperationEvaluator.is_variable
+        evaluate_operator = OperationEvaluator.evaluate_operator
+        literal = float
+        identities = True
+        if numeric is not None:
+            backend = numeric_backends.get_backend(numeric)
+            evaluate_operator = backend.evaluate_operator
+            literal = backend.literal
+            identities = backend.name != "decimal"
+        # Shared subtrees only need to be simplified once, and stay shared in the new tree.
+        simplified_nodes = {} if self._shared_subtrees else None
+
+        # Each entry is (new node, its constant value or None if it depends on a variable).
+        result_stack = []
+        walk_stack = [(self._root, False)]
+        while walk_stack:
+            cur_node, children_done = walk_stack.pop()
+            if simplified_nodes is not None and not children_done and id(cur_node) in simplified_nodes:
+                result_stack.append(simplified_nodes[id(cur_node)])
+                continue
+            if cur_node._opcode is not None:
+                if not children_done:
+                    walk_stack.append((cur_node, True))
+                    if cur_node._right_child is not None:
+                        walk_stack.append((cur_node._right_child, False))
+                    walk_stack.append((cur_node._left_child, False))
+                    continue
+                right = None if cur_node._right_child is None else result_stack.pop()
+                left = result_stack.pop()
+                result = _simplify_operation(cur_node._value, left, right, evaluate_operator, literal, identities)
+            elif is_variable(cur_node._value):
+                result = (OperationTreeNode(cur_node._value, None), None)
+            else:
+                try:
+                    constant = literal(cur_node._value)
+                except (ValueError, ArithmeticError):
+                    # e.g. Fraction("inf"), which is left for evaluation to raise.
+                    constant = None
+                result = (OperationTreeNode(cur_node._value, None), constant)
+            if simplified_nodes is not None:
+                simplified_nodes[id(cur_node)] = result
+            result_stack.append(result)
+
+        return OperationTree(result_stack[0][0], self._shared_subtrees, validated=True)
+
+    def to_function(self, variables=None):
+        '''Compiles the tree into a Python function that evaluates it, with the operators inlined as Python operators
+        and the literals as constants, so that calling it runs at the speed of the equivalent Python expression.
+
+        The function takes the tree's variables as parameters, in the order of variables if given, or else in the
+        order they first appear.  A variable that is a Python keyword, like None or if, can only be passed by
+        position.  The function is a snapshot: changing the tree afterwards doesn't change the function.
+        '''
+        if not self._validate():
+            raise OperationTreeEvaluationError("Tried to compile an invalid operation tree!")
+        lookup = OperationEvaluator.OPERATOR_LOOKUP_TABLE
+        # Locals and operator functions get names with a '.', like the compiler's own hidden locals,
+        # so they can never clash with a variable, which is always an identifier.
+        namespace = {}
+        statements = []
+        found_variables = {}
+        # A shared subtree is stored in a local the first time, and that local is reused afterwards.
+        shared_locals = {} if self._shared_subtrees else None
+
+        # Post-order walk, building each node's expression along with how deeply nested it is.
+        value_stack = []
+        walk_stack = [(self._root, False)]
+        while walk_stack:
+            cur_node, children_done = walk_stack.pop()
+            if shared_locals is not None and not children_done and id(cur_node) in shared_locals:
+                value_stack.append((ast.Name(shared_locals[id(cur_node)], ast.Load()), 1))
+                continue
+            value = cur_node._value
+            if cur_node._opcode is None:
+                if OperationEvaluator.is_variable(value):
+                    found_variables.setdefault(value, None)
+                    value_stack.append((ast.Name(_parameter_name(value), ast.Load()), 1))
+                else:
+                    value_stack.append((ast.Constant(float(value)), 1))
+                continue
+            if not children_done:
+                walk_stack.append((cur_node, True))
+                if cur_node._right_child is not None:
+                    walk_stack.append((cur_node._right_child, False))
+                walk_stack.append((cur_node._left_child, False))
+                continue
+
+            if cur_node._right_child is None:
+                operands = [value_stack.pop()]
+            else:
+                right = value_stack.pop()
+                operands = [value_stack.pop(), right]
+            if value in _AST_OPERATORS:
+                expression = ast.BinOp(operands[0][0], _AST_OPERATORS[value](), operands[1][0])
+            else:
+                function_name = f".{value}"
+                namespace[function_name] = lookup[value]
+                expression = ast.Call(ast.Name(function_name, ast.Load()), [operand for operand, _ in operands], [])
+            nesting = max(nesting for _, nesting in operands) + 1
+            # Past _MAX_NESTING the expression is stored in a local, so the compiler never recurses deeper than that.
+            if nesting >= _MAX_NESTING or shared_locals is not None:
+                local_name = f".t{len(statements)}"
+                statements.append(ast.Assign([ast.Name(local_name, ast.Store())], expression))
+                expression, nesting = ast.Name(local_name, ast.Load()), 1
+                if shared_locals is not None:
+                    shared_locals[id(cur_node)] = local_name
+            value_stack.append((expression, nesting))
+
+        if variables is None:
+            parameters = list(found_variables)
         else:
-            if cur_node._left_child is not None or cur_node._right_child is not None:
-                return False
-        return True
+            parameters = list(variables)
+            for name in found_variables:
+                if name not in parameters:
+                    raise UnboundVariableError(f"Variable '{name}' has no parameter!")
+
+        statements.append(ast.Return(value_stack[0][0]))
+        function = ast.FunctionDef(
+            name="expression",
+            args=ast.arguments(posonlyargs=[], args=[ast.arg(_parameter_name(name)) for name in parameters], kwonlyargs=[],
+                               kw_defaults=[], defaults=[]),
+            body=statements,
+            decorator_list=[]
+        )
+        try:
+            module = ast.fix_missing_locations(ast.Module([function], type_ignores=[]))
+            code = compile(module, "<operation tree>", "exec")
+        except (RecursionError, MemoryError):
+            return self._interpreted_function(parameters)
+        exec(code, namespace)
+        return namespace["expression"]
+
+    def _interpreted_function(self, parameters: list):
+        # For a tree the compiler can't handle, a function with the same parameters that evaluates a CompiledExpression.
+        # compiled_expression imports this module, so it can't be imported at the top.
+        from .compiled_expression import CompiledExpression
+        compiled = CompiledExpression.from_operation_tree(self)
+
+        def expression(*args, **kwargs):
+            if len(args) > len(parameters):
+                raise TypeError(f"expression() takes {len(parameters)} arguments but {len(args)} were given")
+            bindings = dict(zip(parameters, args))
+            bindings.update(kwargs)
+            return compiled.evaluate(bindings)
+
+        return expression
+
+    def to_infix(self, sep: str = " ", file=None):
+        '''Writes the tree as an in-fix expression, with only the parentheses the order of operations needs.
+        Returns the text, or with a file, writes it to the file in chunks as it is produced and returns None.
+        '''
+        return self._write_tokens(self._infix_tokens(), sep, file)
+
+    def to_prefix(self, sep: str = " ", file=None):
+        '''Writes the tree as a pre-fix expression, returning the text or writing it to file, like to_infix.
+        '''
+        return self._write_tokens(self._prefix_tokens(), sep, file)
+
+    def to_postfix(self, sep: str = " ", file=None):
+        '''Writes the tree as a post-fix expression, returning the text or writing it to file, like to_infix.
+        '''
+        return self._write_tokens(self._postfix_tokens(), sep, file)
+
+    def _write_tokens(self, tokens, sep: str, file):
+        if not self._validate():
+            raise OperationTreeEvaluationError("Tried to write out an invalid operation tree!")
+        if file is None:
+            return sep.join(tokens)
+        chunk = sep.join(islice(tokens, _WRITE_CHUNK_TOKENS))
+        while chunk:
+            file.write(chunk)
+            chunk = sep.join(islice(tokens, _WRITE_CHUNK_TOKENS))
+            if chunk:
+                file.write(sep)
+        return None
+
+    def _infix_tokens(self):
+        compare_operator_order = OperationEvaluator.compare_operator_order
+        orders = OperationEvaluator.OPCODE_ORDERS
+        # Holds nodes still to be written, and the operators and parentheses to write between them.
+        write_stack = [self._root]
+        while write_stack:
+            cur_node = write_stack.pop()
+            if type(cur_node) is str:
+                yield cur_node
+                continue
+            operator = cur_node._value
+            if cur_node._opcode is None:
+                yield operator
+                continue
+            # An operand needs parentheses if, without them, the in-fix reader would group it differently:
+            # the left one if the operator would be performed first, the last one if it wouldn't.  A unary
+            # operator takes everything after it that binds tighter, so as the last operand it needs them if
+            # it binds looser than the operator before it.
+            last_child = cur_node._left_child if cur_node._right_child is None else cur_node._right_child
+            if last_child._opcode is None:
+                needs_parentheses = False
+            elif last_child._right_child is None:
+                needs_parentheses = orders[last_child._opcode] > orders[cur_node._opcode]
+            else:
+                needs_parentheses = compare_operator_order(operator, last_child._value)
+            if needs_parentheses:
+                write_stack.extend((")", last_child, "("))
+            else:
+                write_stack.append(last_child)
+            if cur_node._right_child is None:
+                yield operator
+                continue
+            write_stack.append(operator)
+            left_child = cur_node._left_child
+            if left_child._opcode is not None and not compare_operator_order(left_child._value, operator):
+                write_stack.extend((")", left_child, "("))
+            else:
+                write_stack.append(left_child)
+
+    def _prefix_tokens(self):
+        write_stack = [self._root]
+        while write_stack:
+            cur_node = write_stack.pop()
+            yield cur_node._value
+            if cur_node._right_child is not None:
+                write_stack.append(cur_node._right_child)
+            if cur_node._left_child is not None:
+                write_stack.append(cur_node._left_child)
+
+    def _postfix_tokens(self):
+        # The same walk as evaluate_tree's: an operator on the stack is written once both of its children have been.
+        write_stack = [self._root]
+        while write_stack:
+            cur_node = write_stack.pop()
+            if type(cur_node) is str:
+                yield cur_node
+            elif cur_node._left_child is None:
+                yield cur_node._value
+            else:
+                write_stack.append(cur_node._value)
+                if cur_node._right_child is not None:
+                    write_stack.append(cur_node._right_child)
+                write_stack.append(cur_node._left_child)
+
+    def is_tree_valid_recursive(self) -> bool:
+        '''Kept for callers of the old recursive walk, which overflowed the interpreter's stack on trees more than
+        about a thousand levels deep.  The check is is_tree_valid's.
+        '''
+        return self.is_tree_valid()
+
+    def evaluate_tree_recursive(self, numeric=None) -> float:
+        '''Kept for callers of the old recursive walk, like is_tree_valid_recursive.  The evaluation is evaluate_tree's.
+        '''
+        return self.evaluate_tree(numeric)
+
+
+# How many tokens the to_* writers join into each chunk they write to a file.
+_WRITE_CHUNK_TOKENS = 4096
+
+# The Python operators that to_function writes the built-in operators as; any other operator is called as a function.
+_AST_OPERATORS = {'+' : ast.Add, '-' : ast.Sub, '*' : ast.Mult, '/' : ast.Div, '^' : ast.Pow}
+# The deepest to_function nests expressions before storing one in a local.
+_MAX_NESTING = 64
+
+# For each operator, the constant operands that leave the other operand unchanged, by side.
+_LEFT_IDENTITIES = {'*' : 1.0}
+_RIGHT_IDENTITIES = {'-' : 0.0, '*' : 1.0, '/' : 1.0, '^' : 1.0}
+
+
+def _parameter_name(variable: str) -> str:
+    # A keyword can't be a Python name, so it gets a '.' like to_function's own locals.
+    return f".{variable}" if keyword.iskeyword(variable) else variable
+
+
+def _literal_token(value, literal) -> str:
+    '''Returns a literal token that literal reads back as exactly value, or None if there is none.
+    '''
+    token = repr(value) if type(value) is float else str(value)
+    try:
+        # Every reader has to accept the token, not just this backend, e.g. not "1/3" or "(1+2j)".
+        float(token)
+        read = literal(token)
+    except (ValueError, ArithmeticError, TypeError):
+        return None
+    if type(read) is not type(value) or (repr(read) if type(read) is float else str(read)) != token:
+        return None
+    return token
+
+
+def _simplify_operation(operator: str, left: tuple, right: tuple = None, evaluate_operator=None, literal=float,
+                        identities: bool = True) -> tuple:
+    # right is None for a unary operator.
+    if evaluate_operator is None:
+        evaluate_operator = OperationEvaluator.evaluate_operator
+    left_node, left_constant = left
+    right_node, right_constant = (None, None) if right is None else right
+
+    if left_constant is not None and (right is None or right_constant is not None):
+        try:
+            value = evaluate_operator(operator, left_constant, right_constant)
+        except (ArithmeticError, ValueError, TypeError):
+            # e.g. a division by zero, or a registered math.sqrt of a negative number.
+            value = None
+        # Powers of negative numbers can come out complex, and fractions like 1/3 have no literal; those are left
+        # for evaluation to produce.  Their value is still kept, so that e.g. 1 / 3 * 3 folds to 1.
+        token = None if value is None else _literal_token(value, literal)
+        if token is not None:
+            return OperationTreeNode(token, None), value
+        if value is not None:
+            return OperationTreeNode.join(operator, left_node, right_node), value
+
+    # Only a constant written as a literal is an identity: a kept complex 1+0j still makes x * ( 1+0j ) complex.
+    if identities:
+        if right_constant is not None and right_node._opcode is None and \
+                right_constant == _RIGHT_IDENTITIES.get(operator):
+            return left
+        if left_constant is not None and left_node._opcode is None and \
+                left_constant == _LEFT_IDENTITIES.get(operator):
+            return right
+
+    return OperationTreeNode.join(operator, left_node, right_node), None
 
-    def evaluate_tree_recursive(self) -> float:
-        if not self.is_tree_valid_recursive():
-            raise OperationTreeEvaluationError("Tried to evaluate an invalid operation tree!")
-        return self._evaluate_tree_recursive_helper(self._root)
-    
-    def _evaluate_tree_recursive_helper(self, cur_node: OperationTreeNode) -> float:
-        if OperationEvaluator.is_operator(cur_node._value):
-            first_operand = self._evaluate_tree_recursive_helper(cur_node._left_child)
-            second_operand = self._evaluate_tree_recursive_helper(cur_node._right_child)
-            return OperationEvaluator.evaluate_operator(cur_node._value, first_operand, second_operand)
-        
-        return float(cur_node._value)
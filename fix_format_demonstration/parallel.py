@@ -0,0 +1,115 @@
+'''Batch evaluation spread across a pool of worker processes.
+
+The readers are pure Python, so a single process only ever keeps one core busy.
+calculate_parallel cuts the input into chunks, sends each chunk to a worker process
+as one task (so the pickling overhead is paid per chunk rather than per expression),
+and yields the results back in input order.  Only a bounded window of chunks is in
+flight at once, so the input can be a generator far larger than memory.
+
+Workers are started with the multiprocessing start method of the platform; on
+platforms that spawn workers the caller's script needs the usual
+``if __name__ == '__main__':`` guard.
+'''
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from . import fix_format_readers
+from . import numeric as numeric_backends
+from .operation_tree import OperationTreeEvaluationError
+
+
+def _calculate_chunk(equations: list, notation: str, sep: str, bindings: dict, numeric, cache) -> list:
+    results = list(fix_format_readers.calculate_many(equations, notation, sep, "return", bindings, cache, numeric))
+    if cache is not None:
+        # The worker's copy of the cache has its own connection to the file, which is closed with every chunk.
+        cache.close()
+    return results
+
+
+def _evaluate_tree_chunk(equations: list, notation: str, sep: str, bindings: dict, numeric, cache) -> list:
+    results = []
+    for equation in equations:
+        item_notation = notation
+        if notation is None:
+            item_notation, equation = equation
+        # Match the calculators, which treat an empty expression as 0.
+        if len(equation) == 0:
+            results.append(0.0)
+            continue
+        try:
+            if item_notation not in fix_format_readers.TREE_BUILDERS:
+                raise ValueError(f"Unknown notation '{item_notation}'!  Expected one of {', '.join(fix_format_readers.TREE_BUILDERS)}.")
+            tree = fix_format_readers.TREE_BUILDERS[item_notation](equation, sep, cache)
+            results.append(tree.evaluate_tree(numeric) if bindings is None else tree.evaluate(bindings, numeric))
+        except fix_format_readers.CALCULATION_ERRORS + (OperationTreeEvaluationError,) as error:
+            results.append(error)
+    if cache is not None:
+        cache.close()
+    return results
+
+
+def _chunks(equations, chunksize: int):
+    chunk = []
+    for equation in equations:
+        chunk.append(equation)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def calculate_parallel(equations, notation: str = "infix", sep: str = " ", processes: int = None,
+                       chunksize: int = 1000, on_error="return", bindings: dict = None, use_trees: bool = False,
+                       numeric=None, cache=None):
+    '''Calculate every expression in an iterable on a pool of processes, yielding the results in input order.
+
+    processes defaults to the number of CPUs.  on_error behaves as in fix_format_readers.calculate_many.
+    With use_trees, every expression is built into an OperationTree and evaluated, instead of being calculated directly.
+    If notation is None, every item is a (notation, equation) pair instead, so that notations can be mixed.
+    numeric is a numeric backend or its name, which is sent to the workers along with every chunk.
+    cache is a disk_cache.DiskParseCache, which is sent along too, so that the workers share its file.
+    '''
+    if notation is not None and notation not in fix_format_readers.TREE_BUILDERS:
+        raise ValueError(f"Unknown notation '{notation}'!  Expected one of {', '.join(fix_format_readers.TREE_BUILDERS)}.")
+    if on_error not in ("return", "skip", "raise") and not callable(on_error):
+        raise ValueError(f"Unknown on_error '{on_error}'!  Expected 'return', 'skip', 'raise' or a callable.")
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1!")
+    if numeric is not None:
+        numeric = numeric_backends.get_backend(numeric)
+
+    processes = processes or os.cpu_count() or 1
+    worker = _evaluate_tree_chunk if use_trees else _calculate_chunk
+    # Two chunks per process keeps every worker busy while the next chunk is pickled, without reading ahead further.
+    max_in_flight = 2 * processes
+
+    executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        in_flight = deque()
+        for chunk in _chunks(equations, chunksize):
+            in_flight.append((chunk, executor.submit(worker, chunk, notation, sep, bindings, numeric, cache)))
+            if len(in_flight) >= max_in_flight:
+                chunk, future = in_flight.popleft()
+                yield from _handle_errors(chunk, future.result(), on_error, notation)
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            yield from _handle_errors(chunk, future.result(), on_error, notation)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _handle_errors(chunk: list, results: list, on_error, notation: str):
+    if on_error == "return":
+        yield from results
+        return
+    for equation, result in zip(chunk, results):
+        if not isinstance(result, Exception):
+            yield result
+        elif on_error == "raise":
+            raise result
+        elif on_error != "skip":
+            if notation is None:
+                equation = equation[1]
+            yield on_error(equation, result)
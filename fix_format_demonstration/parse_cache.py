@@ -0,0 +1,85 @@
+from collections import OrderedDict
+import threading
+
+from .operation_tree import OperationTree
+
+
+class ParseCache:
+    '''A thread-safe least-recently-used cache of parsed OperationTrees, keyed by (notation, equation, sep).
+
+    The cache holds at most max_entries trees and, if max_nodes is given, at most max_nodes tree nodes in total;
+    the least recently used trees are evicted first.  A tree larger than max_nodes on its own is never stored.
+    Cached trees are shared between every caller that asks for the same expression, so they must not be modified.
+    '''
+
+    def __init__(self, max_entries: int = 1024, max_nodes: int = None) -> None:
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1!")
+        if max_nodes is not None and max_nodes < 1:
+            raise ValueError("max_nodes must be at least 1!")
+        self._max_entries = max_entries
+        self._max_nodes = max_nodes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._node_count = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_build(self, notation: str, equation: str, sep: str, build) -> OperationTree:
+        '''Returns the cached tree for the expression, calling build(equation, sep) to parse it on a miss.
+        '''
+        key = (notation, equation, sep)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # Parse outside of the lock so that other threads are not held up.  Two threads missing on the same
+        # expression both parse it, and the second one to finish replaces the first one's tree.
+        tree = build(equation, sep)
+        self._store(key, tree, tree.node_count() if self._max_nodes is not None else 0)
+        return tree
+
+    def _store(self, key: tuple, tree: OperationTree, node_count: int) -> None:
+        if self._max_nodes is not None and node_count > self._max_nodes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._node_count -= previous[1]
+            self._entries[key] = (tree, node_count)
+            self._node_count += node_count
+            while (self._max_entries is not None and len(self._entries) > self._max_entries) or \
+                  (self._max_nodes is not None and self._node_count > self._max_nodes):
+                _, (_, evicted_nodes) = self._entries.popitem(last=False)
+                self._node_count -= evicted_nodes
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._node_count = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def stats(self) -> dict:
+        '''Returns a snapshot of the cache counters.  node_count is only tracked when max_nodes is set.
+        '''
+        with self._lock:
+            return {
+                "hits" : self._hits,
+                "misses" : self._misses,
+                "evictions" : self._evictions,
+                "entries" : len(self._entries),
+                "node_count" : self._node_count,
+                "max_entries" : self._max_entries,
+                "max_nodes" : self._max_nodes
+            }
@@ -0,0 +1,107 @@
+'''A line protocol for calculating expressions in a long-running process.
+
+Every request is one line made of three tab separated fields:
+
+    notation<TAB>separator<TAB>expression
+
+An empty separator means the expression is scanned, so parts don't need to be separated.  A line with
+no tabs at all is just an expression, calculated with the server's default notation and separator.
+Every request gets exactly one response line, in the order the requests came in:
+
+    ok<TAB>result
+    error<TAB>message
+
+Results are written with repr, so they read back as the exact same float.  A server started with another
+numeric backend writes its results with str instead, e.g. 1/3 for a fraction.
+'''
+from fractions import Fraction
+
+from . import fix_format_readers
+from .parse_cache import ParseCache
+
+
+class ProtocolError(ValueError):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+
+def parse_request(line: str, notation: str = "infix", sep: str = None) -> tuple:
+    '''Splits a request line into (notation, sep, expression), filling in the defaults for a bare expression.
+    '''
+    line = line.rstrip("\r\n")
+    fields = line.split("\t", 2)
+    if len(fields) == 1:
+        return notation, sep, line
+    if len(fields) == 2:
+        raise ProtocolError(f"Request '{line}' needs a notation, a separator and an expression!")
+    notation, sep, equation = fields
+    if notation not in fix_format_readers.CALCULATORS:
+        raise ProtocolError(f"Unknown notation '{notation}'!  Expected one of {', '.join(fix_format_readers.CALCULATORS)}.")
+    return notation, sep or None, equation
+
+
+def format_request(equation: str, notation: str = "infix", sep: str = None) -> str:
+    if "\t" in equation or "\n" in equation or (sep and ("\t" in sep or "\n" in sep)):
+        raise ProtocolError("Expressions and separators can't contain tabs or newlines!")
+    return f"{notation}\t{sep or ''}\t{equation}\n"
+
+
+def format_response(result) -> str:
+    if isinstance(result, Exception):
+        message = str(result) or type(result).__name__
+        return "error\t" + " ".join(message.split()) + "\n"
+    if type(result) is float:
+        return f"ok\t{result!r}\n"
+    return f"ok\t{result}\n"
+
+
+def parse_response(line: str) -> float:
+    '''Returns the result of a response line, raising a ProtocolError with the message of an error response.
+    A fraction result, like 1/3, is returned as a Fraction and any other result as a float.
+    '''
+    status, _, value = line.rstrip("\r\n").partition("\t")
+    if status == "ok":
+        try:
+            return Fraction(value) if "/" in value else float(value)
+        except ValueError:
+            raise ProtocolError(f"Malformed result '{value}'!") from None
+    if status == "error":
+        raise ProtocolError(value)
+    raise ProtocolError(f"Malformed response '{line.rstrip()}'!")
+
+
+class RequestHandler:
+    '''Answers requests one at a time, keeping a parse cache warm between them.
+    '''
+
+    def __init__(self, notation: str = "infix", sep: str = None, cache: ParseCache = None, numeric=None) -> None:
+        '''numeric picks the number type every request is calculated with, see the numeric module.
+        '''
+        self._notation = notation
+        self._sep = sep
+        self._numeric = numeric
+        self._cache = cache if cache is not None else ParseCache()
+
+    @property
+    def cache(self) -> ParseCache:
+        return self._cache
+
+    def handle(self, line: str) -> str:
+        '''Returns the response line for a request line.
+        '''
+        try:
+            notation, sep, equation = parse_request(line, self._notation, self._sep)
+            result = fix_format_readers.CALCULATORS[notation](equation, sep, cache=self._cache, numeric=self._numeric)
+        except fix_format_readers.CALCULATION_ERRORS as error:
+            return format_response(error)
+        return format_response(result)
+
+
+def serve(requests, responses, notation: str = "infix", sep: str = None, cache: ParseCache = None, numeric=None) -> None:
+    '''Answers every request line read from requests, writing each response to responses and flushing it straight away.
+    '''
+    handler = RequestHandler(notation, sep, cache, numeric)
+    # readline rather than iterating, so that no request waits on read-ahead for the lines after it.
+    for line in iter(requests.readline, ""):
+        responses.write(handler.handle(line))
+        responses.flush()
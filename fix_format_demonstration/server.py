@@ -0,0 +1,142 @@
+'''An asyncio service that calculates expressions for other processes, over TCP or a Unix socket.
+
+Requests and responses are lines in the format of the protocol module.  A connection may send any
+number of requests without waiting for the answers; they are answered in the order they were sent.
+Small expressions are calculated right away on the event loop, using a parse cache shared by every
+connection.  Expressions longer than offload_size characters are handed to an executor instead, so
+that one huge expression doesn't hold up every other connection while it is calculated.
+
+Each connection has at most max_pending requests in progress.  Once it has that many, the server stops
+reading from it until the oldest is answered, and it doesn't read further while the client isn't reading
+its responses, so a fast client can't make the server buffer without bound.
+'''
+import asyncio
+
+from . import fix_format_readers
+from . import protocol
+from .parse_cache import ParseCache
+
+
+DEFAULT_PORT = 7357
+DEFAULT_MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+
+def _calculate_response(notation: str, sep: str, equation: str, numeric=None) -> str:
+    # Runs on the executor, which may be another process, so it doesn't share the stacks or the cache.
+    try:
+        result = fix_format_readers.CALCULATORS[notation](equation, sep, numeric=numeric)
+    except fix_format_readers.CALCULATION_ERRORS as error:
+        return protocol.format_response(error)
+    return protocol.format_response(result)
+
+
+class EvaluationServer:
+    '''Answers protocol requests from any number of connections.
+
+    executor defaults to the event loop's thread pool; a ProcessPoolExecutor lets large expressions be
+    calculated on other cores.  numeric is the number type every request is calculated with, as for RequestHandler.
+    '''
+
+    def __init__(self, notation: str = "infix", sep: str = None, cache: ParseCache = None, max_pending: int = 64,
+                 offload_size: int = 4096, executor=None, max_request_size: int = DEFAULT_MAX_REQUEST_SIZE,
+                 numeric=None) -> None:
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1!")
+        self._notation = notation
+        self._sep = sep
+        self._numeric = numeric
+        self._handler = protocol.RequestHandler(notation, sep, cache, numeric)
+        self._max_pending = max_pending
+        self._offload_size = offload_size
+        self._executor = executor
+        self._max_request_size = max_request_size
+        self._connections = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port, limit=self._max_request_size)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        return await asyncio.start_unix_server(self.handle_connection, path, limit=self._max_request_size)
+
+    async def wait_closed(self) -> None:
+        '''Waits until every connection that is open now has been closed by its client and answered in full.
+        '''
+        if self._connections:
+            await asyncio.wait(list(self._connections))
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        connection.add_done_callback(self._connections.discard)
+        pending = asyncio.Queue(self._max_pending)
+        responder = asyncio.create_task(self._respond(pending, writer))
+        try:
+            while not responder.done():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The request is longer than max_request_size; the rest of the stream can't be trusted.
+                    await pending.put(self._answered(protocol.format_response(
+                        protocol.ProtocolError(f"Request is longer than {self._max_request_size} bytes!"))))
+                    break
+                if not line:
+                    break
+                await pending.put(self._submit(line.decode("utf-8", "replace")))
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            responder.cancel()
+            writer.close()
+            raise
+
+        if not responder.done():
+            await pending.put(None)
+        await responder
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def _answered(self, response: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(response)
+        return future
+
+    def _submit(self, line: str) -> asyncio.Future:
+        if len(line) <= self._offload_size:
+            return self._answered(self._handler.handle(line))
+        try:
+            notation, sep, equation = protocol.parse_request(line, self._notation, self._sep)
+        except protocol.ProtocolError as error:
+            return self._answered(protocol.format_response(error))
+        return asyncio.get_running_loop().run_in_executor(self._executor, _calculate_response, notation, sep, equation,
+                                                          self._numeric)
+
+    async def _respond(self, pending: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        connected = True
+        while True:
+            response = await pending.get()
+            if response is None:
+                return
+            # Keep waiting on the answers after a disconnect, so that no executor job is left unawaited.
+            response = await response
+            if not connected:
+                continue
+            try:
+                writer.write(response.encode())
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+
+async def serve_forever(host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: str = None, **server_options) -> None:
+    '''Runs an EvaluationServer on a TCP port, or on a Unix socket if path is given, until cancelled.
+    '''
+    evaluation_server = EvaluationServer(**server_options)
+    if path is not None:
+        server = await evaluation_server.start_unix(path)
+    else:
+        server = await evaluation_server.start(host, port)
+    async with server:
+        await server.serve_forever()
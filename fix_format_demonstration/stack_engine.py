@@ -0,0 +1,263 @@
+'''Shared stack routines behind the fix format readers and the operation tree.
+
+Every stack here is a plain list: items are pushed with append, popped with pop,
+and an empty stack is detected with len() instead of catching queue.Empty.
+LifoQueue takes a lock and notifies a condition on every put and get, which
+cost more than the arithmetic the readers were doing.
+
+The reducers are generic over what an operand is.  make_operand turns a token
+into an operand (a float, a tree node, ...) and operator_functions is indexed
+by opcode, like OperationEvaluator.OPCODE_FUNCTIONS, with functions that
+combine an operator's operands, so the calculators and the tree builders run
+the exact same parsing code.  Every token is resolved to its opcode once, and
+the stacks hold opcodes instead of operator strings.  Errors are raised as error_type with the message
+prefixed by label, which is formatted with the equation only when an error
+actually happens.
+
+A caller that runs many expressions in a row can pass a Scratch, whose stacks
+are emptied and reused by every reducer call instead of allocating new lists.
+'''
+from .utils import OperationEvaluator
+
+
+class Scratch:
+    '''Reusable stacks for the reducers.
+    '''
+    __slots__ = ("operator_stack", "operand_stack")
+
+    def __init__(self) -> None:
+        self.operator_stack = []
+        self.operand_stack = []
+
+    def take(self):
+        # A previous call that raised may have left items behind.
+        del self.operator_stack[:]
+        del self.operand_stack[:]
+        return self.operator_stack, self.operand_stack
+
+
+def _stacks(scratch: Scratch):
+    if scratch is None:
+        return [], []
+    return scratch.take()
+
+
+# Marks an open parenthesis on the operator stack.  It is never an operator's opcode.
+_PARENTHESIS = -1
+
+
+def reduce_infix(tokens, make_operand, operator_functions, error_type, equation: str, label: str = "Expression '{}'",
+                 scratch: Scratch = None):
+    '''A unary operator comes before its operand, and binds it as tightly as its order says, so with '^' binding
+    tighter than 'neg', 'neg 2 ^ 2' is -4.
+    '''
+    opcodes = OperationEvaluator.OPCODES
+    orders = OperationEvaluator.OPCODE_ORDERS
+    right_associative = OperationEvaluator.OPCODE_RIGHT_ASSOCIATIVE
+    arities = OperationEvaluator.OPCODE_ARITIES
+    operator_stack, operand_stack = _stacks(scratch)
+    expecting_number = True
+
+    for token in tokens:
+        opcode = opcodes.get(token)
+        if opcode is not None:
+            if arities[opcode] == 1:
+                # A unary operator waits for its operand, so nothing before it can be performed yet.
+                if not expecting_number:
+                    raise error_type(f"{label.format(equation)} is misformatted!")
+                operator_stack.append(opcode)
+                continue
+            if expecting_number:
+                raise error_type(f"{label.format(equation)} is misformatted!")
+            # Make sure there aren't any operations we have to perform before the current operator 'token'.
+            order = orders[opcode]
+            groups_right = right_associative[opcode]
+            while operator_stack:
+                test_opcode = operator_stack[-1]
+                if test_opcode == _PARENTHESIS:
+                    break
+                test_order = orders[test_opcode]
+                if test_order > order or (test_order == order and groups_right):
+                    break
+                operator_stack.pop()
+                if arities[test_opcode] == 1:
+                    operand_stack.append(operator_functions[test_opcode](operand_stack.pop()))
+                else:
+                    second_operand = operand_stack.pop()
+                    operand_stack.append(operator_functions[test_opcode](operand_stack.pop(), second_operand))
+            operator_stack.append(opcode)
+            expecting_number = True
+        elif token == '(':
+            if not expecting_number:
+                raise error_type(f"{label.format(equation)} is misformatted!")
+            operator_stack.append(_PARENTHESIS)
+        elif token == ')':
+            if expecting_number:
+                raise error_type(f"{label.format(equation)} is misformatted!")
+            if not operator_stack:
+                raise error_type(f"{label.format(equation)} is missing a '('!")
+            test_opcode = operator_stack.pop()
+            while test_opcode != _PARENTHESIS:
+                if arities[test_opcode] == 1:
+                    operand_stack.append(operator_functions[test_opcode](operand_stack.pop()))
+                else:
+                    second_operand = operand_stack.pop()
+                    operand_stack.append(operator_functions[test_opcode](operand_stack.pop(), second_operand))
+                if not operator_stack:
+                    raise error_type(f"{label.format(equation)} is missing a '('!")
+                test_opcode = operator_stack.pop()
+        else:
+            if not expecting_number:
+                raise error_type(f"{label.format(equation)} is misformatted!")
+            operand_stack.append(make_operand(token))
+            expecting_number = False
+
+    while operator_stack:
+        opcode = operator_stack.pop()
+        if opcode == _PARENTHESIS:
+            raise error_type(f"{label.format(equation)} is missing a ')'!")
+        # Only the last operator can be missing its operand, as in '2 +': every other one was followed by one.
+        if len(operand_stack) < arities[opcode]:
+            raise error_type(f"{label.format(equation)} is missing an operand!")
+        if arities[opcode] == 1:
+            operand_stack.append(operator_functions[opcode](operand_stack.pop()))
+        else:
+            second_operand = operand_stack.pop()
+            operand_stack.append(operator_functions[opcode](operand_stack.pop(), second_operand))
+
+    if len(operand_stack) > 1:
+        raise error_type(f"{label.format(equation)} has an extra operand!")
+    if not operand_stack:
+        raise error_type(f"{label.format(equation)} is missing an operand!")
+
+    return operand_stack[0]
+
+
+def reduce_postfix(tokens, make_operand, operator_functions, error_type, equation: str, label: str = "Expression '{}'",
+                  scratch: Scratch = None, require_operator: bool = False):
+    '''With require_operator, an expression that is a lone operand is rejected as having an extra operand.
+    '''
+    opcodes = OperationEvaluator.OPCODES
+    arities = OperationEvaluator.OPCODE_ARITIES
+    _, stack = _stacks(scratch)
+    applied_operator = False
+
+    for token in tokens:
+        opcode = opcodes.get(token)
+        if opcode is not None:
+            if arities[opcode] == 1:
+                if not stack:
+                    raise error_type(f"{label.format(equation)} has a dangling operator!")
+                stack.append(operator_functions[opcode](stack.pop()))
+            else:
+                if len(stack) < 2:
+                    # If we don't have enough operands on the stack, then this is an extra operator.
+                    raise error_type(f"{label.format(equation)} has a dangling operator!")
+                second_operand = stack.pop()
+                stack.append(operator_functions[opcode](stack.pop(), second_operand))
+            applied_operator = True
+        else:
+            stack.append(make_operand(token))
+
+    if len(stack) > 1 or (require_operator and not applied_operator and stack):
+        raise error_type(f"{label.format(equation)} has an extra operand!")
+    if not stack:
+        raise error_type(f"{label.format(equation)} has a dangling operator!")
+
+    return stack[0]
+
+
+def reduce_prefix(tokens, make_operand, operator_functions, error_type, equation: str, label: str = "Expression '{}'",
+                  scratch: Scratch = None):
+    '''tokens must be given in reverse order, e.g. reversed(split_equ).
+    '''
+    # A pre-fix expression read backwards is calculated like a post-fix one, except that the stack
+    # undoes the reversal of the operands, so the first operand is popped before the second.
+    opcodes = OperationEvaluator.OPCODES
+    arities = OperationEvaluator.OPCODE_ARITIES
+    _, stack = _stacks(scratch)
+
+    for token in tokens:
+        opcode = opcodes.get(token)
+        if opcode is not None:
+            if arities[opcode] == 1:
+                if not stack:
+                    raise error_type(f"{label.format(equation)} has a dangling operator!")
+                stack.append(operator_functions[opcode](stack.pop()))
+                continue
+            if len(stack) < 2:
+                raise error_type(f"{label.format(equation)} has a dangling operator!")
+            first_operand = stack.pop()
+            stack.append(operator_functions[opcode](first_operand, stack.pop()))
+        else:
+            stack.append(make_operand(token))
+
+    if len(stack) > 1:
+        raise error_type(f"{label.format(equation)} has an extra operand!")
+    if not stack:
+        raise error_type(f"{label.format(equation)} has a dangling operator!")
+
+    return stack[0]
+
+
+# Stands in for the first operand of an operator that hasn't been read yet.
+_MISSING = object()
+
+
+def reduce_prefix_forward(tokens, make_operand, operator_functions, error_type, equation: str, label: str = "Expression '{}'",
+                          scratch: Scratch = None, require_operator: bool = False):
+    '''Reduces a pre-fix expression read from left to right, so tokens don't have to be reversed first.
+
+    Operators wait on a stack until their operands arrive.  Every finished operand either becomes the first
+    operand of the waiting operator, or completes it, in which case the result is itself a finished operand
+    for the operator below.  Only the waiting operators are stored, so memory is bounded by the nesting depth,
+    and every token is handled once, so the time is linear however deeply the expression is nested.
+    A malformed expression is rejected at the first token that shows it, and the error names that token's
+    position, counting from 1.
+    '''
+    opcodes = OperationEvaluator.OPCODES
+    arities = OperationEvaluator.OPCODE_ARITIES
+    operator_stack, first_operands = _stacks(scratch)
+    operator_positions = []
+    result = _MISSING
+    read_operator = False
+
+    for position, token in enumerate(tokens, start=1):
+        if result is not _MISSING:
+            raise error_type(f"{label.format(equation)} has an extra operand!  "
+                             f"Token {position}, '{token}', comes after the end of the expression.")
+        opcode = opcodes.get(token)
+        if opcode is not None:
+            operator_stack.append(opcode)
+            first_operands.append(_MISSING)
+            operator_positions.append(position)
+            read_operator = True
+            continue
+        operand = make_operand(token)
+        while operator_stack:
+            opcode = operator_stack[-1]
+            if arities[opcode] == 1:
+                operator_stack.pop()
+                first_operands.pop()
+                operator_positions.pop()
+                operand = operator_functions[opcode](operand)
+                continue
+            if first_operands[-1] is _MISSING:
+                first_operands[-1] = operand
+                break
+            operator_stack.pop()
+            operator_positions.pop()
+            operand = operator_functions[opcode](first_operands.pop(), operand)
+        else:
+            result = operand
+
+    if operator_stack:
+        symbol = OperationEvaluator.OPCODE_SYMBOLS[operator_stack[-1]]
+        raise error_type(f"{label.format(equation)} has a dangling operator!  "
+                         f"Token {operator_positions[-1]}, '{symbol}', is missing an operand.")
+    if result is _MISSING:
+        raise error_type(f"{label.format(equation)} has a dangling operator!")
+    if require_operator and not read_operator:
+        raise error_type(f"{label.format(equation)} has an extra operand!")
+
+    return result
@@ -0,0 +1,104 @@
+'''A single pass, character level scanner for expressions written without separators.
+
+scan_tokens reads the expression from left to right and yields one token at a time, so
+tokens can sit right next to each other, as in "4*(5+3)^2", and no list of substrings is
+built up front.  Whitespace between tokens is skipped.
+
+Numbers may use a decimal point and an exponent ("1.5e-3"), and as in float(), single
+underscores between digits ("1_000") and the digits of any script.  A '+' or '-' directly in
+front of a number is its sign when the number can't be an operand of that operator: in
+in-fix, when nothing, an operator or a '(' comes before it ("-2 * 3", "4*-2"), and in
+pre-fix and post-fix, where every operator is its own token, when the sign starts a new
+token ("2 -3 +").  Identifiers are variables, or numbers if float() accepts them ("inf").
+'''
+import re
+
+from .utils import OperationEvaluator
+
+
+# \d matches the decimal digits of every script, which float() reads too.
+_DIGIT_RUN = r"\d(?:_?\d)*"
+_NUMBER = re.compile(rf"(?:{_DIGIT_RUN}(?:\.(?:{_DIGIT_RUN})?)?|\.{_DIGIT_RUN})(?:[eE][+-]?{_DIGIT_RUN})?")
+# Any letter or '_', then letters, digits and '_', in any script, as str.isidentifier allows.
+_IDENTIFIER = re.compile(r"[^\W\d]\w*")
+_WHITESPACE = " \t\r\n\f\v"
+
+
+def _starts_number(char: str) -> bool:
+    return char == '.' or char.isdecimal()
+
+
+class InvalidTokenError(ValueError):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+
+def _symbol_operators() -> list:
+    # Operators spelled with symbols, longest first so that e.g. '//' is matched before '/'.
+    symbols = [operator for operator in OperationEvaluator.OPERATOR_LOOKUP_TABLE if not operator.isidentifier()]
+    return sorted(symbols, key=len, reverse=True)
+
+
+def scan_tokens(equation: str, notation: str = "infix"):
+    symbols = _symbol_operators()
+    is_operator = OperationEvaluator.is_operator
+    infix = notation == "infix"
+    length = len(equation)
+    position = 0
+    # For in-fix, whether the previous token ends an operand, which makes a following '-' an operator.
+    after_operand = False
+
+    while position < length:
+        char = equation[position]
+        if char in _WHITESPACE:
+            position += 1
+            continue
+
+        if char in "+-" and position + 1 < length and _starts_number(equation[position + 1]):
+            if infix:
+                is_sign = not after_operand
+            else:
+                is_sign = position == 0 or equation[position - 1] in _WHITESPACE or equation[position - 1] in "()"
+            if is_sign:
+                match = _NUMBER.match(equation, position + 1)
+                if match is not None:
+                    position = match.end()
+                    after_operand = True
+                    yield char + match.group()
+                    continue
+
+        if _starts_number(char):
+            match = _NUMBER.match(equation, position)
+            if match is None:
+                raise InvalidTokenError(f"Expression '{equation}' has an unexpected '{char}' at position {position}!")
+            position = match.end()
+            after_operand = True
+            yield match.group()
+        elif char == '(' or char == ')':
+            position += 1
+            after_operand = char == ')'
+            yield char
+        elif char.isalpha() or char == '_':
+            match = _IDENTIFIER.match(equation, position)
+            if match is None or not char.isidentifier():
+                raise InvalidTokenError(f"Expression '{equation}' has an unexpected '{char}' at position {position}!")
+            token = match.group()
+            if not token.isidentifier():
+                # \w also matches a few characters that can't continue an identifier, like '²': the token ends
+                # before the first one, which is then reported as unexpected.
+                end = 1
+                while token[:end + 1].isidentifier():
+                    end += 1
+                token = token[:end]
+            position += len(token)
+            after_operand = not is_operator(token)
+            yield token
+        else:
+            for symbol in symbols:
+                if equation.startswith(symbol, position):
+                    position += len(symbol)
+                    after_operand = False
+                    yield symbol
+                    break
+            else:
+                raise InvalidTokenError(f"Expression '{equation}' has an unexpected '{char}' at position {position}!")
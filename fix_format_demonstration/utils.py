@@ -1,3 +1,6 @@
+from types import MappingProxyType
+
+
 class OperatorFuncs:
 
     @classmethod
@@ -21,38 +24,176 @@ class OperatorFuncs:
         return first_operand ** second_operand
 
 
+class UnboundVariableError(Exception):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+
 class OperationEvaluator:
-    OPERATOR_LOOKUP_TABLE = {
-        '+' : OperatorFuncs.addition,
-        '-' : OperatorFuncs.subtraction,
-        '*' : OperatorFuncs.multiplication,
-        '/' : OperatorFuncs.division,
-        '^' : OperatorFuncs.power
-    }
-
-    ORDER_OF_OPERATIONS = {
-        '^' : 0,
-        '*' : 1,
-        '/' : 1,
-        '+' : 2,
-        '-' : 2
-    }
+    '''The registry of operators.  Every operator is given a small integer opcode when it is registered, and the
+    OPCODE_ tables are lists indexed by it, so the readers resolve a token once and the evaluators dispatch with a
+    list index instead of hashing the operator string again at every node.  Opcodes 0 and 1 stand for literals and
+    variables in the flat formats, so operators start at 2, and an unregistered operator's opcode is never reused.
+
+    OPERATOR_LOOKUP_TABLE and ORDER_OF_OPERATIONS map every operator's symbol to its function and its order.  They
+    are read-only, so that operators are only added and removed with register_operator and unregister_operator.
+    '''
+    _OPERATOR_FUNCTIONS = {}
+    _OPERATOR_ORDERS = {}
+    OPERATOR_LOOKUP_TABLE = MappingProxyType(_OPERATOR_FUNCTIONS)
+    ORDER_OF_OPERATIONS = MappingProxyType(_OPERATOR_ORDERS)
+
+    OPCODES = {}
+    OPCODE_SYMBOLS = [None, None]
+    OPCODE_FUNCTIONS = [None, None]
+    OPCODE_ORDERS = [None, None]
+    OPCODE_RIGHT_ASSOCIATIVE = [None, None]
+    OPCODE_ARITIES = [None, None]
+
+    BUILTIN_OPERATORS = ('+', '-', '*', '/', '^')
+    # FlatOperationTree stores every opcode in a byte.
+    MAX_OPCODE = 255
+
+    @classmethod
+    def register_operator(self, symbol: str, function, order: int, associativity: str = "left", arity: int = 2,
+                          ufunc=None) -> int:
+        '''Adds an operator and returns its opcode.  function takes arity operands.  As in ORDER_OF_OPERATIONS,
+        a lower order binds tighter: '^' is 0, '*' and '/' are 1, and '+' and '-' are 2.  An operator of equal
+        order is grouped from the left or from the right by associativity.  A unary operator (arity 1) is written
+        before its operand in in-fix, like 'neg 2', so it needs a symbol of its own instead of reusing '-'.
+        ufunc is the NumPy function used when the operands are arrays, and defaults to function.
+        Opcodes are never reused, so a process can only ever register MAX_OPCODE minus the built-in operators'
+        opcodes, 249 operators, counting the ones unregistered since.  After that this raises ValueError.
+        '''
+        if not isinstance(symbol, str) or not symbol or symbol in ('(', ')') or any(character.isspace() for character in symbol):
+            raise ValueError(f"'{symbol}' can't be an operator!  Operators are non-empty strings without spaces or parentheses.")
+        if symbol in self.OPCODES:
+            raise ValueError(f"Operator '{symbol}' is already registered!")
+        try:
+            float(symbol)
+        except ValueError:
+            pass
+        else:
+            raise ValueError(f"'{symbol}' can't be an operator!  It is a number.")
+        if associativity not in ("left", "right"):
+            raise ValueError(f"Unknown associativity '{associativity}'!  Expected left or right.")
+        if arity not in (1, 2):
+            raise ValueError(f"Operators take 1 or 2 operands, not {arity}!")
+        opcode = len(self.OPCODE_SYMBOLS)
+        if opcode > self.MAX_OPCODE:
+            raise ValueError(f"No opcodes are left for operator '{symbol}'!  Opcodes of unregistered operators aren't reused.")
+
+        self.OPCODES[symbol] = opcode
+        self.OPCODE_SYMBOLS.append(symbol)
+        self.OPCODE_FUNCTIONS.append(function)
+        self.OPCODE_ORDERS.append(order)
+        self.OPCODE_RIGHT_ASSOCIATIVE.append(associativity == "right")
+        self.OPCODE_ARITIES.append(arity)
+        self._OPERATOR_FUNCTIONS[symbol] = function
+        self._OPERATOR_ORDERS[symbol] = order
+
+        from . import vectorized
+        if ufunc is not None:
+            vectorized.UFUNC_LOOKUP_TABLE[symbol] = ufunc
+        elif vectorized.numpy is not None:
+            # The built-in operators' ufuncs are already in the table.
+            vectorized.UFUNC_LOOKUP_TABLE.setdefault(symbol, function)
+        return opcode
+
+    @classmethod
+    def unregister_operator(self, symbol: str) -> None:
+        '''Removes an operator added with register_operator.  Its opcode is retired, not reused.
+        '''
+        if symbol in self.BUILTIN_OPERATORS:
+            raise ValueError(f"The built-in operator '{symbol}' can't be unregistered!")
+        if symbol not in self.OPCODES:
+            raise ValueError(f"Operator '{symbol}' isn't registered!")
+        opcode = self.OPCODES.pop(symbol)
+        self.OPCODE_SYMBOLS[opcode] = None
+        self.OPCODE_FUNCTIONS[opcode] = None
+        self.OPCODE_ORDERS[opcode] = None
+        self.OPCODE_RIGHT_ASSOCIATIVE[opcode] = None
+        self.OPCODE_ARITIES[opcode] = None
+        del self._OPERATOR_FUNCTIONS[symbol]
+        del self._OPERATOR_ORDERS[symbol]
+
+        from . import vectorized
+        vectorized.UFUNC_LOOKUP_TABLE.pop(symbol, None)
+        # Trees that use the operator were valid when they were checked, and have to be checked again.
+        from .operation_tree import OperationTreeNode
+        OperationTreeNode._mutation_count += 1
 
     @classmethod
     def is_operator(self, operator: str):
-        return operator in OperationEvaluator.OPERATOR_LOOKUP_TABLE
+        return operator in OperationEvaluator.OPCODES
+    
+    @classmethod
+    def is_variable(self, token: str) -> bool:
+        '''Variables are identifier tokens, like 'x' or 'rate'.  Identifiers that float() accepts,
+        like 'inf' and 'nan', are still numeric literals.
+        '''
+        if not token.isidentifier():
+            return False
+        try:
+            float(token)
+        except ValueError:
+            return True
+        return False
+
+    @classmethod
+    def operand_value(self, token: str, bindings: dict = None):
+        '''Returns the value of an operand token: the literal as a float, or the bound value of a variable.
+        '''
+        try:
+            return float(token)
+        except ValueError:
+            if not token.isidentifier():
+                raise
+        if bindings is None or token not in bindings:
+            raise UnboundVariableError(f"Variable '{token}' has no value!")
+        return bindings[token]
     
     @classmethod
     def compare_operator_order(self, first_operator, second_operator) -> bool:
         '''Checks if first_operator should be performed before second_operator
         when evaluating an expression. Order of operations is mainly used for
-        expression formats which use parentheses, like in-fix.
+        expression formats which use parentheses, like in-fix.  Between operators
+        of the same order, that depends on second_operator's associativity, so
+        '2 ^ 3 ^ 2' is '2 ^ ( 3 ^ 2 )'.
         '''
-        return self.ORDER_OF_OPERATIONS[first_operator] <= self.ORDER_OF_OPERATIONS[second_operator]
+        # The same tables the in-fix reducer groups by, so that to_infix writes what it reads back.
+        second_opcode = self.OPCODES[second_operator]
+        first_order = self.OPCODE_ORDERS[self.OPCODES[first_operator]]
+        second_order = self.OPCODE_ORDERS[second_opcode]
+        return first_order < second_order or (first_order == second_order and not self.OPCODE_RIGHT_ASSOCIATIVE[second_opcode])
     
     @classmethod
-    def evaluate_operator(self, operator: str, first_operand: float, second_operand: float):
-        if OperationEvaluator.is_operator(operator):
-            return OperationEvaluator.OPERATOR_LOOKUP_TABLE[operator](first_operand, second_operand)
+    def evaluate_operator(self, operator: str, first_operand: float, second_operand: float = None):
+        opcode = OperationEvaluator.OPCODES.get(operator)
+        if opcode is None:
+            return None
+        if OperationEvaluator.OPCODE_ARITIES[opcode] == 1:
+            return OperationEvaluator.OPCODE_FUNCTIONS[opcode](first_operand)
+        return OperationEvaluator.OPCODE_FUNCTIONS[opcode](first_operand, second_operand)
+
+
+class OperatorTable(dict):
+    '''Maps opcodes to make(symbol), calling make the first time each opcode is looked up.  The evaluators use it
+    for the per-operator values that can't live in the OPCODE_ tables, like the tree builders' join functions or a
+    numeric backend's operators, so that operators registered later are picked up without rebuilding anything.
+    '''
+
+    def __init__(self, make) -> None:
+        super().__init__()
+        self._make = make
+
+    def __missing__(self, opcode: int):
+        value = self[opcode] = self._make(OperationEvaluator.OPCODE_SYMBOLS[opcode])
+        return value
+
 
-        return None
+OperationEvaluator.register_operator('+', OperatorFuncs.addition, 2)
+OperationEvaluator.register_operator('-', OperatorFuncs.subtraction, 2)
+OperationEvaluator.register_operator('*', OperatorFuncs.multiplication, 1)
+OperationEvaluator.register_operator('/', OperatorFuncs.division, 1)
+OperationEvaluator.register_operator('^', OperatorFuncs.power, 0, "right")
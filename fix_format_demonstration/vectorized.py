@@ -0,0 +1,45 @@
+'''Optional NumPy support for evaluating an expression over whole columns of data at once.
+
+When any variable is bound to an array, the evaluators swap OPERATOR_LOOKUP_TABLE for
+UFUNC_LOOKUP_TABLE, or OperationEvaluator.OPCODE_FUNCTIONS for UFUNC_FUNCTIONS, so each operator node runs one ufunc over the full column instead of
+the expression being evaluated once per row.  Array values are converted to float64 to
+keep the float semantics of the readers, with the usual NumPy differences: division by
+zero gives inf or nan with a RuntimeWarning instead of raising ZeroDivisionError, and a
+negative base with a fractional exponent gives nan instead of a complex number.
+'''
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .utils import OperatorTable
+
+
+if numpy is not None:
+    UFUNC_LOOKUP_TABLE = {
+        '+' : numpy.add,
+        '-' : numpy.subtract,
+        '*' : numpy.multiply,
+        '/' : numpy.true_divide,
+        '^' : numpy.power
+    }
+else:
+    UFUNC_LOOKUP_TABLE = {}
+
+# register_operator adds every new operator to UFUNC_LOOKUP_TABLE, before it can be looked up here.
+UFUNC_FUNCTIONS = OperatorTable(lambda operator: UFUNC_LOOKUP_TABLE[operator])
+
+
+def uses_arrays(bindings: dict) -> bool:
+    if numpy is None or not bindings:
+        return False
+    return any(isinstance(value, numpy.ndarray) for value in bindings.values())
+
+
+def as_columns(bindings: dict) -> dict:
+    '''Converts every array binding to float64, leaving scalars alone.
+    '''
+    return {
+        name : numpy.asarray(value, dtype=numpy.float64) if isinstance(value, numpy.ndarray) else value
+        for name, value in bindings.items()
+    }
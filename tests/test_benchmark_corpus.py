@@ -0,0 +1,41 @@
+from benchmarks import corpus
+from fix_format_demonstration import fix_format_readers
+import pytest
+
+
+class TestCorpus:
+
+    def test_notations_equivalent(self):
+        for shape in corpus.SHAPES:
+            for seed in range(10):
+                expression = corpus.generate(shape, 40, "+-*", seed, 0.2 * (seed % 3))
+                results = [fix_format_readers.CALCULATORS[notation](expression[notation]) for notation in corpus.NOTATIONS]
+
+                assert results[0] == results[1] == results[2]
+
+    def test_power_grouping(self):
+        for seed in range(20):
+            expression = corpus.generate("random", 6, "^-", seed)
+            try:
+                expected = fix_format_readers.calculate_postfix(expression["postfix"])
+            except ArithmeticError:
+                continue
+
+            assert fix_format_readers.calculate_infix(expression["infix"]) == expected
+
+    def test_depth(self):
+        assert corpus.generate("chain", 500)["depth"] == 500
+        assert corpus.generate("right_chain", 500)["depth"] == 500
+        assert corpus.generate("balanced", 512)["depth"] == 10
+        assert corpus.generate("random", 500)["depth"] < 500
+
+    def test_right_chain_parentheses(self):
+        expression = corpus.generate("right_chain", 4, "-")
+
+        assert expression["infix"].count("(") == 2
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            corpus.generate("zigzag", 10)
+        with pytest.raises(ValueError):
+            corpus.generate("chain", 1)
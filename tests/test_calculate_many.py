@@ -0,0 +1,77 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.utils import UnboundVariableError
+import pytest
+
+
+class TestCalculateMany:
+
+    def test_results_in_order(self):
+        equations = ["2 + 3", "2 * ( 3 + 4 )", "1 - 9"]
+
+        assert list(fix_format_readers.calculate_many(equations)) == [5.0, 14.0, -8.0]
+
+    def test_notations(self):
+        assert list(fix_format_readers.calculate_many(["+ 2 3", "* 2 3"], "prefix")) == [5.0, 6.0]
+        assert list(fix_format_readers.calculate_many(["2,3,+", "2,3,*"], "postfix", ",")) == [5.0, 6.0]
+
+    def test_is_lazy(self):
+        def equations():
+            yield "2 + 3"
+            raise AssertionError("Read past the first expression!")
+
+        results = fix_format_readers.calculate_many(equations())
+
+        assert next(results) == 5.0
+
+    def test_errors_returned(self):
+        results = list(fix_format_readers.calculate_many(["2 + 3", "2 + + 3", "1 / 0", "x + 1", "4"]))
+
+        assert results[0] == 5.0
+        assert isinstance(results[1], fix_format_readers.InvalidInfixExpressionError)
+        assert isinstance(results[2], ZeroDivisionError)
+        assert isinstance(results[3], UnboundVariableError)
+        assert results[4] == 4.0
+
+    def test_errors_skipped(self):
+        results = fix_format_readers.calculate_many(["2 3 +", "2 3 + +", "2 3 *"], "postfix", on_error="skip")
+
+        assert list(results) == [5.0, 6.0]
+
+    def test_errors_raised(self):
+        results = fix_format_readers.calculate_many(["+ 2 3", "+ 2 3 4"], "prefix", on_error="raise")
+
+        assert next(results) == 5.0
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            next(results)
+
+    def test_errors_replaced(self):
+        results = fix_format_readers.calculate_many(["2 + 3", "2 + +"], on_error=lambda equation, error: float("nan"))
+        results = list(results)
+
+        assert results[0] == 5.0
+        assert results[1] != results[1]
+
+    def test_error_after_error_does_not_leak(self):
+        # A failed expression leaves items on the shared stacks; the next one must not see them.
+        results = list(fix_format_readers.calculate_many(["( 1 + ( 2 +", "3"]))
+
+        assert results[1] == 3.0
+
+    def test_bindings(self):
+        results = fix_format_readers.calculate_many(["x + 1", "x * x"], bindings={"x" : 3.0})
+
+        assert list(results) == [4.0, 9.0]
+
+    def test_bad_arguments(self):
+        with pytest.raises(ValueError):
+            next(fix_format_readers.calculate_many(["2 + 3"], "reverse"))
+        with pytest.raises(ValueError):
+            next(fix_format_readers.calculate_many(["2 + 3"], on_error="ignore"))
+
+    def test_mixed_notations(self):
+        equations = [("infix", "2 * ( 3 + 4 )"), ("prefix", "- 9 1"), ("postfix", "2 3 ^"), ("sideways", "2 2")]
+
+        results = list(fix_format_readers.calculate_many(equations, None))
+
+        assert results[:3] == [14.0, 8.0, 8.0]
+        assert isinstance(results[3], ValueError)
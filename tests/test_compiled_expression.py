@@ -0,0 +1,75 @@
+from . import utils
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.compiled_expression import CompiledExpression
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+import pytest
+
+
+class TestCompile:
+
+    def test_all_notations(self):
+        equations = {
+            "infix" : "( 1 / 2 * ( 3 + 4 ) ) - ( 5 * 6 + 7 / 8 )",
+            "prefix" : "- * / 1 2 + 3 4 + * 5 6 / 7 8",
+            "postfix" : "1 2 / 3 4 + * 5 6 * 7 8 / + -"
+        }
+        err = 0.001
+
+        for notation, equation in equations.items():
+            compiled = fix_format_readers.compile(equation, notation)
+            assert compiled.notation == notation
+            assert compiled.equation == equation
+            assert utils.float_within_error(compiled.evaluate(), -27.375, err)
+
+    def test_repeated_evaluation(self):
+        compiled = fix_format_readers.compile("3 * 4 + 2 / 7")
+        first = compiled.evaluate()
+
+        for _ in range(10):
+            assert compiled.evaluate() == first
+
+    def test_single_constant(self):
+        assert fix_format_readers.compile("4", "postfix").evaluate() == 4.0
+
+    def test_separator(self):
+        assert fix_format_readers.compile("2,3,+", "postfix", ",").evaluate() == 5.0
+
+    def test_invalid_expressions(self):
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+            fix_format_readers.compile("2 + + 3")
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            fix_format_readers.compile("2 3 + +", "postfix")
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            fix_format_readers.compile("", "prefix")
+
+    def test_unknown_notation(self):
+        with pytest.raises(ValueError):
+            fix_format_readers.compile("2 + 3", "reverse")
+
+
+class TestCompiledExpression:
+
+    def test_from_operation_tree(self):
+        root = OperationTreeNode("-", None)
+        root.setLeft(OperationTreeNode("2", None))
+        root.setRight(OperationTreeNode("3", None))
+
+        compiled = CompiledExpression.from_operation_tree(OperationTree(root))
+
+        assert len(compiled) == 3
+        assert compiled.evaluate() == -1.0
+
+    def test_invalid_tree(self):
+        root = OperationTreeNode("+", None)
+        root.setLeft(OperationTreeNode("4", None))
+
+        with pytest.raises(OperationTreeEvaluationError):
+            CompiledExpression.from_operation_tree(OperationTree(root))
+
+    def test_immutable(self):
+        compiled = fix_format_readers.compile("2 + 3")
+
+        with pytest.raises(AttributeError):
+            compiled.equation = "4 + 5"
+        with pytest.raises(AttributeError):
+            compiled.cache = {}
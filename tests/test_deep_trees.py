@@ -0,0 +1,81 @@
+from benchmarks import corpus
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.compiled_expression import CompiledExpression
+from fix_format_demonstration.flat_operation_tree import FlatOperationTree
+import pytest
+import tracemalloc
+
+
+DEPTH = 10 ** 6
+
+
+class Discard:
+
+    def write(self, text: str) -> None:
+        pass
+
+
+@pytest.fixture(scope="module", params=["left", "right"])
+def deep_tree(request):
+    # DEPTH additions of 1 to 1, nested to the left or to the right.
+    if request.param == "left":
+        equation = "1" + " 1 +" * DEPTH
+    else:
+        equation = "1 " * DEPTH + "1" + " +" * DEPTH
+    return fix_format_readers.postfix_to_operation_tree(equation)
+
+
+class TestDeepTrees:
+
+    def test_validation(self, deep_tree):
+        assert deep_tree.is_tree_valid() == True
+        assert deep_tree.is_tree_valid_recursive() == True
+        assert deep_tree.node_count() == 2 * DEPTH + 1
+
+    def test_evaluation(self, deep_tree):
+        assert deep_tree.evaluate_tree() == DEPTH + 1
+        assert deep_tree.evaluate_tree_recursive() == DEPTH + 1
+        assert deep_tree.evaluate() == DEPTH + 1
+        deep_tree.invalidate()
+        assert deep_tree.evaluate_incremental() == DEPTH + 1
+
+    def test_simplify(self, deep_tree):
+        assert deep_tree.simplify().evaluate_tree() == DEPTH + 1
+
+    def test_flat_and_compiled(self, deep_tree):
+        flat = FlatOperationTree.from_operation_tree(deep_tree)
+
+        assert flat.evaluate() == DEPTH + 1
+        assert CompiledExpression.from_operation_tree(deep_tree).evaluate() == DEPTH + 1
+
+    def test_readers(self, deep_tree):
+        # The in-fix and post-fix tree builders run the same reducers as their calculators, while the pre-fix
+        # builder reads forwards instead of backwards, so it is tested on its own.
+        for notation, write in [("infix", deep_tree.to_infix), ("prefix", deep_tree.to_prefix), ("postfix", deep_tree.to_postfix)]:
+            assert fix_format_readers.CALCULATORS[notation](write()) == DEPTH + 1
+        assert fix_format_readers.prefix_to_operation_tree(deep_tree.to_prefix()).evaluate_tree() == DEPTH + 1
+
+
+class TestMemoryBoundedByDepth:
+
+    def test_balanced_tree(self):
+        # Depth 17 and about 200,000 nodes: every walk should need a few stack entries per level, not per node.
+        expression = corpus.generate("balanced", 2 ** 16, "+-*", 0)
+        tree = fix_format_readers.postfix_to_operation_tree(expression["postfix"])
+        flat = FlatOperationTree.from_operation_tree(tree)
+        # The first incremental evaluation fills in every node's cached value, which is meant to take O(size).
+        tree.evaluate_incremental()
+        walks = [
+            tree.is_tree_valid, tree.node_count, tree.evaluate_tree, tree.evaluate, tree.invalidate,
+            tree.evaluate_incremental, lambda: tree.to_infix(file=Discard()), lambda: tree.to_prefix(file=Discard()),
+            lambda: tree.to_postfix(file=Discard()), flat.evaluate
+        ]
+
+        for walk in walks:
+            tracemalloc.start()
+            try:
+                walk()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert peak < 64 * 1024
@@ -0,0 +1,195 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.disk_cache import DiskParseCache
+from fix_format_demonstration.parallel import calculate_parallel
+from fix_format_demonstration.utils import OperationEvaluator
+from fractions import Fraction
+import multiprocessing
+import operator
+import pickle
+import pytest
+
+
+def _calculate_in_process(path, start):
+    with DiskParseCache(path, min_length=0) as cache:
+        for i in range(start, start + 200):
+            fix_format_readers.calculate_infix(f"{i % 50} * 2 + 1", cache=cache)
+
+
+class TestDiskParseCache:
+
+    def test_hit_in_another_instance(self, tmp_path):
+        path = tmp_path / "cache.db"
+        with DiskParseCache(path, min_length=0) as cache:
+            assert fix_format_readers.calculate_infix("4 * ( 5 + 3 ) ^ 2", cache=cache) == 256.0
+            assert cache.stats()["misses"] == 1
+
+        with DiskParseCache(path, min_length=0) as cache:
+            tree = fix_format_readers.infix_to_operation_tree("4 * ( 5 + 3 ) ^ 2", cache=cache)
+
+            assert tree.to_prefix() == "* 4 ^ + 5 3 2"
+            assert ("infix", "4 * ( 5 + 3 ) ^ 2", " ") in cache
+            assert ("prefix", "4 * ( 5 + 3 ) ^ 2", " ") not in cache
+            assert cache.stats()["disk_hits"] == 1
+            assert cache.stats()["misses"] == 0
+
+    def test_literals_stay_exact(self, tmp_path):
+        path = tmp_path / "cache.db"
+        equations = ["2 ^ 70 + 1", "0.10 * 3", "1e-400 + 1 / 3", "x + 2.5"]
+        with DiskParseCache(path, min_length=0) as cache:
+            for equation in equations:
+                fix_format_readers.infix_to_operation_tree(equation, cache=cache)
+
+        with DiskParseCache(path, min_length=0) as cache:
+            assert fix_format_readers.calculate_infix("2 ^ 70 + 1", cache=cache, numeric="int") == 2 ** 70 + 1
+            assert fix_format_readers.calculate_infix("1e-400 + 1 / 3", cache=cache, numeric="fraction") == \
+                Fraction("1e-400") + Fraction(1, 3)
+            assert str(fix_format_readers.calculate_infix("0.10 * 3", cache=cache, numeric="decimal")) == "0.30"
+            assert fix_format_readers.calculate_infix("x + 2.5", " ", {"x" : 1.0}, cache=cache) == 3.5
+            assert cache.stats()["disk_hits"] == 4
+
+    def test_results(self, tmp_path):
+        path = tmp_path / "cache.db"
+        with DiskParseCache(path, store_results=True, min_length=0) as cache:
+            assert fix_format_readers.calculate_infix("2 ^ 100", cache=cache, numeric="int") == 2 ** 100
+            assert fix_format_readers.calculate_infix("2 ^ 100", cache=cache) == 2.0 ** 100
+            assert fix_format_readers.calculate_prefix("/ 1 3", cache=cache, numeric="fraction") == Fraction(1, 3)
+            with pytest.raises(ZeroDivisionError):
+                fix_format_readers.calculate_infix("1 / 0", cache=cache)
+
+        with DiskParseCache(path, store_results=True, min_length=0) as cache:
+            int_result = fix_format_readers.calculate_infix("2 ^ 100", cache=cache, numeric="int")
+            float_result = fix_format_readers.calculate_infix("2 ^ 100", cache=cache)
+
+            assert int_result == 2 ** 100 and type(int_result) is int
+            assert float_result == 2.0 ** 100 and type(float_result) is float
+            assert fix_format_readers.calculate_prefix("/ 1 3", cache=cache, numeric="fraction") == Fraction(1, 3)
+            with pytest.raises(ZeroDivisionError):
+                fix_format_readers.calculate_infix("1 / 0", cache=cache)
+            # Decimal results depend on the decimal context, so they are calculated every time.
+            fix_format_readers.calculate_infix("2 ^ 100", cache=cache, numeric="decimal")
+
+            stats = cache.stats()
+            assert stats["result_hits"] == 3
+            assert stats["result_misses"] == 1
+            # Only the failing and the decimal expressions were loaded.
+            assert stats["disk_hits"] == 2
+
+    def test_lru_pruning_by_entries(self, tmp_path):
+        with DiskParseCache(tmp_path / "cache.db", max_entries=2, min_length=0, memory_entries=1) as cache:
+            fix_format_readers.infix_to_operation_tree("1 + 1", cache=cache)
+            fix_format_readers.infix_to_operation_tree("2 + 2", cache=cache)
+            cache.flush()
+            fix_format_readers.infix_to_operation_tree("1 + 1", cache=cache)
+            fix_format_readers.infix_to_operation_tree("3 + 3", cache=cache)
+
+            assert cache.prune() == 1
+            assert len(cache) == 2
+            assert ("infix", "1 + 1", " ") in cache
+            assert ("infix", "2 + 2", " ") not in cache
+            assert ("infix", "3 + 3", " ") in cache
+
+    def test_lru_pruning_by_bytes(self, tmp_path):
+        with DiskParseCache(tmp_path / "cache.db", max_bytes=1000, min_length=0) as cache:
+            for i in range(50):
+                fix_format_readers.infix_to_operation_tree(f"{i} + {i} * {i}", cache=cache)
+            cache.prune()
+
+            stats = cache.stats()
+            assert 0 < stats["bytes"] <= 1000
+            assert stats["pruned"] == 50 - stats["entries"]
+
+    def test_clear(self, tmp_path):
+        with DiskParseCache(tmp_path / "cache.db", store_results=True, min_length=0) as cache:
+            fix_format_readers.calculate_infix("2 + 2", cache=cache)
+            cache.clear()
+
+            assert len(cache) == 0
+            assert fix_format_readers.calculate_infix("2 + 2", cache=cache) == 4.0
+            assert cache.stats()["result_misses"] == 2
+
+    def test_pickles_by_path(self, tmp_path):
+        with DiskParseCache(tmp_path / "cache.db", max_entries=10, store_results=True) as cache:
+            with pickle.loads(pickle.dumps(cache)) as copy:
+                assert copy.path == cache.path
+                assert copy.store_results
+                assert copy._min_length == 64
+                assert copy.stats()["max_entries"] == 10
+
+    def test_processes_share_the_file(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        processes = [multiprocessing.Process(target=_calculate_in_process, args=(path, start)) for start in range(0, 800, 200)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert [process.exitcode for process in processes] == [0] * 4
+        with DiskParseCache(path, min_length=0) as cache:
+            assert len(cache) == 50
+
+    def test_calculate_parallel(self, tmp_path):
+        path = tmp_path / "cache.db"
+        equations = [f"{i % 20} + 1" for i in range(100)]
+
+        for use_trees in (False, True):
+            with DiskParseCache(path, min_length=0) as cache:
+                results = list(calculate_parallel(equations, processes=2, chunksize=10, use_trees=use_trees, cache=cache))
+
+            assert results == [i % 20 + 1.0 for i in range(100)]
+        with DiskParseCache(path, min_length=0) as cache:
+            assert len(cache) == 20
+
+    def test_short_expressions_stay_in_memory(self, tmp_path):
+        with DiskParseCache(tmp_path / "cache.db") as cache:
+            long_equation = " + ".join(["1"] * 200)
+            fix_format_readers.calculate_infix("2 + 2", cache=cache)
+            fix_format_readers.calculate_infix("2 + 2", cache=cache)
+            fix_format_readers.calculate_infix(long_equation, cache=cache)
+
+            assert len(cache) == 1
+            assert ("infix", long_equation, " ") in cache
+            assert cache.stats()["hits"] == 1
+
+    def test_repeats_found_in_memory(self, tmp_path):
+        path = tmp_path / "cache.db"
+        with DiskParseCache(path, min_length=0) as cache:
+            fix_format_readers.calculate_infix("4 * ( 5 + 3 ) ^ 2", cache=cache)
+
+        with DiskParseCache(path, min_length=0) as cache:
+            for _ in range(5):
+                assert fix_format_readers.calculate_infix("4 * ( 5 + 3 ) ^ 2", cache=cache) == 256.0
+
+            stats = cache.stats()
+            assert stats["disk_hits"] == 1
+            assert stats["hits"] == 4
+
+        with DiskParseCache(path, store_results=True, min_length=0) as cache:
+            for _ in range(5):
+                assert fix_format_readers.calculate_infix("4 * ( 5 + 3 ) ^ 2", cache=cache) == 256.0
+
+            stats = cache.stats()
+            assert stats["disk_hits"] == 1
+            assert stats["result_misses"] == 1
+            assert stats["result_hits"] == 4
+
+    def test_shared_trees_stay_in_memory(self, tmp_path):
+        with DiskParseCache(tmp_path / "cache.db", min_length=0) as cache:
+            tree = fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * ( 1 + 2 )", cache=cache, intern_subtrees=True)
+
+            assert tree.evaluate_tree() == 9.0
+            assert len(cache) == 0
+
+    def test_operator_unregistered_since(self, tmp_path):
+        path = tmp_path / "cache.db"
+        OperationEvaluator.register_operator('%', operator.mod, 1)
+        try:
+            with DiskParseCache(path, min_length=0) as cache:
+                assert fix_format_readers.calculate_infix("7 % 4 + 1", cache=cache) == 4.0
+        finally:
+            OperationEvaluator.unregister_operator('%')
+
+        with DiskParseCache(path, min_length=0) as cache:
+            with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+                fix_format_readers.calculate_infix("7 % 4 + 1", cache=cache)
+            with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+                fix_format_readers.infix_to_operation_tree("7 % 4 + 1", cache=cache)
@@ -0,0 +1,63 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration import file_readers
+import io
+import pytest
+
+
+class TestIterFileTokens:
+
+    def test_tokens_across_chunks(self):
+        stream = io.BytesIO(b"12 345 +\n6789 *\n")
+
+        for chunk_size in [1, 2, 3, 5, 100]:
+            stream.seek(0)
+            assert list(file_readers.iter_file_tokens(stream, chunk_size=chunk_size)) == ["12", "345", "+", "6789", "*"]
+
+    def test_separator(self):
+        stream = io.BytesIO(b"12, 345, +,\n6789, *\n")
+
+        for chunk_size in [1, 2, 3, 100]:
+            stream.seek(0)
+            tokens = file_readers.iter_file_tokens(stream, ",", chunk_size)
+            assert list(tokens) == ["12", "345", "+", "6789", "*"]
+
+
+class TestCalculateFiles:
+
+    def test_postfix_path(self, tmp_path):
+        path = tmp_path / "trace.rpn"
+        path.write_text("1 2 / 3 4 + * 5 6 * 7 8 / + -\n")
+
+        assert file_readers.calculate_postfix_file(path) == fix_format_readers.calculate_postfix("1 2 / 3 4 + * 5 6 * 7 8 / + -")
+        assert file_readers.calculate_postfix_file(str(path), chunk_size=3) == -27.375
+
+    def test_prefix_stream(self):
+        stream = io.BytesIO(b"- * / 1 2 + 3 4\n+ * 5 6 / 7 8\n")
+
+        assert file_readers.calculate_prefix_file(stream, chunk_size=4) == -27.375
+
+    def test_long_expression(self, tmp_path):
+        count = 100000
+        path = tmp_path / "long.rpn"
+        with open(path, "w") as file:
+            file.write("1")
+            for _ in range(count - 1):
+                file.write(" 1 +")
+
+        assert file_readers.calculate_postfix_file(path, chunk_size=4096) == count
+
+    def test_empty_file(self):
+        assert file_readers.calculate_postfix_file(io.BytesIO(b"")) == 0.0
+        assert file_readers.calculate_prefix_file(io.BytesIO(b"  \n")) == 0.0
+
+    def test_errors(self):
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            file_readers.calculate_postfix_file(io.BytesIO(b"2 3 + +"))
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            file_readers.calculate_postfix_file(io.BytesIO(b"2 3 + 4"))
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            file_readers.calculate_postfix_file(io.BytesIO(b"4"))
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            file_readers.calculate_prefix_file(io.BytesIO(b"+ 2 3 4"))
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            file_readers.calculate_prefix_file(io.BytesIO(b"+ + 2 3"))
@@ -190,3 +190,24 @@ class TestInfix:
 
         for equation, answer in zip(equation_answer_pairs.keys(), equation_answer_pairs.values()):
             assert utils.float_within_error(fix_format_readers.calculate_infix(equation), answer, err)
+
+
+class TestLongExpressions:
+
+    def test_long_chains(self):
+        count = 5000
+        infix = " + ".join(["1"] * count)
+        postfix = "1 " + " ".join(["1 +"] * (count - 1))
+        prefix = " ".join(["+"] * (count - 1)) + " " + " ".join(["1"] * count)
+
+        assert fix_format_readers.calculate_infix(infix) == count
+        assert fix_format_readers.calculate_postfix(postfix) == count
+        assert fix_format_readers.calculate_prefix(prefix) == count
+
+    def test_error_messages(self):
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError, match="is missing a '\\('!"):
+            fix_format_readers.calculate_infix("2 + 3 )")
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError, match="has a dangling operator!"):
+            fix_format_readers.calculate_postfix("2 3 + +")
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError, match="has an extra operand!"):
+            fix_format_readers.calculate_prefix("+ 2 3 4")
@@ -0,0 +1,170 @@
+from . import utils
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.flat_operation_tree import FlatOperationTree, InvalidFlatTreeError
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+from fix_format_demonstration.utils import OperationEvaluator, UnboundVariableError
+import io
+import operator
+import pytest
+
+
+class TestFlatOperationTree:
+
+    def test_parse_all_notations(self):
+        equations = {
+            "infix" : "( 1 / 2 * ( 3 + 4 ) ) - ( 5 * 6 + 7 / 8 )",
+            "prefix" : "- * / 1 2 + 3 4 + * 5 6 / 7 8",
+            "postfix" : "1 2 / 3 4 + * 5 6 * 7 8 / + -"
+        }
+
+        for notation, equation in equations.items():
+            flat = FlatOperationTree.parse(equation, notation)
+            assert len(flat) == 15
+            assert utils.float_within_error(flat.evaluate(), -27.375, 0.001)
+
+    def test_round_trip(self):
+        tree = fix_format_readers.infix_to_operation_tree("3 * ( 4 + x ) ^ 2 / 7")
+
+        flat = FlatOperationTree.from_operation_tree(tree)
+        rebuilt = flat.to_operation_tree()
+
+        assert rebuilt.node_count() == tree.node_count()
+        assert rebuilt.evaluate({"x" : 2.0}) == tree.evaluate({"x" : 2.0}) == flat.evaluate({"x" : 2.0})
+
+    def test_parse_matches_tree(self):
+        equation = "2 x * y x - /"
+
+        flat = FlatOperationTree.parse(equation, "postfix")
+        tree = fix_format_readers.postfix_to_operation_tree(equation)
+
+        assert flat.variables == ("x", "y")
+        assert flat.evaluate({"x" : 3.0, "y" : 5.0}) == tree.evaluate({"x" : 3.0, "y" : 5.0}) == 3.0
+
+    def test_single_literal(self):
+        flat = FlatOperationTree.parse("4", "postfix")
+
+        assert flat.evaluate() == 4.0
+        assert flat.to_operation_tree().evaluate_tree() == 4.0
+
+    def test_invalid_expressions(self):
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+            FlatOperationTree.parse("2 + ( 3")
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            FlatOperationTree.parse("2 3 + +", "postfix")
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            FlatOperationTree.parse("+ 2 3 4", "prefix")
+
+    def test_invalid_tree(self):
+        root = OperationTreeNode("+", None)
+        root.setLeft(OperationTreeNode("4", None))
+
+        with pytest.raises(OperationTreeEvaluationError):
+            FlatOperationTree.from_operation_tree(OperationTree(root))
+
+    def test_unbound_variable(self):
+        with pytest.raises(UnboundVariableError):
+            FlatOperationTree.parse("x + 1").evaluate()
+
+    def test_smaller_than_linked_tree(self):
+        equation = " + ".join(str(i) for i in range(1000))
+
+        flat = FlatOperationTree.parse(equation)
+
+        # One opcode byte per node plus eight bytes per literal.
+        assert flat.nbytes() == 1999 + 8 * 1000
+        assert flat.evaluate() == sum(range(1000))
+
+    def test_vectorized(self):
+        numpy = pytest.importorskip("numpy")
+        x = numpy.arange(10.0)
+
+        assert numpy.allclose(FlatOperationTree.parse("x * x - 1").evaluate({"x" : x}), x * x - 1)
+
+
+class TestBinaryFormat:
+
+    EQUATIONS = ["4", "3 * ( 4 + x ) ^ 2 / 7", "( rate - 1 ) * ( rate + 1 ) / x", " - ".join(str(i) for i in range(500))]
+
+    def test_round_trip(self):
+        for equation in self.EQUATIONS:
+            tree = fix_format_readers.infix_to_operation_tree(equation)
+            flat = FlatOperationTree.from_operation_tree(tree)
+            bindings = {"x" : 3.0, "rate" : 1.5}
+
+            loaded = FlatOperationTree.from_buffer(flat.to_bytes())
+
+            assert loaded.variables == flat.variables
+            assert loaded.evaluate(bindings) == flat.evaluate(bindings) == tree.evaluate(bindings)
+            assert loaded.to_operation_tree().to_prefix() == flat.to_operation_tree().to_prefix()
+            assert loaded.to_bytes() == flat.to_bytes()
+
+    def test_read_in_place(self):
+        flat = FlatOperationTree.parse("3 * ( 4 + x ) ^ 2 / 7")
+
+        loaded = FlatOperationTree.from_buffer(flat.to_bytes())
+
+        assert all(type(packed) is memoryview for packed in (loaded._opcodes, loaded._literals, loaded._variable_refs))
+        assert loaded.nbytes() == flat.nbytes()
+
+    def test_stream(self):
+        stream = io.BytesIO()
+        for equation in self.EQUATIONS:
+            FlatOperationTree.parse(equation).write(stream)
+        stream.seek(0)
+
+        for equation in self.EQUATIONS:
+            assert FlatOperationTree.read(stream).to_bytes() == FlatOperationTree.parse(equation).to_bytes()
+        assert FlatOperationTree.read(stream) is None
+
+    def test_load(self, tmp_path):
+        path = tmp_path / "tree.fxot"
+        with open(path, "wb") as file:
+            written = FlatOperationTree.parse("3 * ( 4 + x ) ^ 2 / 7").write(file)
+
+        loaded = FlatOperationTree.load(path)
+
+        assert path.stat().st_size == written
+        assert loaded.evaluate({"x" : 2.0}) == 3 * 6 ** 2 / 7
+
+    def test_operators_registered_in_another_order(self):
+        OperationEvaluator.register_operator('%', operator.mod, 1)
+        try:
+            data = FlatOperationTree.parse("7 % 4 + 1").to_bytes()
+        finally:
+            OperationEvaluator.unregister_operator('%')
+
+        with pytest.raises(InvalidFlatTreeError):
+            FlatOperationTree.from_buffer(data)
+
+        OperationEvaluator.register_operator("max", max, 1)
+        OperationEvaluator.register_operator('%', operator.mod, 1)
+        try:
+            loaded = FlatOperationTree.from_buffer(data)
+            assert loaded.evaluate() == 4.0
+            assert loaded.to_operation_tree().to_infix() == "7.0 % 4.0 + 1.0"
+        finally:
+            OperationEvaluator.unregister_operator("max")
+            OperationEvaluator.unregister_operator('%')
+
+    def test_invalid_data(self, tmp_path):
+        data = FlatOperationTree.parse("x + 2 * 3").to_bytes()
+        wrong_count = bytearray(data)
+        # The opcodes come after the header, the two literals and the variable reference.  Turn x into a literal.
+        wrong_count[48 + 16 + 4] = 0
+
+        # The opcodes of "1 + 2" come after the header and the two literals.  Put them in prefix order, so that only
+        # their order is wrong.
+        out_of_order = bytearray(FlatOperationTree.parse("1 + 2").to_bytes())
+        out_of_order[48 + 16 : 48 + 16 + 3] = bytes([OperationEvaluator.OPCODES['+'], 0, 0])
+
+        invalid = [b"", b"FXOT", b"XXXX" + data[4:], data[:4] + b"\x02" + data[5:], data[:-1], data + b"\x00",
+                   bytes(wrong_count), bytes(out_of_order)]
+        for buffer in invalid:
+            with pytest.raises(InvalidFlatTreeError):
+                FlatOperationTree.from_buffer(buffer)
+        with pytest.raises(InvalidFlatTreeError):
+            FlatOperationTree.read(io.BytesIO(data[:-1]))
+
+        (tmp_path / "empty").write_bytes(b"")
+        with pytest.raises(InvalidFlatTreeError):
+            FlatOperationTree.load(tmp_path / "empty")
@@ -0,0 +1,139 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+from fix_format_demonstration.utils import OperationEvaluator
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+
+
+def leaves(tree: OperationTree) -> list:
+    found = []
+    node_stack = [tree._root]
+    while node_stack:
+        cur_node = node_stack.pop()
+        if cur_node._left_child is None:
+            found.append(cur_node)
+        else:
+            node_stack.append(cur_node._right_child)
+            node_stack.append(cur_node._left_child)
+    return found
+
+
+class TestEvaluateIncremental:
+
+    def test_matches_evaluate_tree(self):
+        tree = fix_format_readers.infix_to_operation_tree("( 1 / 2 * ( 3 + 4 ) ) - ( 5 * 6 + 7 / 8 )")
+
+        assert tree.evaluate_incremental() == tree.evaluate_tree()
+        assert tree.evaluate_incremental() == tree.evaluate_tree()
+
+    def test_update_leaf(self):
+        tree = fix_format_readers.infix_to_operation_tree("1 + 2 * 3 - 4")
+        tree.evaluate_incremental()
+
+        tree.update_leaf(leaves(tree)[1], 10)
+
+        assert tree.evaluate_incremental() == 27.0
+        assert tree.evaluate_incremental() == tree.evaluate_tree()
+
+    def test_only_dirty_path_recomputed(self, monkeypatch):
+        calls = []
+        addition_opcode = OperationEvaluator.OPCODES['+']
+        addition = OperationEvaluator.OPCODE_FUNCTIONS[addition_opcode]
+
+        def counting_addition(first_operand, second_operand):
+            calls.append((first_operand, second_operand))
+            return addition(first_operand, second_operand)
+
+        functions = list(OperationEvaluator.OPCODE_FUNCTIONS)
+        functions[addition_opcode] = counting_addition
+        monkeypatch.setattr(OperationEvaluator, "OPCODE_FUNCTIONS", functions)
+        count = 2000
+        tree = fix_format_readers.infix_to_operation_tree(" + ".join(["1"] * count))
+        assert tree.evaluate_incremental() == count
+        assert len(calls) == count - 1
+
+        calls.clear()
+        # The deepest leaf of a left-leaning chain, so every addition is on the dirty path...
+        tree.update_leaf(leaves(tree)[0], 5)
+        assert tree.evaluate_incremental() == count + 4
+        assert len(calls) == count - 1
+
+        calls.clear()
+        # ...and the shallowest one, where only the root is.
+        tree.update_leaf(leaves(tree)[-1], 5)
+        assert tree.evaluate_incremental() == count + 8
+        assert len(calls) == 1
+
+    def test_variables(self):
+        tree = fix_format_readers.infix_to_operation_tree("x * 2 + 1")
+
+        assert tree.evaluate_incremental({"x" : 3.0}) == 7.0
+        tree.invalidate()
+        assert tree.evaluate_incremental({"x" : 4.0}) == 9.0
+
+    def test_structure_change_marks_dirty(self):
+        tree = fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * 3")
+        assert tree.evaluate_incremental() == 9.0
+
+        replacement = OperationTreeNode("-", None)
+        replacement.setLeft(OperationTreeNode("5", None))
+        replacement.setRight(OperationTreeNode("1", None))
+        tree._root.setLeft(replacement)
+
+        assert tree.evaluate_incremental() == 12.0
+
+    def test_invalid_change_detected(self):
+        tree = fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * 3")
+        tree.evaluate_incremental()
+
+        tree._root.setLeft(OperationTreeNode("+", None))
+
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.evaluate_incremental()
+
+    def test_bad_updates(self):
+        tree = fix_format_readers.infix_to_operation_tree("1 + 2")
+
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.update_leaf(tree._root, 3)
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.update_leaf(tree._root._left_child, "*")
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.update_leaf(tree._root._left_child, "2 +")
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.update_leaf(tree._root._left_child, Fraction(1, 3))
+
+        assert tree.evaluate_incremental() == 3.0
+
+    def test_update_with_other_number_types(self):
+        tree = fix_format_readers.infix_to_operation_tree("1 + 2")
+        tree.evaluate_incremental()
+
+        tree.update_leaf(tree._root._left_child, Decimal("1.5"))
+        assert tree.evaluate_incremental() == 3.5
+        tree.update_leaf(tree._root._left_child, 2 ** 60)
+        assert tree._root._left_child._value == str(2 ** 60)
+        assert tree.evaluate_tree(numeric="int") == 2 ** 60 + 2
+
+        numpy = pytest.importorskip("numpy")
+        tree.update_leaf(tree._root._left_child, numpy.float64(2.5))
+        assert tree.evaluate_incremental() == 4.5
+
+    def test_numeric_backends(self):
+        tree = fix_format_readers.infix_to_operation_tree("1 / 3 + x")
+
+        assert tree.evaluate_incremental({"x" : Fraction(1, 6)}, numeric="fraction") == Fraction(1, 2)
+        tree.update_leaf(tree._root._right_child, "1")
+        assert tree.evaluate_incremental(numeric="fraction") == Fraction(4, 3)
+        # Values cached with another backend are recomputed.
+        assert tree.evaluate_incremental() == 1 / 3 + 1
+        assert tree.evaluate_incremental(numeric="decimal") == Decimal(1) / Decimal(3) + 1
+
+    def test_shared_subtrees_rejected(self):
+        tree = fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * ( 1 + 2 )", intern_subtrees=True)
+
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.evaluate_incremental()
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.update_leaf(tree._root._left_child._left_child, 3)
@@ -0,0 +1,123 @@
+from decimal import Decimal, Context
+from fractions import Fraction
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration import numeric
+from fix_format_demonstration import parallel
+from fix_format_demonstration.operation_tree import OperationTree
+from fix_format_demonstration.utils import UnboundVariableError
+import pickle
+import pytest
+
+
+EQUATIONS = {
+    "infix" : "( 1 / 2 * ( 3 + 4 ) ) - ( 5 * 6 + 7 / 8 )",
+    "prefix" : "- * / 1 2 + 3 4 + * 5 6 / 7 8",
+    "postfix" : "1 2 / 3 4 + * 5 6 * 7 8 / + -"
+}
+
+
+class TestIntegerBackend:
+
+    def test_integers_stay_exact(self):
+        result = fix_format_readers.calculate_infix("2 ^ 100 + 1", numeric="int")
+
+        assert type(result) is int
+        assert result == 2 ** 100 + 1
+
+    def test_division(self):
+        assert fix_format_readers.calculate_infix("8 / 2", numeric="int") == 4
+        assert type(fix_format_readers.calculate_infix("8 / 2", numeric="int")) is int
+        assert fix_format_readers.calculate_infix("7 / 2", numeric="int") == 3.5
+        with pytest.raises(ZeroDivisionError):
+            fix_format_readers.calculate_infix("7 / 0", numeric="int")
+
+    def test_float_literals(self):
+        assert fix_format_readers.calculate_infix("1.5 + 1", numeric="int") == 2.5
+        assert fix_format_readers.calculate_infix("2 ^ -1", numeric="int") == 0.5
+
+    def test_huge_power_overflows(self):
+        with pytest.raises(OverflowError):
+            fix_format_readers.calculate_infix("9 ^ ( 9 ^ 9 )", numeric="int")
+
+    def test_all_notations(self):
+        for notation, equation in EQUATIONS.items():
+            assert fix_format_readers.CALCULATORS[notation](equation, numeric="int") == -27.375
+            assert fix_format_readers.TREE_BUILDERS[notation](equation).evaluate_tree("int") == -27.375
+
+
+class TestExactBackends:
+
+    def test_decimal(self):
+        assert fix_format_readers.calculate_infix("0.1 + 0.2", numeric="decimal") == Decimal("0.3")
+        assert fix_format_readers.calculate_postfix("0.1 0.2 +", numeric=numeric.DECIMAL) == Decimal("0.3")
+
+    def test_decimal_context(self):
+        backend = numeric.decimal_backend(Context(prec=5))
+
+        assert fix_format_readers.calculate_infix("1 / 3", numeric=backend) == Decimal("0.33333")
+        assert fix_format_readers.calculate_infix("1.234567 + 0", numeric=backend) == Decimal("1.2346")
+
+    def test_fraction(self):
+        assert fix_format_readers.calculate_infix("1 / 3 + 1 / 6", numeric="fraction") == Fraction(1, 2)
+        assert fix_format_readers.calculate_prefix("* 0.1 3", numeric="fraction") == Fraction(3, 10)
+
+    def test_variables(self):
+        tree = fix_format_readers.infix_to_operation_tree("rate * 3")
+
+        assert tree.evaluate({"rate" : Decimal("0.1")}, "decimal") == Decimal("0.3")
+        assert fix_format_readers.calculate_infix("x / 3", bindings={"x" : Fraction(1, 2)}, numeric="fraction") == Fraction(1, 6)
+        with pytest.raises(UnboundVariableError):
+            fix_format_readers.calculate_infix("x + 1", bindings={}, numeric="decimal")
+        with pytest.raises(ValueError):
+            fix_format_readers.calculate_infix("nan + 1", numeric="fraction")
+
+    def test_shared_subtrees(self):
+        tree = fix_format_readers.infix_to_operation_tree("( 0.1 + 0.2 ) * ( 0.1 + 0.2 )", intern_subtrees=True)
+
+        assert tree.evaluate_tree("decimal") == Decimal("0.09")
+        assert tree.evaluate(None, "fraction") == Fraction(9, 100)
+
+    def test_compiled(self):
+        compiled = fix_format_readers.compile("0.1 + x", numeric="decimal")
+
+        assert compiled.evaluate({"x" : Decimal("0.2")}) == Decimal("0.3")
+
+    def test_arrays_need_float(self):
+        numpy = pytest.importorskip("numpy")
+        x = numpy.arange(3.0)
+
+        with pytest.raises(ValueError):
+            fix_format_readers.calculate_infix("x + 1", bindings={"x" : x}, numeric="decimal")
+        with pytest.raises(ValueError):
+            fix_format_readers.compile("x + 1", numeric="int").evaluate({"x" : x})
+        assert list(fix_format_readers.calculate_infix("x + 1", bindings={"x" : x}, numeric="float")) == [1.0, 2.0, 3.0]
+
+
+class TestBackends:
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            fix_format_readers.calculate_infix("1 + 1", numeric="complex")
+
+    def test_float_matches_default(self):
+        for notation, equation in EQUATIONS.items():
+            assert fix_format_readers.CALCULATORS[notation](equation, numeric="float") == fix_format_readers.CALCULATORS[notation](equation)
+
+    def test_calculate_many(self):
+        results = list(fix_format_readers.calculate_many(["1 / 3", "1 / 0", "2 * 3"], numeric="fraction"))
+
+        assert results[0] == Fraction(1, 3)
+        assert isinstance(results[1], ZeroDivisionError)
+        assert results[2] == 6
+
+    def test_backends_pickle(self):
+        for backend in list(numeric.BACKENDS.values()) + [numeric.decimal_backend(Context(prec=5))]:
+            copy = pickle.loads(pickle.dumps(backend))
+            assert copy.name == backend.name
+            assert copy.evaluate_operator('/', copy.literal("1"), copy.literal("4")) == backend.evaluate_operator('/', backend.literal("1"), backend.literal("4"))
+
+    def test_parallel(self):
+        results = list(parallel.calculate_parallel(["1 / 3", "0.1 + 0.2"], processes=2, chunksize=1,
+                                                   numeric=numeric.decimal_backend(Context(prec=4))))
+
+        assert results == [Decimal("0.3333"), Decimal("0.3")]
@@ -152,6 +152,31 @@ class TestOperationTreeFromPrefix:
         with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
             tree = fix_format_readers.prefix_to_operation_tree(equation)
 
+    def test_extra_operand_at_end_error(self):
+        equation = "+ 2 3 4"
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            tree = fix_format_readers.prefix_to_operation_tree(equation)
+
+    def test_empty_expression_error(self):
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError, match="Empty expression!"):
+            fix_format_readers.prefix_to_operation_tree("")
+
+    def test_error_positions(self):
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError, match="Token 4, '4', comes after"):
+            fix_format_readers.prefix_to_operation_tree("+ 2 3 4 5 6")
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError, match="Token 3, '-', is missing"):
+            fix_format_readers.prefix_to_operation_tree("* 2 - 3")
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError, match="Token 1, '\\+', is missing"):
+            fix_format_readers.prefix_to_operation_tree("+*2 3", None)
+
+    def test_deeply_nested(self):
+        count = 100000
+        left_deep = "+ " * count + " ".join(["1"] * (count + 1))
+        right_deep = "+ 1 " * count + "1"
+
+        assert fix_format_readers.prefix_to_operation_tree(left_deep).evaluate_tree() == count + 1
+        assert fix_format_readers.prefix_to_operation_tree(right_deep).evaluate_tree() == count + 1
+
     def test_multiple_operations(self):
         equation_answer_pairs = {
             "+ + 2 3 4" : 9.0,
@@ -0,0 +1,207 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.compiled_expression import CompiledExpression
+from fix_format_demonstration.flat_operation_tree import FlatOperationTree
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+from fix_format_demonstration.utils import OperationEvaluator
+import math
+import operator
+import random
+import pytest
+
+
+@pytest.fixture
+def extra_operators():
+    OperationEvaluator.register_operator('%', operator.mod, 1)
+    OperationEvaluator.register_operator('//', operator.floordiv, 1)
+    OperationEvaluator.register_operator("max", max, 1)
+    OperationEvaluator.register_operator("neg", operator.neg, 1, arity=1)
+    yield
+    for symbol in ('%', '//', "max", "neg"):
+        OperationEvaluator.unregister_operator(symbol)
+
+
+class TestRegistry:
+
+    def test_builtin_opcodes(self):
+        assert [OperationEvaluator.OPCODES[symbol] for symbol in "+-*/^"] == [2, 3, 4, 5, 6]
+
+    def test_opcodes_are_not_reused(self):
+        first = OperationEvaluator.register_operator('%', operator.mod, 1)
+        OperationEvaluator.unregister_operator('%')
+        second = OperationEvaluator.register_operator('%', operator.mod, 1)
+        OperationEvaluator.unregister_operator('%')
+
+        assert second > first > 6
+        assert not OperationEvaluator.is_operator('%')
+        assert OperationEvaluator.OPCODE_FUNCTIONS[first] is None
+
+    def test_opcodes_run_out(self, monkeypatch):
+        monkeypatch.setattr(OperationEvaluator, "MAX_OPCODE", len(OperationEvaluator.OPCODE_SYMBOLS))
+        OperationEvaluator.register_operator('%', operator.mod, 1)
+        OperationEvaluator.unregister_operator('%')
+
+        with pytest.raises(ValueError):
+            OperationEvaluator.register_operator('%', operator.mod, 1)
+
+    def test_unregistering_invalidates_trees(self):
+        OperationEvaluator.register_operator('%', operator.mod, 1)
+        tree = fix_format_readers.infix_to_operation_tree("7 % 4 + 1")
+        assert tree.evaluate_tree() == 4.0
+        OperationEvaluator.unregister_operator('%')
+
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.evaluate_tree()
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.evaluate()
+
+    def test_symbol_tables_are_read_only(self):
+        with pytest.raises(TypeError):
+            OperationEvaluator.OPERATOR_LOOKUP_TABLE['%'] = operator.mod
+        with pytest.raises(TypeError):
+            OperationEvaluator.ORDER_OF_OPERATIONS['+'] = 0
+
+        OperationEvaluator.register_operator('%', operator.mod, 1)
+        try:
+            assert OperationEvaluator.OPERATOR_LOOKUP_TABLE['%'] is operator.mod
+            assert OperationEvaluator.ORDER_OF_OPERATIONS['%'] == 1
+        finally:
+            OperationEvaluator.unregister_operator('%')
+        assert '%' not in OperationEvaluator.OPERATOR_LOOKUP_TABLE
+
+    def test_invalid_registrations(self):
+        with pytest.raises(ValueError):
+            OperationEvaluator.register_operator('+', operator.add, 2)
+        with pytest.raises(ValueError):
+            OperationEvaluator.register_operator('2', operator.add, 2)
+        with pytest.raises(ValueError):
+            OperationEvaluator.register_operator("inf", operator.add, 2)
+        with pytest.raises(ValueError):
+            OperationEvaluator.register_operator('(', operator.add, 2)
+        with pytest.raises(ValueError):
+            OperationEvaluator.register_operator('%', operator.mod, 1, associativity="up")
+        with pytest.raises(ValueError):
+            OperationEvaluator.register_operator('%', operator.mod, 1, arity=3)
+        with pytest.raises(ValueError):
+            OperationEvaluator.unregister_operator('+')
+        with pytest.raises(ValueError):
+            OperationEvaluator.unregister_operator('%')
+
+        assert not OperationEvaluator.is_operator('%')
+
+    def test_power_groups_to_the_right(self):
+        assert fix_format_readers.calculate_infix("2 ^ 3 ^ 2") == 512.0
+        assert fix_format_readers.calculate_infix("( 2 ^ 3 ) ^ 2") == 64.0
+        assert fix_format_readers.infix_to_operation_tree("2 ^ 3 ^ 2").to_prefix() == "^ 2 ^ 3 2"
+        assert fix_format_readers.infix_to_operation_tree("2 ^ ( 3 ^ 2 )").to_infix() == "2 ^ 3 ^ 2"
+        assert fix_format_readers.infix_to_operation_tree("( 2 ^ 3 ) ^ 2").to_infix() == "( 2 ^ 3 ) ^ 2"
+        assert fix_format_readers.calculate_infix("2 - 3 - 4") == -5.0
+
+
+class TestCustomOperators:
+
+    def test_every_notation(self, extra_operators):
+        equations = {
+            "infix" : "( 7 % 4 max 2 ) // 2",
+            "prefix" : "// max % 7 4 2 2",
+            "postfix" : "7 4 % 2 max 2 //",
+        }
+
+        for notation, equation in equations.items():
+            tree = fix_format_readers.TREE_BUILDERS[notation](equation)
+
+            assert fix_format_readers.CALCULATORS[notation](equation) == 1.0
+            assert fix_format_readers.CALCULATORS[notation](equation, numeric="int") == 1
+            assert tree.evaluate_tree() == tree.evaluate() == tree.evaluate_incremental() == 1.0
+            assert CompiledExpression.from_operation_tree(tree).evaluate() == 1.0
+            assert FlatOperationTree.from_operation_tree(tree).evaluate() == 1.0
+            flat = FlatOperationTree.parse(equation, notation)
+            assert flat.to_operation_tree().to_prefix() == FlatOperationTree.from_operation_tree(tree).to_operation_tree().to_prefix()
+            assert tree.to_function()() == 1.0
+
+    def test_scanned(self, extra_operators):
+        assert fix_format_readers.calculate_infix("7%4//2", sep="") == 1.0
+        assert fix_format_readers.calculate_infix("neg(2+3)*2", sep="") == -10.0
+        assert fix_format_readers.calculate_infix("neg 2 max-3", sep="") == -2.0
+
+    def test_unary(self, extra_operators):
+        assert fix_format_readers.calculate_infix("neg 2 ^ 2") == -4.0
+        assert fix_format_readers.calculate_infix("neg 2 + 3") == 1.0
+        assert fix_format_readers.calculate_infix("2 * neg 3") == -6.0
+        assert fix_format_readers.calculate_infix("neg neg 2") == 2.0
+        assert fix_format_readers.calculate_prefix("+ neg 2 3") == 1.0
+        assert fix_format_readers.calculate_prefix("+ neg 2 3", sep="") == 1.0
+        assert fix_format_readers.calculate_postfix("2 neg 3 +") == 1.0
+
+        tree = fix_format_readers.infix_to_operation_tree("neg ( 2 + x )")
+        assert tree.to_infix() == "neg ( 2 + x )"
+        assert tree.to_prefix() == "neg + 2 x"
+        assert tree.to_postfix() == "2 x + neg"
+        assert tree.evaluate({"x" : 1.0}) == tree.to_function()(1.0) == -3.0
+
+    def test_malformed_unary(self, extra_operators):
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+            fix_format_readers.calculate_infix("2 neg 3")
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+            fix_format_readers.calculate_infix("neg")
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            fix_format_readers.calculate_postfix("neg 2 +")
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            fix_format_readers.calculate_prefix("+ neg 2")
+
+    def test_validation(self, extra_operators):
+        node = OperationTreeNode("neg", None)
+        node.setLeft(OperationTreeNode("2", None))
+        assert OperationTree(node).is_tree_valid()
+
+        node.setRight(OperationTreeNode("3", None))
+        assert not OperationTree(node).is_tree_valid()
+
+    def test_simplify(self, extra_operators):
+        tree = fix_format_readers.infix_to_operation_tree("neg 2 + x * ( 7 % 4 )")
+        simplified = tree.simplify()
+
+        assert simplified.to_infix() == "-2.0 + x * 3.0"
+        assert simplified.evaluate({"x" : 2.0}) == tree.evaluate({"x" : 2.0}) == 4.0
+
+    def test_simplify_skips_folds_that_raise(self):
+        OperationEvaluator.register_operator("sqrt", math.sqrt, 0, arity=1)
+        try:
+            tree = fix_format_readers.infix_to_operation_tree("x + sqrt ( 0 - 4 )").simplify()
+
+            assert tree.to_infix() == "x + sqrt -4.0"
+            with pytest.raises(ValueError):
+                tree.evaluate({"x" : 1.0})
+        finally:
+            OperationEvaluator.unregister_operator("sqrt")
+
+    def test_vectorized(self, extra_operators):
+        numpy = pytest.importorskip("numpy")
+        tree = fix_format_readers.infix_to_operation_tree("neg x % 3")
+        columns = {"x" : numpy.array([1.0, 2.0, 4.0])}
+
+        assert tree.evaluate(columns).tolist() == [2.0, 1.0, 2.0]
+        assert FlatOperationTree.from_operation_tree(tree).evaluate(columns).tolist() == [2.0, 1.0, 2.0]
+        assert CompiledExpression.from_operation_tree(tree).evaluate(columns).tolist() == [2.0, 1.0, 2.0]
+
+    def test_infix_round_trip(self, extra_operators):
+        # "abs" binds looser than every binary operator, and "neg" as tightly as '*', so both need parentheses
+        # in different places.
+        OperationEvaluator.register_operator("abs", abs, 3, arity=1)
+        generator = random.Random(0)
+        binary = ['+', '-', '*', '/', '^', '%', "max"]
+
+        def random_tree(depth):
+            if depth == 0 or generator.random() < 0.2:
+                return OperationTreeNode(str(generator.randint(1, 9)), None)
+            if generator.random() < 0.25:
+                return OperationTreeNode.join(generator.choice(["neg", "abs"]), random_tree(depth - 1))
+            return OperationTreeNode.join(generator.choice(binary), random_tree(depth - 1), random_tree(depth - 1))
+
+        try:
+            for _ in range(500):
+                tree = OperationTree(random_tree(6))
+                text = tree.to_infix()
+
+                assert fix_format_readers.infix_to_operation_tree(text).to_prefix() == tree.to_prefix(), text
+        finally:
+            OperationEvaluator.unregister_operator("abs")
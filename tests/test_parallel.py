@@ -0,0 +1,69 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.parallel import calculate_parallel
+import pytest
+
+
+class TestCalculateParallel:
+
+    def test_results_in_order(self):
+        equations = [f"{i} + {i}" for i in range(500)]
+
+        results = list(calculate_parallel(equations, processes=2, chunksize=7))
+
+        assert results == [2.0 * i for i in range(500)]
+
+    def test_matches_trees(self):
+        equations = [f"- * {i} 2 / {i} 4" for i in range(50)]
+
+        direct = list(calculate_parallel(equations, "prefix", processes=2, chunksize=8))
+        with_trees = list(calculate_parallel(equations, "prefix", processes=2, chunksize=8, use_trees=True))
+
+        assert direct == with_trees == [fix_format_readers.calculate_prefix(equation) for equation in equations]
+
+    def test_errors_returned(self):
+        equations = ["2 3 +", "2 3 + +", "1 0 /", "2 3 *"]
+
+        for use_trees in [False, True]:
+            results = list(calculate_parallel(equations, "postfix", processes=2, chunksize=1, use_trees=use_trees))
+
+            assert results[0] == 5.0
+            assert isinstance(results[1], fix_format_readers.InvalidPostfixExpressionError)
+            assert isinstance(results[2], ZeroDivisionError)
+            assert results[3] == 6.0
+
+    def test_errors_skipped_and_raised(self):
+        equations = ["2 + 3", "2 + +", "2 * 3"]
+
+        assert list(calculate_parallel(equations, processes=2, on_error="skip")) == [5.0, 6.0]
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+            list(calculate_parallel(equations, processes=2, on_error="raise"))
+
+    def test_errors_replaced(self):
+        results = calculate_parallel(["2 + 3", "2 + +"], processes=1, on_error=lambda equation, error: equation)
+
+        assert list(results) == [5.0, "2 + +"]
+
+    def test_bindings(self):
+        results = calculate_parallel(["x + 1", "x * x"], processes=1, bindings={"x" : 3.0}, use_trees=True)
+
+        assert list(results) == [4.0, 9.0]
+
+    def test_bad_arguments(self):
+        with pytest.raises(ValueError):
+            next(calculate_parallel(["2 + 3"], "reverse"))
+        with pytest.raises(ValueError):
+            next(calculate_parallel(["2 + 3"], chunksize=0))
+
+    def test_mixed_notations(self):
+        equations = [("infix", f"{i} - 1") if i % 2 else ("postfix", f"{i} 1 +") for i in range(100)]
+
+        results = list(calculate_parallel(equations, None, processes=2, chunksize=9))
+
+        assert results == [i - 1.0 if i % 2 else i + 1.0 for i in range(100)]
+
+    def test_mixed_notations_on_error(self):
+        equations = [("infix", "1 +"), ("prefix", "+ 1 1")]
+
+        results = list(calculate_parallel(equations, None, processes=2, on_error=lambda equation, error: equation))
+
+        assert results == ["1 +", 2.0]
@@ -0,0 +1,122 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.parse_cache import ParseCache
+import threading
+import pytest
+
+
+class TestParseCache:
+
+    def test_hit_returns_same_tree(self):
+        cache = ParseCache()
+
+        first = fix_format_readers.infix_to_operation_tree("2 + 3", cache=cache)
+        second = fix_format_readers.infix_to_operation_tree("2 + 3", cache=cache)
+
+        assert first is second
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_includes_notation_and_separator(self):
+        cache = ParseCache()
+
+        fix_format_readers.postfix_to_operation_tree("2 3 +", cache=cache)
+        fix_format_readers.prefix_to_operation_tree("+ 2 3", cache=cache)
+        fix_format_readers.postfix_to_operation_tree("2,3,+", ",", cache=cache)
+
+        assert len(cache) == 3
+        assert ("postfix", "2 3 +", " ") in cache
+        assert ("prefix", "+ 2 3", " ") in cache
+        assert ("postfix", "2,3,+", ",") in cache
+
+    def test_lru_eviction_by_entries(self):
+        cache = ParseCache(max_entries=2)
+
+        fix_format_readers.infix_to_operation_tree("1 + 1", cache=cache)
+        fix_format_readers.infix_to_operation_tree("2 + 2", cache=cache)
+        fix_format_readers.infix_to_operation_tree("1 + 1", cache=cache)
+        fix_format_readers.infix_to_operation_tree("3 + 3", cache=cache)
+
+        assert ("infix", "1 + 1", " ") in cache
+        assert ("infix", "2 + 2", " ") not in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_eviction_by_nodes(self):
+        cache = ParseCache(max_entries=None, max_nodes=8)
+
+        fix_format_readers.infix_to_operation_tree("1 + 1", cache=cache)
+        fix_format_readers.infix_to_operation_tree("2 + 2", cache=cache)
+        assert cache.stats()["node_count"] == 6
+        fix_format_readers.infix_to_operation_tree("3 + 3", cache=cache)
+
+        assert len(cache) == 2
+        assert cache.stats()["node_count"] == 6
+        assert ("infix", "1 + 1", " ") not in cache
+
+    def test_oversized_tree_not_stored(self):
+        cache = ParseCache(max_nodes=3)
+
+        tree = fix_format_readers.infix_to_operation_tree("1 + 2 + 3", cache=cache)
+
+        assert tree.evaluate_tree() == 6.0
+        assert len(cache) == 0
+
+    def test_errors_not_cached(self):
+        cache = ParseCache()
+
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+            fix_format_readers.infix_to_operation_tree("2 + +", cache=cache)
+        assert len(cache) == 0
+
+    def test_calculators_share_cache(self):
+        cache = ParseCache()
+
+        assert fix_format_readers.calculate_infix("2 * ( 3 + 4 )", cache=cache) == 14.0
+        assert fix_format_readers.calculate_infix("2 * ( 3 + 4 )", cache=cache) == 14.0
+        assert fix_format_readers.infix_to_operation_tree("2 * ( 3 + 4 )", cache=cache).evaluate_tree() == 14.0
+        assert cache.stats()["hits"] == 2
+        assert fix_format_readers.calculate_prefix("* x 2", bindings={"x" : 4.0}, cache=cache) == 8.0
+
+    def test_cached_calculators_keep_validation(self):
+        cache = ParseCache()
+
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            fix_format_readers.calculate_postfix("4", cache=cache)
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            fix_format_readers.calculate_prefix("4", cache=cache)
+        assert fix_format_readers.calculate_infix("4", cache=cache) == 4.0
+
+    def test_calculate_many(self):
+        cache = ParseCache()
+
+        results = list(fix_format_readers.calculate_many(["2 + 3", "2 + 3", "2 + +"], cache=cache))
+
+        assert results[:2] == [5.0, 5.0]
+        assert cache.stats()["hits"] == 1
+
+    def test_threads(self):
+        cache = ParseCache(max_entries=16)
+        equations = [f"{i} + {i}" for i in range(32)]
+        failures = []
+
+        def work():
+            for _ in range(20):
+                for i, equation in enumerate(equations):
+                    if fix_format_readers.calculate_infix(equation, cache=cache) != 2.0 * i:
+                        failures.append(equation)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert failures == []
+        assert stats["entries"] <= 16
+        assert stats["hits"] + stats["misses"] == 4 * 20 * 32
+
+    def test_bad_limits(self):
+        with pytest.raises(ValueError):
+            ParseCache(max_entries=0)
+        with pytest.raises(ValueError):
+            ParseCache(max_nodes=0)
@@ -0,0 +1,81 @@
+from fix_format_demonstration import protocol
+from fix_format_demonstration.parse_cache import ParseCache
+from fractions import Fraction
+import io
+import pytest
+
+
+class TestRequests:
+
+    def test_parse_request(self):
+        assert protocol.parse_request("prefix\t,\t+,2,2\n") == ("prefix", ",", "+,2,2")
+        assert protocol.parse_request("postfix\t\t2 2 +\n") == ("postfix", None, "2 2 +")
+        assert protocol.parse_request("2 + 2\n", "infix", " ") == ("infix", " ", "2 + 2")
+
+    def test_parse_request_errors(self):
+        with pytest.raises(protocol.ProtocolError):
+            protocol.parse_request("infix\t2 + 2")
+        with pytest.raises(protocol.ProtocolError):
+            protocol.parse_request("sideways\t\t2 + 2")
+
+    def test_round_trip(self):
+        line = protocol.format_request("+ 2 2", "prefix", " ")
+
+        assert protocol.parse_request(line) == ("prefix", " ", "+ 2 2")
+        with pytest.raises(protocol.ProtocolError):
+            protocol.format_request("2\t+ 2")
+
+    def test_responses(self):
+        assert protocol.parse_response(protocol.format_response(0.1 + 0.2)) == 0.1 + 0.2
+        with pytest.raises(protocol.ProtocolError, match="division by zero"):
+            protocol.parse_response(protocol.format_response(ZeroDivisionError("float division by zero")))
+        with pytest.raises(protocol.ProtocolError):
+            protocol.parse_response("maybe\t4\n")
+        assert protocol.format_response(Fraction(1, 3)) == "ok\t1/3\n"
+        assert protocol.parse_response("ok\t1/3\n") == Fraction(1, 3)
+        with pytest.raises(protocol.ProtocolError):
+            protocol.parse_response("ok\tmaybe\n")
+
+
+class TestServe:
+
+    def test_one_response_per_request(self):
+        requests = io.StringIO("infix\t\t4*(5+3)^2\nprefix\t,\t+,2,2\n2 +\npostfix\t \t1 0 /\nbad\t\t1\n\n")
+        responses = io.StringIO()
+
+        protocol.serve(requests, responses)
+
+        lines = responses.getvalue().splitlines()
+        assert lines[:2] == ["ok\t256.0", "ok\t4.0"]
+        assert lines[2].startswith("error\t")
+        assert lines[3] == "error\tfloat division by zero"
+        assert lines[4].startswith("error\tUnknown notation")
+        assert lines[5] == "ok\t0.0"
+
+    def test_non_ascii_identifiers_answered(self):
+        requests = io.StringIO("infix\t\t1 + 1\ninfix\t\té + 1\ninfix\t\tx² + 1\ninfix\t\t2 + 2\n")
+        responses = io.StringIO()
+
+        protocol.serve(requests, responses)
+
+        lines = responses.getvalue().splitlines()
+        assert lines[0] == "ok\t2.0"
+        assert lines[1].startswith("error\t") and lines[2].startswith("error\t")
+        assert lines[3] == "ok\t4.0"
+
+    def test_numeric(self):
+        requests = io.StringIO("1 / 3\n2 ^ 70\n")
+        responses = io.StringIO()
+
+        protocol.serve(requests, responses, numeric="fraction")
+
+        assert responses.getvalue().splitlines() == ["ok\t1/3", f"ok\t{2 ** 70}"]
+
+    def test_cache_stays_warm(self):
+        cache = ParseCache()
+        handler = protocol.RequestHandler(cache=cache)
+
+        for _ in range(3):
+            assert handler.handle("infix\t \t2 * ( 3 + 4 )\n") == "ok\t14.0\n"
+
+        assert cache.stats()["hits"] == 2
@@ -0,0 +1,64 @@
+from benchmarks import corpus
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+import io
+import pytest
+
+
+class TestSerializers:
+
+    def test_minimal_parentheses(self):
+        equations = {
+            "4 * ( 5 + 3 ) ^ 2" : "4 * ( 5 + 3 ) ^ 2",
+            "( ( 4 * 5 ) ) + ( 3 ^ 2 )" : "4 * 5 + 3 ^ 2",
+            "( 1 - 2 ) - 3" : "1 - 2 - 3",
+            "1 - ( 2 - 3 )" : "1 - ( 2 - 3 )",
+            "1 / ( 2 * 3 )" : "1 / ( 2 * 3 )",
+            "( 1 + 2 ) * ( 3 + x )" : "( 1 + 2 ) * ( 3 + x )",
+        }
+
+        for equation, expected in equations.items():
+            assert fix_format_readers.infix_to_operation_tree(equation).to_infix() == expected
+
+    def test_notations(self):
+        tree = fix_format_readers.infix_to_operation_tree("4 * ( 5 + 3 ) ^ 2")
+
+        assert tree.to_prefix() == "* 4 ^ + 5 3 2"
+        assert tree.to_postfix() == "4 5 3 + 2 ^ *"
+        assert tree.to_infix("") == "4*(5+3)^2"
+        assert tree.to_postfix(",") == "4,5,3,+,2,^,*"
+
+    def test_round_trips(self):
+        for shape in corpus.SHAPES:
+            for seed in range(5):
+                expression = corpus.generate(shape, 60, "+-*/^", seed, 0.3)
+                tree = fix_format_readers.prefix_to_operation_tree(expression["prefix"])
+
+                assert tree.to_prefix() == expression["prefix"]
+                assert tree.to_postfix() == expression["postfix"]
+                assert fix_format_readers.infix_to_operation_tree(tree.to_infix()).to_postfix() == expression["postfix"]
+
+    def test_streaming_deep_tree(self):
+        count = 100000
+        tree = fix_format_readers.postfix_to_operation_tree("1" + " 2 -" * count)
+
+        for write, expected_start in [(tree.to_infix, "1 - 2 - 2"), (tree.to_prefix, "- - -"), (tree.to_postfix, "1 2 - 2 -")]:
+            file = io.StringIO()
+            assert write(file=file) is None
+            text = file.getvalue()
+
+            assert text == write()
+            assert text.startswith(expected_start)
+            assert len(text.split(" ")) == 2 * count + 1
+
+    def test_single_leaf(self):
+        tree = OperationTree(OperationTreeNode("7", None))
+
+        assert tree.to_infix() == tree.to_prefix() == tree.to_postfix() == "7"
+
+    def test_invalid_tree(self):
+        root = OperationTreeNode("+", None)
+        root.setLeft(OperationTreeNode("2", None))
+
+        with pytest.raises(OperationTreeEvaluationError):
+            OperationTree(root).to_infix()
@@ -0,0 +1,95 @@
+from fix_format_demonstration import protocol
+from fix_format_demonstration.client import EvaluationClient
+from fix_format_demonstration.server import EvaluationServer
+from fractions import Fraction
+import asyncio
+import os
+import pytest
+
+
+def run_with_server(test, **server_options):
+    async def main():
+        evaluation_server = EvaluationServer(**server_options)
+        server = await evaluation_server.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            result = await test(port)
+            await evaluation_server.wait_closed()
+            return result
+    return asyncio.run(main())
+
+
+class TestEvaluationServer:
+
+    def test_calculate(self):
+        async def test(port):
+            async with await EvaluationClient.connect("127.0.0.1", port) as client:
+                assert await client.calculate("4*(5+3)^2") == 256.0
+                assert await client.calculate("+ 2 2", "prefix", " ") == 4.0
+                with pytest.raises(protocol.ProtocolError, match="division by zero"):
+                    await client.calculate("1 0 /", "postfix")
+
+        run_with_server(test)
+
+    def test_pipelined_results_in_order(self):
+        equations = [f"{i} * 2" for i in range(1000)] + ["1 +"]
+
+        async def test(port):
+            async with await EvaluationClient.connect("127.0.0.1", port, max_pending=100) as client:
+                return await client.calculate_many(equations)
+
+        results = run_with_server(test, max_pending=8)
+
+        assert results[:-1] == [i * 2.0 for i in range(1000)]
+        assert isinstance(results[-1], protocol.ProtocolError)
+
+    def test_large_expressions_offloaded(self):
+        count = 5000
+        large = " + ".join(["1"] * count)
+
+        async def test(port):
+            async with await EvaluationClient.connect("127.0.0.1", port) as client:
+                return await asyncio.gather(client.calculate(large), client.calculate("2 + 2"), client.calculate(large))
+
+        assert run_with_server(test, offload_size=100) == [count, 4.0, count]
+
+    def test_numeric(self):
+        async def test(port):
+            async with await EvaluationClient.connect("127.0.0.1", port) as client:
+                return await asyncio.gather(client.calculate("1 / 3"), client.calculate(" + ".join(["1 / 3"] * 300)))
+
+        assert run_with_server(test, offload_size=100, numeric="fraction") == [Fraction(1, 3), Fraction(100)]
+
+    def test_request_too_large(self):
+        async def test(port):
+            async with await EvaluationClient.connect("127.0.0.1", port) as client:
+                with pytest.raises(protocol.ProtocolError, match="longer than"):
+                    await client.calculate(" + ".join(["1"] * 1000))
+
+        run_with_server(test, max_request_size=1024)
+
+    def test_many_connections(self):
+        async def test(port):
+            async def connection(offset):
+                async with await EvaluationClient.connect("127.0.0.1", port) as client:
+                    return await client.calculate_many([f"{offset} + {i}" for i in range(50)])
+            return await asyncio.gather(*(connection(offset) for offset in range(10)))
+
+        results = run_with_server(test)
+
+        assert results == [[float(offset + i) for i in range(50)] for offset in range(10)]
+
+    @pytest.mark.skipif(not hasattr(asyncio, "start_unix_server"), reason="Unix sockets aren't available.")
+    def test_unix_socket(self, tmp_path):
+        path = os.path.join(tmp_path, "calculator.sock")
+
+        async def main():
+            evaluation_server = EvaluationServer()
+            server = await evaluation_server.start_unix(path)
+            async with server:
+                async with await EvaluationClient.connect_unix(path) as client:
+                    result = await client.calculate("2 ^ 10")
+                await evaluation_server.wait_closed()
+                return result
+
+        assert asyncio.run(main()) == 1024.0
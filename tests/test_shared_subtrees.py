@@ -0,0 +1,68 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode
+from fix_format_demonstration.parse_cache import ParseCache
+from fix_format_demonstration.utils import OperationEvaluator
+import pytest
+
+
+class TestSlots:
+
+    def test_nodes_have_no_dict(self):
+        node = OperationTreeNode("4", None)
+
+        assert not hasattr(node, "__dict__")
+        with pytest.raises(AttributeError):
+            node.extra = 1
+
+
+class TestSharedSubtrees:
+
+    def test_identical_subtrees_are_shared(self):
+        tree = fix_format_readers.infix_to_operation_tree("( a + b ) * ( a + b )", intern_subtrees=True)
+
+        assert tree._root._left_child is tree._root._right_child
+        assert tree.node_count() == 4
+        assert tree.evaluate({"a" : 1.0, "b" : 2.0}) == 9.0
+
+    def test_all_notations(self):
+        equations = {
+            "infix" : "( 2 + 3 ) * ( 2 + 3 ) - ( 2 + 3 )",
+            "prefix" : "- * + 2 3 + 2 3 + 2 3",
+            "postfix" : "2 3 + 2 3 + * 2 3 + -"
+        }
+
+        for notation, equation in equations.items():
+            plain = fix_format_readers.TREE_BUILDERS[notation](equation)
+            shared = fix_format_readers.TREE_BUILDERS[notation](equation, intern_subtrees=True)
+
+            assert plain.node_count() == 11
+            assert shared.node_count() == 5
+            assert shared.evaluate_tree() == plain.evaluate_tree() == 20.0
+
+    def test_shared_subtree_evaluated_once(self, monkeypatch):
+        calls = []
+        addition_opcode = OperationEvaluator.OPCODES['+']
+        addition = OperationEvaluator.OPCODE_FUNCTIONS[addition_opcode]
+
+        def counting_addition(first_operand, second_operand):
+            calls.append((first_operand, second_operand))
+            return addition(first_operand, second_operand)
+
+        functions = list(OperationEvaluator.OPCODE_FUNCTIONS)
+        functions[addition_opcode] = counting_addition
+        monkeypatch.setattr(OperationEvaluator, "OPCODE_FUNCTIONS", functions)
+        tree = fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * ( 1 + 2 ) * ( 1 + 2 )", intern_subtrees=True)
+
+        assert tree.evaluate_tree() == 27.0
+        assert len(calls) == 1
+
+    def test_cache_keeps_shared_trees_apart(self):
+        cache = ParseCache()
+
+        plain = fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * ( 1 + 2 )", cache=cache)
+        shared = fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * ( 1 + 2 )", cache=cache, intern_subtrees=True)
+
+        assert plain is not shared
+        assert plain.node_count() == 7
+        assert shared.node_count() == 4
+        assert len(cache) == 2
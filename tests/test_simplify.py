@@ -0,0 +1,137 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+from decimal import Decimal
+from fractions import Fraction
+import math
+import pytest
+
+
+def simplified(equation: str) -> OperationTree:
+    return fix_format_readers.infix_to_operation_tree(equation).simplify()
+
+
+class TestConstantFolding:
+
+    def test_literal_tree_folds_to_one_node(self):
+        tree = simplified("( ( 1 / 2 ) * ( 3 + 4 ) ) - ( ( 5 * 6 ) + ( 7 / 8 ) )")
+
+        assert tree.node_count() == 1
+        assert tree.evaluate_tree() == -27.375
+
+    def test_literal_subtrees_fold(self):
+        tree = simplified("x * ( 2 + 3 ) - 4 ^ 2")
+
+        assert tree.node_count() == 5
+        assert tree.evaluate({"x" : 2.0}) == -6.0
+
+    def test_errors_are_not_folded(self):
+        tree = simplified("x + 1 / 0")
+
+        with pytest.raises(ZeroDivisionError):
+            tree.evaluate({"x" : 1.0})
+
+    def test_original_tree_untouched(self):
+        tree = fix_format_readers.infix_to_operation_tree("2 + 3")
+
+        tree.simplify()
+
+        assert tree.node_count() == 3
+
+
+class TestIdentities:
+
+    def test_identities_removed(self):
+        for equation in ["x * 1", "1 * x", "x / 1", "x - 0", "x ^ 1", "( x * ( 3 - 2 ) ) ^ ( 2 - 1 ) - 0"]:
+            tree = simplified(equation)
+
+            assert tree.node_count() == 1
+            assert tree._root._value == "x"
+
+    def test_non_identities_kept(self):
+        for equation in ["1 / x", "0 - x", "1 ^ x", "x - 1", "x + 0", "0 + x"]:
+            assert simplified(equation).node_count() == 3
+
+    def test_sign_of_zero_kept(self):
+        numpy = pytest.importorskip("numpy")
+        columns = {"x" : numpy.array([-0.0])}
+
+        for equation in ["1 / ( x + 0 )", "1 / ( 0 + x )", "1 / ( x - 0 )"]:
+            tree = fix_format_readers.infix_to_operation_tree(equation)
+            with numpy.errstate(divide="ignore"):
+                assert tree.simplify().evaluate(columns).tolist() == tree.evaluate(columns).tolist()
+
+    def test_multiplication_by_zero_with_variable_kept(self):
+        tree = simplified("0 * x")
+
+        assert tree.node_count() == 3
+        assert math.isnan(tree.evaluate({"x" : math.inf}))
+
+    def test_multiplication_by_zero_with_literals_folded(self):
+        tree = simplified("0 * ( 2 ^ 10 + 3 * 4 - 5 / 6 )")
+
+        assert tree.node_count() == 1
+        assert tree.evaluate_tree() == 0.0
+
+    def test_special_values(self):
+        for value in [math.inf, -math.inf, -0.0, 3.5]:
+            tree = fix_format_readers.infix_to_operation_tree("( x * 1 ) ^ 1 / 1 - 0")
+            assert tree.simplify().evaluate({"x" : value}) == tree.evaluate({"x" : value})
+        assert math.isnan(simplified("x * 1").evaluate({"x" : math.nan}))
+
+
+class TestNumericBackends:
+
+    def test_int(self):
+        tree = fix_format_readers.infix_to_operation_tree("2 ^ 70 + 3 * x").simplify(numeric="int")
+
+        assert tree.to_infix() == "1180591620717411303424 + 3 * x"
+        assert tree.evaluate({"x" : 1}, numeric="int") == 2 ** 70 + 3
+
+    def test_decimal(self):
+        tree = fix_format_readers.infix_to_operation_tree("( 0.1 + 0.2 ) * x").simplify(numeric="decimal")
+
+        assert tree.node_count() == 3
+        assert tree.evaluate({"x" : Decimal(1)}, numeric="decimal") == Decimal("0.3")
+
+    def test_decimal_identities_kept(self):
+        tree = fix_format_readers.infix_to_operation_tree("x * 1").simplify(numeric="decimal")
+
+        assert tree.node_count() == 3
+
+    def test_fraction_without_literal_kept(self):
+        tree = fix_format_readers.infix_to_operation_tree("x + 1 / 3").simplify(numeric="fraction")
+
+        assert tree.node_count() == 5
+        assert tree.evaluate({"x" : Fraction(1)}, numeric="fraction") == Fraction(4, 3)
+
+    def test_fraction_folds_through_unwritten_values(self):
+        tree = fix_format_readers.infix_to_operation_tree("x * ( 1 / 3 * 3 )").simplify(numeric="fraction")
+
+        assert tree.node_count() == 1
+        assert tree.evaluate({"x" : Fraction(2, 7)}, numeric="fraction") == Fraction(2, 7)
+
+    def test_fraction_inf_left_for_evaluation(self):
+        tree = fix_format_readers.infix_to_operation_tree("inf + 1").simplify(numeric="fraction")
+
+        assert tree.node_count() == 3
+        with pytest.raises(ValueError):
+            tree.evaluate_tree(numeric="fraction")
+
+
+class TestSimplifyTrees:
+
+    def test_shared_subtrees_stay_shared(self):
+        tree = fix_format_readers.infix_to_operation_tree("( x * 1 + y ) * ( x * 1 + y )", intern_subtrees=True)
+
+        result = tree.simplify()
+
+        assert result._root._left_child is result._root._right_child
+        assert result.node_count() == 4
+        assert result.evaluate({"x" : 2.0, "y" : 1.0}) == 9.0
+
+    def test_invalid_tree(self):
+        root = OperationTreeNode("+", None)
+        root.setLeft(OperationTreeNode("4", None))
+
+        with pytest.raises(OperationTreeEvaluationError):
+            OperationTree(root).simplify()
@@ -0,0 +1,73 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration import operation_tree
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+from fix_format_demonstration.utils import UnboundVariableError
+import pytest
+
+
+class TestToFunction:
+
+    def test_literals(self):
+        for equation in ["4 * ( 5 + 3 ) ^ 2", "1 / 3 - 2 ^ 0.5", "( 1 - 2 ) - ( 3 - 4 ) * 5 / 6"]:
+            tree = fix_format_readers.infix_to_operation_tree(equation)
+
+            assert tree.to_function()() == tree.evaluate_tree()
+
+    def test_variables_as_parameters(self):
+        tree = fix_format_readers.infix_to_operation_tree("y * 2 + x ^ y")
+
+        function = tree.to_function()
+
+        assert function(3.0, 2.0) == 3.0 * 2 + 2.0 ** 3.0
+        assert function(x=2.0, y=3.0) == 3.0 * 2 + 2.0 ** 3.0
+        assert tree.to_function(["x", "y", "unused"])(2.0, 3.0, 100.0) == 3.0 * 2 + 2.0 ** 3.0
+
+    def test_keyword_variables(self):
+        tree = fix_format_readers.infix_to_operation_tree("None + if * x")
+
+        assert tree.to_function()(2.0, 3.0, 4.0) == tree.evaluate({"None" : 2.0, "if" : 3.0, "x" : 4.0}) == 14.0
+
+    def test_missing_parameter(self):
+        tree = fix_format_readers.infix_to_operation_tree("x + y")
+
+        with pytest.raises(UnboundVariableError):
+            tree.to_function(["x"])
+
+    def test_errors_at_call(self):
+        function = fix_format_readers.infix_to_operation_tree("x / ( 2 - 2 )").to_function()
+
+        with pytest.raises(ZeroDivisionError):
+            function(1.0)
+
+    def test_invalid_tree(self):
+        with pytest.raises(OperationTreeEvaluationError):
+            OperationTree(OperationTreeNode("+", None)).to_function()
+
+    def test_snapshot(self):
+        tree = fix_format_readers.infix_to_operation_tree("2 + 3")
+        function = tree.to_function()
+        tree.update_leaf(tree._root._left_child, 10.0)
+
+        assert function() == 5.0
+
+    def test_deep_tree(self):
+        count = 20000
+        tree = fix_format_readers.postfix_to_operation_tree("x" + " 1 +" * count)
+
+        assert tree.to_function()(0.5) == count + 0.5
+
+    def test_shared_subtrees(self):
+        equation = " * ".join(["( x + 1 ) ^ 2"] * 8)
+        tree = fix_format_readers.infix_to_operation_tree(equation, intern_subtrees=True)
+
+        assert tree.to_function()(2.0) == fix_format_readers.infix_to_operation_tree(equation).evaluate({"x" : 2.0})
+
+    def test_fallback(self, monkeypatch):
+        monkeypatch.setattr(operation_tree, "_MAX_NESTING", 10 ** 9)
+        count = 50000
+        tree = fix_format_readers.postfix_to_operation_tree("x" + " 1 -" * count)
+
+        function = tree.to_function()
+
+        assert function(0.0) == -count
+        assert function(x=1.0) == 1.0 - count
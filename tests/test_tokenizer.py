@@ -0,0 +1,106 @@
+from . import utils
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.tokenizer import scan_tokens, InvalidTokenError
+import types
+import pytest
+
+
+class TestScanTokens:
+
+    def test_adjacent_tokens(self):
+        assert list(scan_tokens("4*(5+3)^2")) == ["4", "*", "(", "5", "+", "3", ")", "^", "2"]
+
+    def test_whitespace_is_skipped(self):
+        assert list(scan_tokens("  4 *\t( 5+3 )  ")) == ["4", "*", "(", "5", "+", "3", ")"]
+
+    def test_is_lazy(self):
+        tokens = scan_tokens("1 + 2")
+
+        assert isinstance(tokens, types.GeneratorType)
+        assert next(tokens) == "1"
+
+    def test_numbers(self):
+        assert list(scan_tokens("1.5e-3+.5+2.+3E2")) == ["1.5e-3", "+", ".5", "+", "2.", "+", "3E2"]
+
+    def test_numbers_as_float_reads_them(self):
+        assert list(scan_tokens("1_000+2_0.5_5e1_0")) == ["1_000", "+", "2_0.5_5e1_0"]
+        assert list(scan_tokens("１２+-٣")) == ["１２", "+", "-٣"]
+        assert list(scan_tokens("1__0")) == ["1", "__0"]
+
+    def test_infix_signs(self):
+        assert list(scan_tokens("-2*-3")) == ["-2", "*", "-3"]
+        assert list(scan_tokens("5-3")) == ["5", "-", "3"]
+        assert list(scan_tokens("(-2)-(+3)")) == ["(", "-2", ")", "-", "(", "+3", ")"]
+        assert list(scan_tokens("x-1")) == ["x", "-", "1"]
+
+    def test_prefix_and_postfix_signs(self):
+        assert list(scan_tokens("2 -3 +", "postfix")) == ["2", "-3", "+"]
+        assert list(scan_tokens("- 2 3", "prefix")) == ["-", "2", "3"]
+        assert list(scan_tokens("- -2 3", "prefix")) == ["-", "-2", "3"]
+
+    def test_identifiers(self):
+        assert list(scan_tokens("rate*x_1+inf")) == ["rate", "*", "x_1", "+", "inf"]
+
+    def test_non_ascii_identifiers(self):
+        assert list(scan_tokens("größe*2+é")) == ["größe", "*", "2", "+", "é"]
+        assert fix_format_readers.calculate_infix("é + 1", None, {"é" : 1.0}) == 2.0
+
+    def test_unexpected_character(self):
+        with pytest.raises(InvalidTokenError, match="position 2"):
+            list(scan_tokens("2 $ 3"))
+        with pytest.raises(InvalidTokenError, match="'²' at position 1"):
+            list(scan_tokens("x² + 1"))
+
+
+class TestReadersWithoutSeparator:
+
+    def test_calculators(self):
+        for sep in [None, ""]:
+            assert fix_format_readers.calculate_infix("4*(5+3)^2", sep) == 256.0
+            assert fix_format_readers.calculate_prefix("*4 ^+5 3 2", sep) == 256.0
+            assert fix_format_readers.calculate_postfix("4 5 3+2^*", sep) == 256.0
+
+    def test_tree_builders(self):
+        equations = {"infix" : "4*(5+3)^2", "prefix" : "* 4 ^ + 5 3 2", "postfix" : "4 5 3 + 2 ^ *"}
+
+        for notation, equation in equations.items():
+            tree = fix_format_readers.TREE_BUILDERS[notation](equation, None)
+            assert tree.evaluate_tree() == 256.0
+
+    def test_scientific_and_negative_numbers(self):
+        assert utils.float_within_error(fix_format_readers.calculate_infix("-1.5e2*-2+1e-1", None), 300.1, 0.0001)
+        assert fix_format_readers.calculate_postfix("-2 3 *", None) == -6.0
+        assert fix_format_readers.calculate_prefix("* -2 3", None) == -6.0
+
+    def test_numbers_as_float_reads_them(self):
+        for equation, result in [("1_000 + 1", 1001.0), ("2 + 1_0", 12.0), ("１２ + 1", 13.0)]:
+            assert fix_format_readers.calculate_infix(equation, None) == result
+            assert fix_format_readers.calculate_infix(equation) == result
+        assert fix_format_readers.calculate_postfix("1_000 １２ +", None) == 1012.0
+
+    def test_matches_separated_expressions(self):
+        equations = [
+            ("infix", "( ( 1 / 2 ) * ( 3 + 4 ) ) - ( ( 5 * 6 ) + ( 7 / 8 ) )"),
+            ("prefix", "- * / 1 2 + 3 4 + * 5 6 / 7 8"),
+            ("postfix", "3 4 * 2 7 / +")
+        ]
+
+        for notation, equation in equations:
+            calculate = fix_format_readers.CALCULATORS[notation]
+            assert calculate(equation, None) == calculate(equation)
+
+    def test_errors(self):
+        with pytest.raises(fix_format_readers.InvalidInfixExpressionError):
+            fix_format_readers.calculate_infix("2(3+4)", None)
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            fix_format_readers.calculate_postfix("4", None)
+        with pytest.raises(fix_format_readers.InvalidPostfixExpressionError):
+            fix_format_readers.calculate_postfix("2 3 + +", None)
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            fix_format_readers.calculate_prefix("4", None)
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            fix_format_readers.calculate_prefix("+ 2 3 4", None)
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            fix_format_readers.calculate_prefix("+ + 2 3", None)
+        with pytest.raises(fix_format_readers.InvalidPrefixExpressionError):
+            fix_format_readers.prefix_to_operation_tree("+ 2", None)
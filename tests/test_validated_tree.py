@@ -0,0 +1,80 @@
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.compiled_expression import CompiledExpression
+from fix_format_demonstration.flat_operation_tree import FlatOperationTree
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode, OperationTreeEvaluationError
+import pytest
+
+
+def forbid_validation(monkeypatch):
+    def fail(self):
+        raise AssertionError("The tree was walked to validate it!")
+    monkeypatch.setattr(OperationTree, "is_tree_valid", fail)
+    monkeypatch.setattr(OperationTree, "is_tree_valid_recursive", fail)
+
+
+class TestValidatedTree:
+
+    def test_built_trees_skip_validation(self, monkeypatch):
+        trees = [
+            fix_format_readers.infix_to_operation_tree("4 * ( 5 + 3 ) ^ 2"),
+            fix_format_readers.postfix_to_operation_tree("4 5 3 + 2 ^ *"),
+            fix_format_readers.prefix_to_operation_tree("* 4 ^ + 5 3 2"),
+            fix_format_readers.infix_to_operation_tree("( 1 + 2 ) * ( 1 + 2 )", intern_subtrees=True)
+        ]
+        forbid_validation(monkeypatch)
+
+        for tree in trees:
+            tree.evaluate_tree()
+            tree.evaluate()
+            tree.evaluate_tree_recursive()
+            tree.simplify().evaluate_tree()
+            CompiledExpression.from_operation_tree(tree)
+            FlatOperationTree.from_operation_tree(tree).to_operation_tree().evaluate_tree()
+            tree.to_function()
+
+    def test_validated_once(self, monkeypatch):
+        root = OperationTreeNode("+", None)
+        root.setLeft(OperationTreeNode("2", None))
+        root.setRight(OperationTreeNode("3", None))
+        tree = OperationTree(root)
+
+        assert tree.evaluate_tree() == 5.0
+        forbid_validation(monkeypatch)
+        assert tree.evaluate_tree() == 5.0
+
+    def test_mutation_invalidates(self):
+        tree = fix_format_readers.infix_to_operation_tree("2 + 3")
+        assert tree.evaluate_tree() == 5.0
+
+        tree._root.setLeft(OperationTreeNode("*", None))
+
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.evaluate_tree()
+        with pytest.raises(OperationTreeEvaluationError):
+            tree.evaluate_tree_recursive()
+
+    def test_mutation_elsewhere_rechecks(self):
+        tree = fix_format_readers.infix_to_operation_tree("2 + 3")
+        subtree = tree._root._left_child
+        other_root = OperationTreeNode("-", None)
+        other_root.setLeft(OperationTreeNode("1", None))
+
+        # Moving a node into another tree changes its parent pointer, but not the validity of this tree.
+        other_root.setRight(subtree)
+
+        assert tree.evaluate_tree() == 5.0
+
+    def test_hand_built_invalid_tree(self):
+        root = OperationTreeNode("+", None)
+        root.setLeft(OperationTreeNode("2", None))
+
+        with pytest.raises(OperationTreeEvaluationError):
+            OperationTree(root).evaluate_tree()
+
+    def test_update_leaf_keeps_validity(self, monkeypatch):
+        tree = fix_format_readers.infix_to_operation_tree("2 + 3")
+        forbid_validation(monkeypatch)
+
+        tree.update_leaf(tree._root._right_child, 10.0)
+
+        assert tree.evaluate_tree() == 12.0
@@ -0,0 +1,103 @@
+from . import utils
+from fix_format_demonstration import fix_format_readers
+from fix_format_demonstration.operation_tree import OperationTree, OperationTreeNode
+from fix_format_demonstration.utils import OperationEvaluator, UnboundVariableError
+import pytest
+
+
+class TestIsVariable:
+
+    def test_identifiers(self):
+        for token in ["x", "rate", "_tmp", "x2"]:
+            assert OperationEvaluator.is_variable(token) == True
+
+    def test_non_identifiers(self):
+        for token in ["2", "2.5", "inf", "nan", "+", "(", "2x"]:
+            assert OperationEvaluator.is_variable(token) == False
+
+
+class TestCalculateWithBindings:
+
+    def test_all_notations(self):
+        bindings = {"x" : 3.0, "rate" : 0.5}
+
+        assert fix_format_readers.calculate_infix("x * ( 2 + rate )", bindings=bindings) == 7.5
+        assert fix_format_readers.calculate_prefix("* x + 2 rate", bindings=bindings) == 7.5
+        assert fix_format_readers.calculate_postfix("x 2 rate + *", bindings=bindings) == 7.5
+
+    def test_unbound_variable(self):
+        with pytest.raises(UnboundVariableError):
+            fix_format_readers.calculate_infix("x + y", bindings={"x" : 1.0})
+
+    def test_unbound_variable_without_bindings(self):
+        for numeric in (None, "fraction"):
+            with pytest.raises(UnboundVariableError):
+                fix_format_readers.calculate_infix("x + 1", numeric=numeric)
+            with pytest.raises(UnboundVariableError):
+                fix_format_readers.calculate_postfix("x 1 +", numeric=numeric)
+            with pytest.raises(UnboundVariableError):
+                fix_format_readers.infix_to_operation_tree("x + 1").evaluate_tree(numeric)
+            with pytest.raises(UnboundVariableError):
+                fix_format_readers.infix_to_operation_tree("x * x", intern_subtrees=True).evaluate_tree(numeric)
+
+    def test_tree_evaluate(self):
+        for notation, equation in [("infix", "x * ( 2 + rate )"), ("prefix", "* x + 2 rate"), ("postfix", "x 2 rate + *")]:
+            tree = fix_format_readers.TREE_BUILDERS[notation](equation)
+            assert tree.evaluate({"x" : 3.0, "rate" : 0.5}) == 7.5
+
+    def test_tree_evaluate_unbound(self):
+        root = OperationTreeNode("+", None)
+        root.setLeft(OperationTreeNode("x", None))
+        root.setRight(OperationTreeNode("1", None))
+
+        with pytest.raises(UnboundVariableError):
+            OperationTree(root).evaluate()
+
+    def test_compiled_expression(self):
+        compiled = fix_format_readers.compile("x ^ 2 - rate", "infix")
+
+        assert compiled.variables == frozenset(["x", "rate"])
+        assert compiled.evaluate({"x" : 3.0, "rate" : 1.0}) == 8.0
+        with pytest.raises(UnboundVariableError):
+            compiled.evaluate()
+
+
+class TestVectorizedEvaluation:
+
+    def test_tree_over_arrays(self):
+        numpy = pytest.importorskip("numpy")
+        x = numpy.arange(1000, dtype=numpy.float64)
+        tree = fix_format_readers.infix_to_operation_tree("x * ( 2 + rate ) - 1")
+
+        result = tree.evaluate({"x" : x, "rate" : 0.5})
+
+        assert numpy.allclose(result, x * 2.5 - 1)
+
+    def test_compiled_over_arrays(self):
+        numpy = pytest.importorskip("numpy")
+        x = numpy.linspace(1, 2, 100)
+        y = numpy.linspace(3, 4, 100)
+        compiled = fix_format_readers.compile("x y ^ y /", "postfix")
+
+        assert numpy.allclose(compiled.evaluate({"x" : x, "y" : y}), x ** y / y)
+
+    def test_calculators_over_arrays(self):
+        numpy = pytest.importorskip("numpy")
+        x = numpy.array([1, 2, 3])
+
+        for calculate, equation in [(fix_format_readers.calculate_infix, "x / 2"),
+                                    (fix_format_readers.calculate_prefix, "/ x 2"),
+                                    (fix_format_readers.calculate_postfix, "x 2 /")]:
+            result = calculate(equation, bindings={"x" : x})
+            assert result.dtype == numpy.float64
+            assert numpy.allclose(result, [0.5, 1.0, 1.5])
+
+    def test_matches_scalar_evaluation(self):
+        numpy = pytest.importorskip("numpy")
+        rows = numpy.array([0.5, 1.5, 2.5, 3.5])
+        tree = fix_format_readers.infix_to_operation_tree("( x + 1 ) * ( x - 1 ) / 2 ^ x")
+
+        column_result = tree.evaluate({"x" : rows})
+
+        for row, value in zip(rows, column_result):
+            assert utils.float_within_error(tree.evaluate({"x" : float(row)}), value, 1e-9)